@@ -1,3 +1,5 @@
+import hashlib
+
 from django.apps import AppConfig
 
 
@@ -5,16 +7,125 @@ class ComponentsConfig(AppConfig):
     name = 'components'
 
     def ready(self):
-        from django.db.models.signals import post_migrate
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+        from components import catalogue, compat_index, facets, normalize
+        from components.models import Category, Component, DroneModel
+        connection_created.connect(_set_journal_mode)
+        pre_save.connect(normalize.on_component_pre_save, sender=Component)
+        post_save.connect(normalize.on_component_saved, sender=Component)
+        post_save.connect(normalize.on_category_saved, sender=Category)
+        post_save.connect(facets.on_component_saved, sender=Component)
+        post_save.connect(facets.on_category_saved, sender=Category)
+        post_save.connect(compat_index.on_component_saved, sender=Component)
+        post_save.connect(compat_index.on_category_saved, sender=Category)
+        # After the derived indexes, so a new version never sees stale ones
+        for model in (Category, Component, DroneModel):
+            post_save.connect(catalogue.on_catalogue_changed, sender=model)
+            post_delete.connect(catalogue.on_catalogue_changed, sender=model)
+        post_migrate.connect(_ensure_query_indexes, sender=self)
+        post_migrate.connect(_rebuild_facet_index, sender=self)
+        post_migrate.connect(_normalize_compat_values, sender=self)
+        post_migrate.connect(_rebuild_compat_index, sender=self)
         post_migrate.connect(_auto_seed, sender=self)
 
 
+JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+
+
+def _set_journal_mode(sender, connection, **kwargs):
+    """PRAGMA journal_mode=settings.SQLITE_JOURNAL_MODE on each new SQLite connection."""
+    from django.conf import settings
+    if connection.vendor != 'sqlite':
+        return
+    mode = (getattr(settings, 'SQLITE_JOURNAL_MODE', '') or '').upper()
+    if not mode:
+        return
+    if mode not in JOURNAL_MODES:
+        raise ValueError(f'Unknown SQLITE_JOURNAL_MODE {mode!r}; use one of {", ".join(sorted(JOURNAL_MODES))}')
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode={mode}')
+
+
+def _ensure_query_indexes(sender, using='default', **kwargs):
+    """(Re)create the schema-derived expression indexes used by ?where= / ?sort=."""
+    from components.query import ensure_query_indexes
+    ensure_query_indexes(using=using)
+
+
+# ── Derived tables ──────────────────────────────────────────
+# post_migrate rebuilds a derived table only when this app's migrations
+# ran (its tables may have changed) or the code and definitions it is
+# derived from changed since the last rebuild (DerivedIndexState), so a
+# no-op migrate on a large catalogue stays fast.
+
+def _inputs_hash(modules, extra=''):
+    """sha256 of module sources plus extra definitions."""
+    digest = hashlib.sha256(extra.encode())
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _rebuild_if_stale(name, inputs_hash, rebuild, using='default', plan=None):
+    """Run rebuild(using=...) when needed and record the inputs it was built from. True if it ran."""
+    from django.db import connections
+    from components.models import DerivedIndexState
+    if DerivedIndexState._meta.db_table not in connections[using].introspection.table_names():
+        return False  # migrated back past the tables
+    migrated = any(migration.app_label == 'components' for migration, _ in plan or [])
+    states = DerivedIndexState.objects.using(using)
+    if not migrated and states.filter(name=name, inputs_hash=inputs_hash).exists():
+        return False
+    rebuild(using=using)
+    states.update_or_create(name=name, defaults={'inputs_hash': inputs_hash})
+    return True
+
+
+def _rebuild_facet_index(sender, using='default', plan=None, **kwargs):
+    """Rebuild the filter facet index so it matches facets.FACET_FIELDS."""
+    from components import facets
+    inputs = _inputs_hash([facets], repr((facets.COMMON_FACETS, sorted(facets.FACET_FIELDS.items()))))
+    _rebuild_if_stale('facets', inputs, facets.rebuild_facet_index, using, plan)
+
+
+def _normalize_compat_values(sender, using='default', plan=None, **kwargs):
+    """Recompute Component.compat_values (and ComponentCompat) so they match compat.CHECKS."""
+    from components import compat, normalize
+
+    def rebuild(using):
+        normalize.renormalize(using=using)
+        normalize.rebuild_projection(using=using)
+    _rebuild_if_stale('compat_values', _inputs_hash([compat, normalize]), rebuild, using, plan)
+
+
+def _rebuild_compat_index(sender, using='default', plan=None, **kwargs):
+    """Rebuild the pairwise compatibility index so it matches compat.CHECKS and the schema's severities."""
+    from components import compat, compat_index, normalize
+    try:
+        with open(compat.SCHEMA_PATH, 'r', encoding='utf-8') as f:
+            schema = f.read()
+    except OSError:
+        schema = ''
+    inputs = _inputs_hash([compat, compat_index, normalize], schema)
+    _rebuild_if_stale('compat_index', inputs, compat_index.rebuild_compat_index, using, plan)
+
+
 def _auto_seed(sender, **kwargs):
-    """Seed the golden parts database on first migrate (empty DB only)."""
+    """
+    Seed the golden parts database on first migrate (empty DB only), or
+    leave it to the web process when AUTO_SEED is 'background'.
+    """
     import sys
     if 'test' in sys.argv:
         return
 
+    from components.autoseed import auto_seed_mode, mark_pending
+    mode = auto_seed_mode()
+    if mode == 'off':
+        return
+
     from components.models import Component
     if Component.objects.exists():
         return
@@ -24,6 +135,11 @@ def _auto_seed(sender, **kwargs):
     if not os.path.isdir(SEED_DIR):
         return
 
+    if mode == 'background':
+        mark_pending()
+        print('[DroneClear] Golden seed deferred: it runs in the background once the server starts.')
+        return
+
     result = seed_golden(wipe=False)
     if result['components'] > 0:
         print(
@@ -0,0 +1,151 @@
+"""
+autoseed.py — First-boot golden seed, inline or in the background.
+
+settings.AUTO_SEED (env DRONECLEAR_AUTO_SEED) chooses what `migrate` does
+on a database without components:
+  'sync'        seed inside post_migrate (default)
+  'background'  only record SeedStatus 'pending'; the web process seeds in
+                a worker thread once it has started (start_background_seed()
+                from wsgi.py), so migrate and container start stay fast
+  'off'         never seed automatically
+
+  GET /api/health/ready/   200 {"status": "ready"}
+                           503 {"status": "pending" | "seeding" | "failed"}
+
+While a background seed is pending or running, catalogue endpoints
+(CatalogueReadyMixin) answer 503 {"status": "seeding", "error": ...} with
+Retry-After instead of serving a partial or empty catalogue. A failed seed
+is not ready either (503 {"status": "failed"} from both), and the next
+process start claims it again and retries. Exactly one process claims the
+seed, with a conditional UPDATE on the SeedStatus row; a claim whose
+updated_at is older than STALE_AFTER (the process died) can be taken over.
+Once a process has seen the catalogue ready it stops checking.
+
+Used by: apps._auto_seed (post_migrate), wsgi.py, ReadinessView and the
+catalogue views.
+"""
+import datetime
+import threading
+
+from django.conf import settings
+from django.db import OperationalError, ProgrammingError, connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+STALE_AFTER = datetime.timedelta(minutes=5)
+RETRY_AFTER_SECONDS = 5
+
+_ready = False
+
+
+def auto_seed_mode():
+    return getattr(settings, 'AUTO_SEED', 'sync')
+
+
+# ── State ───────────────────────────────────────────────────
+
+def seed_state():
+    """'ready' unless a background seed is pending, running or failed."""
+    from components.models import SeedStatus
+    return SeedStatus.objects.filter(pk=1).values_list('state', flat=True).first() or 'ready'
+
+
+def catalogue_ready():
+    global _ready
+    if not _ready and seed_state() == 'ready':
+        _ready = True
+    return _ready
+
+
+def mark_pending():
+    """Record that the golden seed still has to run (called from post_migrate)."""
+    global _ready
+    from components.models import SeedStatus
+    SeedStatus.objects.update_or_create(pk=1, defaults={
+        'state': 'pending', 'message': '', 'started_at': None, 'finished_at': None,
+    })
+    _ready = False
+
+
+def claim_seed():
+    """Move pending/failed/stale state to 'seeding'; True for the one caller that did."""
+    from components.models import SeedStatus
+    stale = Q(state='seeding', updated_at__lt=timezone.now() - STALE_AFTER)
+    return bool(SeedStatus.objects.filter(Q(pk=1), Q(state__in=['pending', 'failed']) | stale).update(
+        state='seeding', message='', started_at=timezone.now(), finished_at=None, updated_at=timezone.now(),
+    ))
+
+
+# ── Worker ──────────────────────────────────────────────────
+
+def run_seed():
+    """Seed the golden catalogue and record the outcome (worker thread or inline)."""
+    global _ready
+    from components.models import SeedStatus
+    from components.seed import seed_golden
+    try:
+        result = seed_golden(wipe=False)
+    except Exception as e:
+        SeedStatus.objects.filter(pk=1).update(
+            state='failed', message=str(e), finished_at=timezone.now(), updated_at=timezone.now())
+        print(f'[DroneClear] Background seed failed: {e}')
+    else:
+        SeedStatus.objects.filter(pk=1).update(
+            state='ready', finished_at=timezone.now(), updated_at=timezone.now())
+        _ready = True
+        print(
+            f'[DroneClear] Auto-seeded in background: {result["categories"]} categories, '
+            f'{result["components"]} components, {result["drone_models"]} drone models, '
+            f'{result["build_guides"]} build guides.'
+        )
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def start_background_seed():
+    """Start the seed worker if this process claims a pending (or failed) seed."""
+    if auto_seed_mode() != 'background':
+        return None
+    try:
+        if catalogue_ready() or not claim_seed():
+            return None
+    except (OperationalError, ProgrammingError):
+        # Loaded before `migrate` created SeedStatus; post_migrate decides then
+        return None
+    thread = threading.Thread(target=run_seed, name='golden-seed', daemon=True)
+    thread.start()
+    return thread
+
+
+# ── Request gating ──────────────────────────────────────────
+
+class CatalogueSeeding(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_code = 'seeding'
+
+    def __init__(self, state='seeding'):
+        if state == 'failed':
+            detail = {'status': 'failed',
+                      'error': 'Seeding the parts catalogue failed. It is retried when the server restarts.'}
+        else:
+            detail = {'status': 'seeding', 'error': 'The parts catalogue is being seeded. Retry shortly.'}
+        super().__init__(detail)
+
+
+class CatalogueReadyMixin:
+    """View mixin: 503 "seeding" (or "failed") until a background first-boot seed has finished."""
+
+    def initial(self, request, *args, **kwargs):
+        if not catalogue_ready():
+            raise CatalogueSeeding(seed_state())
+        super().initial(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if isinstance(exc, CatalogueSeeding):
+            response['Retry-After'] = str(RETRY_AFTER_SECONDS)
+        return response
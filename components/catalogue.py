@@ -0,0 +1,155 @@
+"""
+catalogue.py — Catalogue version counter and conditional GET for read endpoints.
+
+The parts catalogue (Category, Component, DroneModel) carries a single
+monotonically increasing version in CatalogueVersion. Every save/delete
+of those models bumps it through signals; bulk writers (seed_golden(),
+seed_examples(), ImportPartsView, import_json_db) wrap their work in
+catalogue_writes() so the whole batch costs one bump instead of one per row.
+
+CatalogueETagMixin derives a strong ETag from (version, request path +
+query, Accept) and answers a matching If-None-Match with 304 before any
+queryset is evaluated or serialized.
+
+CatalogueCacheMixin keeps the rendered bytes of list responses in the
+CATALOGUE_RESPONSE_CACHE cache alias (LocMemCache with LRU eviction by
+default; a FileBasedCache works too), keyed by (version, URL, Accept).
+Every bump clears this process's cache; other processes never read their
+stale entries again because the version in the key has moved on, and
+those fall out through normal eviction.
+
+Every bump also drops the in-memory part columns of suggest.py.
+
+Used by: CategoryViewSet, ComponentViewSet, DroneModelViewSet, seed.py,
+ImportPartsView, import_json_db, apps.ready() (signals), suggest.py.
+"""
+import hashlib
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+_local = threading.local()
+
+
+# ── Version counter ─────────────────────────────────────────
+
+def get_version():
+    from components.models import CatalogueVersion
+    version = CatalogueVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    return version or 0
+
+
+def bump_version():
+    """Increment the catalogue version (creating the row on first use)."""
+    from components.models import CatalogueVersion
+    if not CatalogueVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        CatalogueVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    response_cache().clear()
+    from components.suggest import clear_columns
+    clear_columns()
+
+
+@contextmanager
+def catalogue_writes():
+    """
+    Defer per-row bumps for a block of catalogue writes and bump once on
+    exit. Nests; usable as a decorator.
+    """
+    depth = getattr(_local, 'depth', 0)
+    _local.depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.depth = depth
+        if depth == 0:
+            bump_version()
+
+
+def on_catalogue_changed(sender, raw=False, **kwargs):
+    """post_save / post_delete receiver for Category, Component, DroneModel."""
+    if not raw and not getattr(_local, 'depth', 0):
+        bump_version()
+
+
+# ── Conditional GET ─────────────────────────────────────────
+
+def request_version(request):
+    """Catalogue version, read once per request."""
+    if not hasattr(request, '_catalogue_version'):
+        request._catalogue_version = get_version()
+    return request._catalogue_version
+
+
+def catalogue_etag(request, version=None):
+    version = request_version(request) if version is None else version
+    key = f'{version}\n{request.get_full_path()}\n{request.META.get("HTTP_ACCEPT", "")}'
+    return f'"v{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+
+class CatalogueETagMixin:
+    """
+    ViewSet mixin: strong ETag on list/retrieve derived from the catalogue
+    version; If-None-Match hits return 304 without touching the queryset.
+    """
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag = catalogue_etag(request)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            tags = parse_etags(if_none_match)
+            if etag in tags or '*' in tags:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Cache-Control'] = 'no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
+
+
+# ── Rendered response cache ─────────────────────────────────
+
+def response_cache():
+    return caches[getattr(settings, 'CATALOGUE_RESPONSE_CACHE', 'default')]
+
+
+class CatalogueCacheMixin:
+    """
+    ViewSet mixin: read-through cache of rendered list responses. A hit
+    returns the stored bytes without running the queryset or serializer.
+    """
+
+    def _response_cache_key(self, request):
+        key = f'{request.build_absolute_uri()}\n{request.META.get("HTTP_ACCEPT", "")}'
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return f'catalogue:{self.basename}:v{request_version(request)}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        key = self._response_cache_key(request)
+        cached = response_cache().get(key)
+        if cached is not None:
+            content_type, content = cached
+            return HttpResponse(content, content_type=content_type)
+        request._catalogue_cache_key = key
+        return super().list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(request, '_catalogue_cache_key', None)
+        if key and response.status_code == status.HTTP_200_OK and hasattr(response, 'render'):
+            response.render()
+            response_cache().set(key, (response['Content-Type'], response.content), None)
+        return response
@@ -0,0 +1,615 @@
+"""
+compat.py — Server-side compatibility engine.
+
+Python port of getBuildWarnings() in build.js. The 12 checks are declared
+once in CHECKS and compiled against the _compat_hard/_compat_soft
+classification from drone_parts_schema_v3.json into predicate objects.
+The compiled engine is cached per schema file mtime, so edits made through
+SchemaView are picked up on the next request.
+
+Severity resolution mirrors getConstraintSeverity(): a part's own
+_compat_hard/_compat_soft arrays win. Parts that carry no classification
+fall back to the schema's classification for their category.
+
+Saved components carry their check values pre-parsed in compat_values
+(normalize.py runs every extractor once at write time, stack FC/ESC views
+included), so evaluating them is plain comparisons. Parts without them
+(unsaved instances, raw payloads) go through the extractors.
+
+Used by:
+  - API view: CompatCheckView (POST /api/compat/check/)
+  - API view: CompatCandidatesView (POST /api/compat/candidates/)
+"""
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+from itertools import repeat
+
+from django.conf import settings
+
+from components.models import Component
+
+
+SCHEMA_PATH = os.path.join(settings.BASE_DIR, 'drone_parts_schema_v3.json')
+
+# Build role → category slug. 'fc' and 'esc' fall back to a selected stack.
+ROLE_CATEGORIES = {
+    'frame': 'frames',
+    'props': 'propellers',
+    'fc': 'flight_controllers',
+    'motors': 'motors',
+    'esc': 'escs',
+    'bat': 'batteries',
+    'vtx': 'video_transmitters',
+    'cam': 'fpv_cameras',
+}
+STACK_CATEGORY = 'stacks'
+
+# A part as seen by the engine: pid, category slug, (effective) schema_data
+# and, when normalized, its compat_values ({role: {field: value}}, see normalize.py)
+Part = namedtuple('Part', ['pid', 'category', 'data', 'values'], defaults=[None])
+
+
+# ── Value helpers (JS parseFloat / parseInt / || semantics) ─
+
+_FLOAT_RE = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+_INT_RE = re.compile(r'\s*[-+]?\d+')
+
+
+def to_float(value):
+    """parseFloat() equivalent. Returns None for unparseable or zero values,
+    matching the truthiness guards in build.js."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        result = float(value)
+    else:
+        match = _FLOAT_RE.match(str(value))
+        if not match:
+            return None
+        result = float(match.group(0))
+    return result or None
+
+
+def to_int(value):
+    """parseInt() equivalent. Returns None for unparseable or zero values."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        result = int(value)
+    else:
+        match = _INT_RE.match(str(value))
+        if not match:
+            return None
+        result = int(match.group(0))
+    return result or None
+
+
+def first(*values):
+    """JS `a || b || c` — first truthy value, else None."""
+    for value in values:
+        if value:
+            return value
+    return None
+
+
+def compat_block(data):
+    """The compatibility block of a schema_data dict (always a dict)."""
+    block = data.get('compatibility') if isinstance(data, dict) else None
+    return block if isinstance(block, dict) else {}
+
+
+def fmt(value):
+    """Format a value the way JS template literals would (5.0 → '5')."""
+    if isinstance(value, (list, tuple)):
+        return ', '.join(fmt(v) for v in value)
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# ── Field extractors ────────────────────────────────────────
+# Each takes an (effective) schema_data dict and returns the comparable
+# value, or None when the check should be skipped.
+
+def _mount_patterns(data):
+    patterns = compat_block(data).get('fc_mounting_patterns_mm') or []
+    if not isinstance(patterns, list):
+        patterns = [patterns]
+    values = [v for v in (to_float(p) for p in patterns) if v is not None]
+    return tuple(values) or None
+
+
+def _battery_cells(data):
+    return to_int(first(data.get('cell_count'), compat_block(data).get('cell_count')))
+
+
+def _battery_voltage(data):
+    return to_float(first(compat_block(data).get('voltage_max_v'), data.get('full_charge_voltage_v')))
+
+
+def _range(data, min_key, max_key, parse):
+    """(min, max) pair from the compatibility block; None when min is missing."""
+    compat = compat_block(data)
+    low, high = parse(compat.get(min_key)), parse(compat.get(max_key))
+    return (low, high) if low else None
+
+
+def _upper(value):
+    return str(value).upper() if value else None
+
+
+def _digital_vtx(data):
+    compat = compat_block(data)
+    if first(compat.get('video_standard'), data.get('video_standard')) != 'digital':
+        return None
+    return first(data.get('digital_system'), compat.get('digital_system'))
+
+
+def _field(key, parse=None):
+    """Extractor for compatibility.<key>, optionally parsed."""
+    def extract(data):
+        value = compat_block(data).get(key)
+        return parse(value) if parse else (value or None)
+    return extract
+
+
+# ── Check definitions ───────────────────────────────────────
+
+class Check:
+    """
+    One compatibility rule between two build roles.
+
+    left/right are (role, field, extractor) triples; the extractor reads the
+    value from schema_data and `field` names it in the part's normalized
+    compat_values. `violated(a, b)` receives the two values. `severity` is
+    either a literal ('error' / 'warning') or a (side, field) pair resolved
+    against the part on that side.
+    """
+
+    def __init__(self, code, title, left, right, violated, message,
+                 severity='warning', unless_stack=False):
+        self.code = code
+        self.title = title
+        self.left_role, self.left_field, self.left_extract = left
+        self.right_role, self.right_field, self.right_extract = right
+        self.violated = violated
+        self.message = message
+        self.severity = severity
+        self.unless_stack = unless_stack
+
+    @property
+    def roles(self):
+        return (self.left_role, self.right_role)
+
+
+CHECKS = [
+    Check(
+        '1', 'Propeller Size Exceeds Frame Limits',
+        ('frame', 'prop_size_max_in', _field('prop_size_max_in', to_float)),
+        ('props', 'diameter_in', lambda d: to_float(d.get('diameter_in'))),
+        lambda frame_max, prop: prop > frame_max,
+        lambda a, b: f'The frame supports up to {fmt(a)}" props, but you selected {fmt(b)}" propellers.',
+        severity=('left', 'prop_size_max_in'),
+    ),
+    Check(
+        '2', 'Flight Controller Mount Mismatch',
+        ('frame', 'fc_mounting_patterns_mm', _mount_patterns),
+        ('fc', 'mounting_pattern_mm',
+         lambda d: to_float(first(d.get('mounting_pattern_mm'), compat_block(d).get('mounting_pattern_mm')))),
+        lambda mounts, fc: fc not in mounts,
+        lambda a, b: f'The {fmt(b)}mm FC will not bolt onto this frame, which only supports: {fmt(a)}mm.',
+        severity=('left', 'fc_mounting_patterns_mm'),
+    ),
+    Check(
+        '3', 'Motor Mount Mismatch',
+        ('frame', 'motor_mount_hole_spacing_mm', _field('motor_mount_hole_spacing_mm', to_float)),
+        ('motors', 'motor_mount_hole_spacing_mm', _field('motor_mount_hole_spacing_mm', to_float)),
+        lambda frame_spacing, motor_spacing: frame_spacing != motor_spacing,
+        lambda a, b: f'These motors use {fmt(b)}mm spacing. The frame uses {fmt(a)}mm.',
+        severity=('left', 'motor_mount_hole_spacing_mm'),
+    ),
+    Check(
+        '4', 'Battery Voltage High for Motors',
+        ('bat', 'cell_count', _battery_cells),
+        ('motors', 'cell_count_max', _field('cell_count_max', to_int)),
+        lambda cells, motor_max: cells > motor_max,
+        lambda a, b: f'These motors are rated for up to {b}S, but you chose a {a}S battery.',
+        severity=('right', 'cell_count_max'),
+    ),
+    Check(
+        '5', 'ESC Overvoltage Risk',
+        ('bat', 'cell_count', _battery_cells),
+        ('esc', 'cell_count_max', _field('cell_count_max', to_int)),
+        lambda cells, esc_max: cells > esc_max,
+        lambda a, b: f'The ESC max rating is {b}S. A {a}S battery will likely fry it.',
+        severity=('right', 'cell_count_max'),
+    ),
+    Check(
+        '5b', 'Low Battery Voltage',
+        ('bat', 'cell_count', _battery_cells),
+        ('esc', 'cell_count_range', lambda d: _range(d, 'cell_count_min', 'cell_count_max', to_int)),
+        lambda cells, rng: cells < rng[0] and not (rng[1] and cells > rng[1]),
+        lambda a, b: f'The ESC expects at least {b[0]}S. A {a}S battery may not power it properly.',
+        severity=('right', 'cell_count_min'),
+    ),
+    Check(
+        'B1', 'FC Mounting Hole Size Mismatch',
+        ('frame', 'fc_mounting_hole_size', lambda d: d.get('fc_mounting_hole_size') or None),
+        ('fc', 'mounting_hole_size',
+         lambda d: first(compat_block(d).get('mounting_hole_size'), d.get('mounting_hole_size'))),
+        lambda frame_hole, fc_hole: frame_hole != fc_hole,
+        lambda a, b: f'The frame uses {a} mounting holes, but the FC requires {b}.',
+        severity=('left', 'fc_mounting_hole_size'),
+    ),
+    Check(
+        'B2', 'Motor Bolt Size Mismatch',
+        ('frame', 'motor_mount_bolt_size', _field('motor_mount_bolt_size')),
+        ('motors', 'motor_mount_bolt_size', _field('motor_mount_bolt_size')),
+        lambda frame_bolt, motor_bolt: frame_bolt != motor_bolt,
+        lambda a, b: f'The frame motor mounts use {a} bolts, but these motors require {b}.',
+        severity=('left', 'motor_mount_bolt_size'),
+    ),
+    Check(
+        'B3', 'ESC Mounting Pattern Mismatch',
+        ('frame', 'fc_mounting_patterns_mm', _mount_patterns),
+        ('esc', 'mounting_pattern_mm',
+         lambda d: to_float(first(compat_block(d).get('mounting_pattern_mm'), d.get('mounting_pattern_mm')))),
+        lambda mounts, esc: esc not in mounts,
+        lambda a, b: f"The {fmt(b)}mm ESC won't mount to this frame (supports: {fmt(a)}mm).",
+        severity=('right', 'mounting_pattern_mm'),
+        unless_stack=True,
+    ),
+    Check(
+        'B4', 'Battery Connector Mismatch',
+        ('bat', 'connector_type',
+         lambda d: _upper(first(compat_block(d).get('connector_type'), d.get('battery_connector')))),
+        ('esc', 'battery_connector',
+         lambda d: _upper(first(compat_block(d).get('battery_connector'), d.get('input_connector')))),
+        lambda bat_conn, esc_conn: bat_conn != esc_conn,
+        lambda a, b: f"The battery uses a {a} connector, but the ESC expects {b}. You'll need an adapter.",
+        severity='error',
+    ),
+    Check(
+        'B5', 'Battery Voltage Exceeds ESC Rating',
+        ('bat', 'voltage_max_v', _battery_voltage),
+        ('esc', 'voltage_max_v', _field('voltage_max_v', to_float)),
+        lambda volts, esc_max: volts > esc_max,
+        lambda a, b: f'The battery peaks at {fmt(a)}V, but the ESC is rated for max {fmt(b)}V.',
+    ),
+    Check(
+        'B5b', 'Battery Voltage Below ESC Minimum',
+        ('bat', 'voltage_max_v', _battery_voltage),
+        ('esc', 'voltage_range_v', lambda d: _range(d, 'voltage_min_v', 'voltage_max_v', to_float)),
+        lambda volts, rng: volts < rng[0] and not (rng[1] and volts > rng[1]),
+        lambda a, b: f'The battery is {fmt(a)}V, but the ESC requires at least {fmt(b[0])}V.',
+    ),
+    Check(
+        'B6', 'Camera/VTX System Mismatch',
+        ('vtx', 'video_standard', lambda d: first(compat_block(d).get('video_standard'), d.get('video_standard'))),
+        ('cam', 'output_signal', lambda d: first(compat_block(d).get('output_signal'), d.get('video_system'))),
+        lambda vtx_system, cam_system: vtx_system == 'analog' and cam_system not in ('CVBS', 'analog'),
+        lambda a, b: f'The VTX is analog but the camera outputs {b}. You need an analog (CVBS) camera.',
+    ),
+    Check(
+        'B6b', 'Digital System Mismatch',
+        ('vtx', 'digital_system', _digital_vtx),
+        ('cam', 'digital_system',
+         lambda d: first(d.get('digital_system'), compat_block(d).get('digital_system'))),
+        lambda vtx_digital, cam_digital: vtx_digital != cam_digital,
+        lambda a, b: f'The VTX uses {a} but the camera is {b}. These systems are not compatible.',
+    ),
+    Check(
+        'B7', 'ESC Current Rating Low for Motors',
+        ('motors', 'min_esc_current_per_motor_a', _field('min_esc_current_per_motor_a', to_float)),
+        ('esc', 'continuous_current_per_motor_a', lambda d: to_float(first(d.get('continuous_current_per_motor_a'),
+                                         compat_block(d).get('continuous_current_per_motor_a')))),
+        lambda motor_min, esc_current: esc_current < motor_min,
+        lambda a, b: (f'These motors need at least {fmt(a)}A per motor, but the ESC is rated for '
+                      f'{fmt(b)}A. Risk of ESC overheating.'),
+    ),
+]
+
+
+# ── Compiled engine ─────────────────────────────────────────
+
+def load_classification(schema):
+    """
+    Compile the schema's _compat_hard/_compat_soft arrays into
+    {category_slug: {field: 'error' | 'warning'}}.
+    """
+    classification = {}
+    for cat_slug, items in (schema.get('components') or {}).items():
+        fields = {}
+        for item in items if isinstance(items, list) else []:
+            compat = compat_block(item)
+            for field in compat.get('_compat_soft') or []:
+                fields.setdefault(field, 'warning')
+            for field in compat.get('_compat_hard') or []:
+                fields[field] = 'error'
+        classification[cat_slug] = fields
+    return classification
+
+
+class CompiledCheck:
+    """A Check bound to a severity resolver. Evaluates one pair of parts."""
+
+    def __init__(self, check, resolve_severity):
+        self.check = check
+        self.code = check.code
+        self.roles = check.roles
+        self.unless_stack = check.unless_stack
+        self.resolve_severity = resolve_severity
+
+    def left_value(self, part):
+        """The left value of `part`: its normalized value when it has them, else extracted."""
+        if part.values is not None:
+            return part.values.get(self.check.left_role, {}).get(self.check.left_field)
+        return self.check.left_extract(part.data)
+
+    def right_value(self, part):
+        if part.values is not None:
+            return part.values.get(self.check.right_role, {}).get(self.check.right_field)
+        return self.check.right_extract(part.data)
+
+    def values(self, left, right):
+        """(a, b) for two parts, or None if either is missing."""
+        a = self.left_value(left)
+        if a is None:
+            return None
+        b = self.right_value(right)
+        if b is None:
+            return None
+        return a, b
+
+    def warning(self, left, right, a, b):
+        return {
+            'check': self.code,
+            'type': self.resolve_severity(left, right),
+            'title': self.check.title,
+            'message': self.check.message(a, b),
+        }
+
+    def __call__(self, left, right):
+        values = self.values(left, right)
+        if values is None or not self.check.violated(*values):
+            return None
+        return self.warning(left, right, *values)
+
+
+class CompatibilityEngine:
+    """All checks compiled against one schema classification."""
+
+    def __init__(self, classification, checks=CHECKS):
+        self.classification = classification
+        self.checks = [CompiledCheck(c, self._severity_resolver(c)) for c in checks]
+
+    @classmethod
+    def from_schema(cls, schema):
+        return cls(load_classification(schema))
+
+    def severity(self, part, field):
+        """getConstraintSeverity() with a schema-level fallback."""
+        compat = compat_block(part.data)
+        hard, soft = compat.get('_compat_hard'), compat.get('_compat_soft')
+        if hard is not None or soft is not None:
+            if field in (hard or []):
+                return 'error'
+            return 'warning'
+        return self.classification.get(part.category, {}).get(field, 'warning')
+
+    def _severity_resolver(self, check):
+        if isinstance(check.severity, str):
+            literal = check.severity
+            return lambda left, right: literal
+        side, field = check.severity
+        if side == 'left':
+            return lambda left, right: self.severity(left, field)
+        return lambda left, right: self.severity(right, field)
+
+    def evaluate(self, parts, has_stack=False):
+        """Run every check over a {role: Part} mapping. Returns warning dicts."""
+        warnings = []
+        for check in self.checks:
+            if check.unless_stack and has_stack:
+                continue
+            left, right = parts.get(check.roles[0]), parts.get(check.roles[1])
+            if left is None or right is None:
+                continue
+            warning = check(left, right)
+            if warning:
+                warnings.append(warning)
+        return warnings
+
+    def check_build(self, build):
+        """Evaluate a {category_slug: Component | None} build."""
+        parts, has_stack = build_roles(build)
+        return self.evaluate(parts, has_stack)
+
+    def rank_candidates(self, build, category, candidates):
+        """
+        Evaluate every candidate Part of `category` slotted into `build`.
+
+        Checks between fixed parts run once. Checks touching the candidate
+        slot run column-wise: the fixed side is extracted once and compared
+        against the candidates' extracted column, so no check runs a full
+        build evaluation per candidate.
+
+        Returns (build_warnings, per_candidate_warnings) where the second is
+        a list aligned with `candidates`.
+        """
+        fixed_build = {k: v for k, v in build.items() if k != category}
+        fixed, has_stack = build_roles(fixed_build)
+        has_stack = has_stack or category == STACK_CATEGORY
+
+        roles = candidate_roles(category, fixed_build)
+        columns = {role: [view(part) for part in candidates] for role, view in roles.items()}
+        for role in columns:
+            fixed.pop(role, None)
+
+        build_warnings = self.evaluate(fixed, has_stack)
+        per_candidate = [[] for _ in candidates]
+        for check in self.checks:
+            if check.unless_stack and has_stack:
+                continue
+            left_role, right_role = check.roles
+            if left_role not in columns and right_role not in columns:
+                continue
+            left_parts = columns.get(left_role) or fixed.get(left_role)
+            right_parts = columns.get(right_role) or fixed.get(right_role)
+            if left_parts is None or right_parts is None:
+                continue
+            left_values = self._column(check.left_value, left_parts, len(candidates))
+            right_values = self._column(check.right_value, right_parts, len(candidates))
+            if left_values is None or right_values is None:
+                continue
+            violated = check.check.violated
+            for i, (a, b) in enumerate(zip(left_values, right_values)):
+                if a is None or b is None or not violated(a, b):
+                    continue
+                left = left_parts[i] if isinstance(left_parts, list) else left_parts
+                right = right_parts[i] if isinstance(right_parts, list) else right_parts
+                per_candidate[i].append(check.warning(left, right, a, b))
+        return build_warnings, per_candidate
+
+    @staticmethod
+    def _column(value_of, parts, length):
+        """Values for a candidate column, or a fixed part broadcast."""
+        if isinstance(parts, list):
+            return [value_of(part) for part in parts]
+        value = value_of(parts)
+        return None if value is None else repeat(value, length)
+
+
+def effective_stack_part(stack, sub_key):
+    """
+    Effective FC/ESC for a stack Part: flat stack fields, overridden by the
+    fc/esc sub-object, with the stack's shared compatibility block. A
+    normalized stack already holds both views in its values.
+    """
+    if stack.values is not None:
+        return stack
+    data = stack.data
+    sub = data.get(sub_key) if isinstance(data.get(sub_key), dict) else {}
+    merged = {**data, **sub, 'compatibility': compat_block(data)}
+    return Part(stack.pid, STACK_CATEGORY, merged)
+
+
+def as_part(component, category=None):
+    data = component.schema_data if isinstance(component.schema_data, dict) else {}
+    values = component.compat_values
+    # Values are normalized for the component's own category
+    if category is not None and category != component.category.slug:
+        values = None
+    return Part(component.pid, category or component.category.slug, data, values)
+
+
+def build_roles(build):
+    """Map a {category_slug: Component} build onto engine roles."""
+    parts = {}
+    for role, cat_slug in ROLE_CATEGORIES.items():
+        component = build.get(cat_slug)
+        if component is not None:
+            parts[role] = as_part(component, cat_slug)
+    stack = build.get(STACK_CATEGORY)
+    if stack is not None:
+        stack_part = as_part(stack, STACK_CATEGORY)
+        parts.setdefault('fc', effective_stack_part(stack_part, 'fc'))
+        parts.setdefault('esc', effective_stack_part(stack_part, 'esc'))
+    return parts, stack is not None
+
+
+def candidate_roles(category, fixed_build):
+    """
+    Roles a candidate from `category` fills, as {role: Part → Part}.
+    A stack only stands in for FC/ESC slots the build leaves empty.
+    """
+    roles = {role: (lambda part: part) for role, cat_slug in ROLE_CATEGORIES.items() if cat_slug == category}
+    if category == STACK_CATEGORY:
+        if fixed_build.get(ROLE_CATEGORIES['fc']) is None:
+            roles['fc'] = lambda part: effective_stack_part(part, 'fc')
+        if fixed_build.get(ROLE_CATEGORIES['esc']) is None:
+            roles['esc'] = lambda part: effective_stack_part(part, 'esc')
+    return roles
+
+
+def candidate_sort_key(status, warnings, name, data):
+    """Wizard ordering: lightest first, then fewest warnings, then by name."""
+    weight = to_float(data.get('weight_g')) or 9999
+    if status == 'compatible':
+        return (0, weight, 0, '')
+    if status == 'warning':
+        return (1, len(warnings), weight, '')
+    return (2, 0, 0, (name or '').lower())
+
+
+def summarize(warnings):
+    """Collapse warnings into 'compatible' / 'warning' / 'incompatible'."""
+    if any(w['type'] == 'error' for w in warnings):
+        return 'incompatible'
+    if warnings:
+        return 'warning'
+    return 'compatible'
+
+
+# ── Engine cache ────────────────────────────────────────────
+
+_engine_lock = threading.Lock()
+_engine_cache = {'mtime': None, 'engine': None}
+
+
+def get_engine():
+    """Return the compiled engine, recompiling only when the schema changes."""
+    try:
+        mtime = os.path.getmtime(SCHEMA_PATH)
+    except OSError:
+        mtime = None
+    with _engine_lock:
+        if _engine_cache['engine'] is None or _engine_cache['mtime'] != mtime:
+            schema = {}
+            if mtime is not None:
+                with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+                    schema = json.load(f)
+            _engine_cache['engine'] = CompatibilityEngine.from_schema(schema)
+            _engine_cache['mtime'] = mtime
+        return _engine_cache['engine']
+
+
+def resolve_pid(entry):
+    """A build slot value → PID. Accepts 'PID', {'pid': ...} or a relations list."""
+    if isinstance(entry, list):
+        entry = entry[0] if entry else None
+    if isinstance(entry, dict):
+        entry = entry.get('pid')
+    return entry if isinstance(entry, str) and entry else None
+
+
+def load_build(payload):
+    """
+    Resolve a {category_slug: PID} payload into Components.
+
+    Returns (build, missing) where build maps category → Component and
+    missing lists PIDs that do not exist.
+    """
+    wanted = {}
+    for cat_slug, entry in payload.items():
+        pid = resolve_pid(entry)
+        if pid:
+            wanted[cat_slug] = pid
+    found = {c.pid: c for c in Component.objects.select_related('category').filter(pid__in=wanted.values())}
+    build = {cat_slug: found[pid] for cat_slug, pid in wanted.items() if pid in found}
+    missing = sorted({pid for pid in wanted.values() if pid not in found})
+    return build, missing
+
+
+def load_candidates(category):
+    """All Components of a category as (Parts, names), without model instantiation."""
+    rows = (Component.objects.filter(category__slug=category).order_by('pid')
+            .values_list('pid', 'name', 'schema_data', 'compat_values'))
+    parts, names = [], []
+    for pid, name, data, values in rows:
+        parts.append(Part(pid, category, data if isinstance(data, dict) else {}, values))
+        names.append(name)
+    return parts, names
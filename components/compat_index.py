@@ -0,0 +1,274 @@
+"""
+compat_index.py — Materialized pairwise compatibility index.
+
+  GET /api/components/<pid>/compatible/?category=motors
+  GET /api/components/<pid>/compatible/?category=motors&status=compatible,warning
+
+Answers "which motors fit frame FRM-0042" for every category pair a
+compatibility check connects (frames×motors, frames×flight_controllers,
+batteries×escs, video_transmitters×fpv_cameras, stacks standing in for
+FC/ESC, ...) without evaluating checks at request time. The status of a
+pair is what compat.summarize() gives a build of just those two parts.
+
+Every check compares one extracted value per side, so the index is stored
+factorised by value rather than as one row per conflicting component pair
+(about 180k of those in the golden catalogue):
+  CompatKey       component × check side → key: JSON of the extracted
+                  value and the severity that side decides
+  CompatConflict  check × left key × right key that violate the check,
+                  with the severity; distinct values only
+A component's conflicts with a category are the components of that
+category holding a key that conflicts with one of its own keys; every
+other component of the category is compatible.
+
+Invariant: CompatConflict holds every violated pair of keys present in
+CompatKey. Saving components rewrites their keys and evaluates each key
+no other component holds against the distinct keys of the other side.
+Conflicts of keys nobody holds any more are never matched and go with the
+next full rebuild (seed, post_migrate, schema saves — severities come from
+the schema's _compat_hard/_compat_soft). Deletes cascade.
+
+Used by: views.ComponentCompatibleView, apps.ready() (signals + post_migrate
+rebuild), importer.PartsImporter, seed.
+"""
+import json
+from functools import lru_cache
+
+from django.db import connections, router, transaction
+from django.db.models import Q
+
+from components.compat import STACK_CATEGORY, Part, candidate_roles, get_engine
+
+
+# Categories that fill a build role (a stack fills FC and ESC)
+INDEX_CATEGORIES = [
+    'frames', 'propellers', 'flight_controllers', 'motors', 'escs',
+    'batteries', 'video_transmitters', 'fpv_cameras', STACK_CATEGORY,
+]
+
+STATUSES = ['compatible', 'warning', 'incompatible']
+
+BATCH_SIZE = 2000
+
+
+# ── Keys ────────────────────────────────────────────────────
+
+@lru_cache(maxsize=128)
+def _check_sides(engine, category):
+    """[(compiled check, side, Part → Part)] for the check sides a part of `category` fills."""
+    roles = candidate_roles(category, {})
+    sides = []
+    for check in engine.checks:
+        # A stack in the build disables these checks
+        if check.unless_stack and category == STACK_CATEGORY:
+            continue
+        for side, role in zip(('left', 'right'), check.roles):
+            if role in roles:
+                sides.append((check, side, roles[role]))
+    return sides
+
+
+def partner_categories(category, engine=None):
+    """Categories with at least one check against `category`."""
+    engine = engine or get_engine()
+    own = {(check.code, side) for check, side, _ in _check_sides(engine, category)}
+    partners = []
+    for other in INDEX_CATEGORIES:
+        theirs = {(check.code, side) for check, side, _ in _check_sides(engine, other)}
+        if other != category and any((code, 'right' if side == 'left' else 'left') in theirs
+                                     for code, side in own):
+            partners.append(other)
+    return partners
+
+
+def component_keys(engine, part):
+    """[(check code, side, key)] for one Part."""
+    keys = []
+    for check, side, view in _check_sides(engine, part.category):
+        viewed = view(part)
+        value = check.left_value(viewed) if side == 'left' else check.right_value(viewed)
+        if value is None:
+            continue
+        decides = check.check.severity
+        severity = None
+        if not isinstance(decides, str) and decides[0] == side:
+            severity = engine.severity(viewed, decides[1])
+        key = json.dumps([value, severity], sort_keys=True, default=str, separators=(',', ':'))
+        keys.append((check.code, side, key))
+    return keys
+
+
+def conflict_rows(engine, left_keys, right_keys):
+    """
+    CompatConflict rows (code, left key, right key, severity) between
+    {code: [left keys]} and {code: [right keys]}.
+    """
+    checks = {check.code: check.check for check in engine.checks}
+    for code, lefts in left_keys.items():
+        rights = right_keys.get(code)
+        if not rights:
+            continue
+        check = checks[code]
+        literal = check.severity if isinstance(check.severity, str) else None
+        decoded = [(key, *json.loads(key)) for key in sorted(rights)]
+        for left_key in sorted(lefts):
+            a, left_severity = json.loads(left_key)
+            for right_key, b, right_severity in decoded:
+                if check.violated(a, b):
+                    yield code, left_key, right_key, literal or left_severity or right_severity
+
+
+def index_rows(items, engine=None):
+    """
+    (CompatKey rows (pk, code, side, key), CompatConflict rows) for a
+    whole catalogue given as [(pk, Part)].
+    """
+    engine = engine or get_engine()
+    key_rows = []
+    distinct = {'left': {}, 'right': {}}
+    for pk, part in items:
+        if part.category not in INDEX_CATEGORIES:
+            continue
+        for code, side, key in component_keys(engine, part):
+            key_rows.append((pk, code, side, key))
+            distinct[side].setdefault(code, set()).add(key)
+    return key_rows, list(conflict_rows(engine, distinct['left'], distinct['right']))
+
+
+# ── Index maintenance ───────────────────────────────────────
+
+def _insert(model, columns, rows, ignore_conflicts=False, using=None):
+    connection = connections[using or router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    sql = (f'INSERT INTO {quote(model._meta.db_table)} ({", ".join(quote(c) for c in columns)}) '
+           f'VALUES ({", ".join(["%s"] * len(columns))})')
+    if ignore_conflicts:
+        sql += ' ON CONFLICT DO NOTHING'
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+
+
+def _insert_keys(rows, using=None):
+    from components.models import CompatKey
+    _insert(CompatKey, ['component_id', 'code', 'side', 'key'], rows, using=using)
+
+
+def _insert_conflicts(rows, ignore_conflicts=False, using=None):
+    from components.models import CompatConflict
+    _insert(CompatConflict, ['code', 'left_key', 'right_key', 'severity'], rows, ignore_conflicts, using)
+
+
+def _as_part(component):
+    data = component.schema_data if isinstance(component.schema_data, dict) else {}
+    return Part(component.pid, component.category.slug, data, getattr(component, 'compat_values', None))
+
+
+def index_components(components):
+    """Rewrite the keys of saved components (or records with pid, category and schema_data)."""
+    from components.models import CompatKey
+    components = list(components)
+    if not components:
+        return 0
+    engine = get_engine()
+    keys = [(c.pk, *key) for c in components if c.category.slug in INDEX_CATEGORIES
+            for key in component_keys(engine, _as_part(c))]
+    with transaction.atomic():
+        CompatKey.objects.filter(component__in=[c.pk for c in components]).delete()
+        wanted = {key[1:] for key in keys}
+        known = set(CompatKey.objects.filter(code__in={code for code, _, _ in wanted},
+                                             key__in={key for _, _, key in wanted})
+                    .values_list('code', 'side', 'key'))
+        _insert_keys(keys)
+        fresh = wanted - known
+        if not fresh:
+            return len(keys)
+        # Keys nobody else holds: evaluate them against the other side
+        held = {'left': {}, 'right': {}}
+        for code, side, key in (CompatKey.objects.filter(code__in={code for code, _, _ in fresh})
+                                .values_list('code', 'side', 'key').distinct()):
+            held[side].setdefault(code, set()).add(key)
+        new = {'left': {}, 'right': {}}
+        for code, side, key in fresh:
+            new[side].setdefault(code, set()).add(key)
+        rows = list(conflict_rows(engine, new['left'], held['right']))
+        rows += conflict_rows(engine, held['left'], new['right'])
+        _insert_conflicts(rows, ignore_conflicts=True)
+    return len(keys)
+
+
+def rebuild_compat_index(using=None):
+    """Rebuild the whole index (in database `using`)."""
+    from components.models import Component, CompatConflict, CompatKey
+    db = using or router.db_for_write(CompatKey)
+    rows = (Component.objects.using(db).filter(category__slug__in=INDEX_CATEGORIES).order_by('pk')
+            .values_list('pk', 'pid', 'category__slug', 'schema_data', 'compat_values'))
+    items = ((pk, Part(pid, category, data if isinstance(data, dict) else {}, values))
+             for pk, pid, category, data, values in rows.iterator(chunk_size=BATCH_SIZE))
+    with transaction.atomic(using=db):
+        CompatKey.objects.using(db).all().delete()
+        CompatConflict.objects.using(db).all().delete()
+        keys, conflicts = index_rows(items)
+        _insert_keys(keys, db)
+        _insert_conflicts(conflicts, using=db)
+    return len(keys)
+
+
+def on_component_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_components([instance])
+
+
+def on_category_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        index_components(instance.components.select_related('category'))
+
+
+# ── Lookup ──────────────────────────────────────────────────
+
+def compatible_parts(component, category):
+    """
+    Every component of `category` with its status against `component`,
+    from the index: [{pid, name, status, checks}] ordered compatible →
+    warning → incompatible, then by PID.
+    """
+    from components.models import Component, CompatConflict, CompatKey
+    order = {check.code: i for i, check in enumerate(get_engine().checks)}
+    own = set(CompatKey.objects.filter(component=component).values_list('code', 'side', 'key'))
+
+    # (code, side, key) a partner must hold to conflict → severity
+    opposite = {}
+    if own:
+        query = Q()
+        for code, side, key in own:
+            query |= Q(code=code, left_key=key) if side == 'left' else Q(code=code, right_key=key)
+        for code, left_key, right_key, severity in (CompatConflict.objects.filter(query)
+                                                    .values_list('code', 'left_key', 'right_key', 'severity')):
+            if (code, 'left', left_key) in own:
+                opposite[(code, 'right', right_key)] = severity
+            if (code, 'right', right_key) in own:
+                opposite[(code, 'left', left_key)] = severity
+
+    conflicts = {}
+    if opposite:
+        rows = CompatKey.objects.filter(
+            component__category__slug=category,
+            code__in={code for code, _, _ in opposite},
+            key__in={key for _, _, key in opposite},
+        ).values_list('component_id', 'code', 'side', 'key')
+        for pk, code, side, key in rows:
+            severity = opposite.get((code, side, key))
+            if severity:
+                conflicts.setdefault(pk, []).append((code, severity))
+
+    results = []
+    for pk, pid, name in Component.objects.filter(category__slug=category).values_list('pk', 'pid', 'name'):
+        entries = sorted(conflicts.get(pk, []), key=lambda e: order[e[0]])
+        if any(severity == 'error' for _, severity in entries):
+            part_status = 'incompatible'
+        else:
+            part_status = 'warning' if entries else 'compatible'
+        results.append({'pid': pid, 'name': name, 'status': part_status,
+                        'checks': [code for code, _ in entries]})
+    results.sort(key=lambda r: (STATUSES.index(r['status']), r['pid']))
+    return results
@@ -0,0 +1,110 @@
+"""
+export.py — Streaming parts export in the re-importable flat format.
+
+  GET /api/export/parts/                      JSON array
+  GET /api/export/parts/?format=ndjson        one part per line
+      (or Accept: application/x-ndjson)
+
+Rows are read with values().iterator(chunk_size=…), so no model instances
+are built and the database cursor is consumed a chunk at a time; each
+chunk is encoded into one bytes block and handed to StreamingHttpResponse.
+When the client sends Accept-Encoding: gzip the blocks are compressed on
+the fly. Peak memory is bounded by CHUNK_SIZE rows whatever the catalogue
+size.
+
+Used by: ExportPartsView.
+"""
+import json
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.renderers import BaseRenderer
+
+from components.snapshot import accepted_encodings
+
+
+CHUNK_SIZE = 500
+
+# Component columns in export order; schema_data keys are merged after them
+EXPORT_COLUMNS = ['pid', 'category__slug', 'name', 'manufacturer', 'description',
+                  'link', 'approx_price', 'image_file', 'manual_link']
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets content negotiation select NDJSON (?format=ndjson or the Accept
+    header); the view streams the body itself, so this never renders data.
+    """
+    media_type = NDJSON_MEDIA_TYPE
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode('utf-8')
+
+
+def export_part(row):
+    """Flat import-format dict for one values() row."""
+    part = {
+        'pid': row['pid'],
+        'category': row['category__slug'],
+        'name': row['name'],
+        'manufacturer': row['manufacturer'],
+        'description': row['description'],
+        'link': row['link'],
+        'approx_price': row['approx_price'],
+        'image_file': row['image_file'],
+        'manual_link': row['manual_link'],
+    }
+    # Merge schema_data fields at top level for flat import format
+    if row['schema_data']:
+        part.update(row['schema_data'])
+    return part
+
+
+def iter_parts(queryset, chunk_size=None):
+    chunk_size = chunk_size or CHUNK_SIZE
+    for row in queryset.values(*EXPORT_COLUMNS, 'schema_data').iterator(chunk_size=chunk_size):
+        yield export_part(row)
+
+
+def _dumps(part):
+    return json.dumps(part, ensure_ascii=False, separators=(',', ':'))
+
+
+def iter_chunks(queryset, ndjson=False, chunk_size=None):
+    """Encoded body in blocks of up to chunk_size parts."""
+    chunk_size = chunk_size or CHUNK_SIZE
+    block = []
+    first = True
+    if not ndjson:
+        yield b'['
+    for part in iter_parts(queryset, chunk_size):
+        if ndjson:
+            block.append(_dumps(part) + '\n')
+        else:
+            block.append(_dumps(part) if first else ',' + _dumps(part))
+            first = False
+        if len(block) >= chunk_size:
+            yield ''.join(block).encode('utf-8')
+            block = []
+    if block:
+        yield ''.join(block).encode('utf-8')
+    if not ndjson:
+        yield b']'
+
+
+def streaming_export(request, queryset, ndjson=False):
+    """StreamingHttpResponse for the export, gzip-compressed when accepted."""
+    chunks = iter_chunks(queryset, ndjson=ndjson)
+    gzipped = 'gzip' in accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING'))
+    response = StreamingHttpResponse(
+        compress_sequence(chunks) if gzipped else chunks,
+        content_type=NDJSON_MEDIA_TYPE if ndjson else 'application/json',
+    )
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
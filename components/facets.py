@@ -0,0 +1,351 @@
+"""
+facets.py — Precomputed facet index for the parts library filters.
+
+  GET /api/categories/<slug>/facets/
+  GET /api/categories/<slug>/facets/?where=compatibility.cell_count_max>=6&q=t-motor
+
+Each Component's filterable values (the fields in FACET_FIELDS, mirroring
+DYNAMIC_FILTER_CONFIG in filters.js, plus manufacturer and weight) are
+stored as ComponentFacet rows. Rows are rewritten on every Component save
+and for a whole category when the Category changes; deletes cascade. Bulk
+write paths call index_components() / rebuild_facet_index() themselves.
+
+The endpoint aggregates the index with a few GROUP BY queries: value
+counts for select facets, min/max/histogram for range facets. With
+?where= (query.py DSL) or ?q= (search.py) the counts are conditional on
+those filters; clauses on a facet's own field are ignored for that facet,
+so a selected dropdown still lists its alternatives.
+
+Used by: views.CategoryFacetsView, apps.ready() (signals + post_migrate rebuild).
+"""
+import math
+import re
+from collections import namedtuple
+
+from django.db import connections, router, transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, Max, Min, Value, When
+from django.db.models.functions import Cast, Least
+
+
+Facet = namedtuple('Facet', ['field', 'path', 'type'])
+
+COMMON_FACETS = [
+    Facet('Manufacturer', 'manufacturer', 'select'),
+    Facet('Weight (g)', 'schema_data.weight_g', 'range'),
+]
+
+# category slug → facets (same labels/paths/types as filters.js)
+FACET_FIELDS = {
+    'frames': [
+        Facet('Mounting Pattern', 'schema_data.compatibility.fc_mounting_patterns_mm', 'select'),
+        Facet('Max Prop Size (in)', 'schema_data.compatibility.prop_size_max_in', 'range'),
+        Facet('Motor Mount Spacing', 'schema_data.compatibility.motor_mount_hole_spacing_mm', 'select'),
+        Facet('Wheelbase (mm)', 'schema_data.wheelbase_mm', 'range'),
+    ],
+    'motors': [
+        Facet('Motor Size', 'schema_data.motor_size', 'select'),
+        Facet('KV Rating', 'schema_data.kv_rating', 'range'),
+        Facet('Mount Spacing', 'schema_data.compatibility.motor_mount_hole_spacing_mm', 'select'),
+        Facet('Max Cell Count', 'schema_data.compatibility.cell_count_max', 'range'),
+    ],
+    'flight_controllers': [
+        Facet('Mounting Pattern', 'schema_data.mounting_pattern_mm', 'select'),
+        Facet('Processor', 'schema_data.processor', 'select'),
+        Facet('Firmware', 'schema_data.firmware', 'select'),
+    ],
+    'escs': [
+        Facet('Mounting Pattern', 'schema_data.compatibility.mounting_pattern_mm', 'select'),
+        Facet('Max Cell Count', 'schema_data.compatibility.cell_count_max', 'range'),
+        Facet('Current Rating (A)', 'schema_data.compatibility.continuous_current_per_motor_a', 'range'),
+    ],
+    'stacks': [
+        Facet('Mounting Pattern', 'schema_data.mounting_pattern_mm', 'select'),
+        Facet('Max Cell Count', 'schema_data.cell_count_max', 'range'),
+    ],
+    'video_transmitters': [
+        Facet('Video System', 'schema_data.video_standard', 'select'),
+        Facet('Digital System', 'schema_data.compatibility.digital_system', 'select'),
+        Facet('Output Power (mW)', 'schema_data.output_power_mw', 'range'),
+    ],
+    'fpv_cameras': [
+        Facet('Video System', 'schema_data.video_system', 'select'),
+        Facet('Digital System', 'schema_data.compatibility.digital_system', 'select'),
+        Facet('Sensor Size', 'schema_data.sensor_size', 'select'),
+    ],
+    'receivers': [
+        Facet('Protocol', 'schema_data.protocol', 'select'),
+        Facet('Frequency (GHz)', 'schema_data.frequency_ghz', 'select'),
+        Facet('Antenna Connector', 'schema_data.antenna_connector', 'select'),
+    ],
+    'batteries': [
+        Facet('Cell Count (S)', 'schema_data.cell_count', 'select'),
+        Facet('Capacity (mAh)', 'schema_data.capacity_mah', 'range'),
+        Facet('Discharge Rate (C)', 'schema_data.discharge_rate_c', 'range'),
+        Facet('Connector', 'schema_data.connector_type', 'select'),
+    ],
+    'propellers': [
+        Facet('Diameter (in)', 'schema_data.diameter_in', 'select'),
+        Facet('Pitch (in)', 'schema_data.pitch_in', 'select'),
+        Facet('Blade Count', 'schema_data.blade_count', 'select'),
+        Facet('Material', 'schema_data.material', 'select'),
+    ],
+    'antennas': [
+        Facet('Connector Type', 'schema_data.connector_type', 'select'),
+        Facet('Frequency (GHz)', 'schema_data.frequency_ghz', 'select'),
+        Facet('Polarization', 'schema_data.polarization', 'select'),
+    ],
+    'action_cameras': [
+        Facet('Resolution', 'schema_data.resolution', 'select'),
+        Facet('Sensor Size', 'schema_data.sensor_size', 'select'),
+    ],
+}
+
+DEFAULT_BINS = 10
+MAX_BINS = 50
+VALUE_MAX_LENGTH = 255
+BATCH_SIZE = 500
+
+_NUMBER_RE = re.compile(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?')
+
+
+def facet_fields(slug):
+    return COMMON_FACETS + FACET_FIELDS.get(slug, [])
+
+
+# ── Value extraction (matches filters.js) ───────────────────
+
+def js_string(value):
+    """String(v) as the frontend renders option values."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def parse_float(value):
+    """parseFloat(): leading number of a value, or None."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else None
+    match = _NUMBER_RE.match(str(value))
+    return float(match.group(0)) if match else None
+
+
+def resolve_path(component, path):
+    keys = path.split('.')
+    value = getattr(component, keys[0], None)
+    for key in keys[1:]:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def facet_rows(component, category):
+    """(component_id, category_id, path, value, number) index rows for one component."""
+    rows = []
+    for facet in facet_fields(category.slug):
+        value = resolve_path(component, facet.path)
+        if value is None or value == '':
+            continue
+        if facet.type == 'select':
+            items = value if isinstance(value, list) else [value]
+            seen = set()
+            for item in items:
+                if item is None or item == '' or isinstance(item, (dict, list)):
+                    continue
+                text = js_string(item)[:VALUE_MAX_LENGTH]
+                if text not in seen:
+                    seen.add(text)
+                    rows.append((component.pk, category.pk, facet.path, text, parse_float(item)))
+        else:
+            number = parse_float(value) if not isinstance(value, (dict, list)) else None
+            if number is not None:
+                rows.append((component.pk, category.pk, facet.path, js_string(number), number))
+    return rows
+
+
+# ── Index maintenance ───────────────────────────────────────
+# Rows are written with executemany rather than bulk_create: the index is
+# rewritten on every import batch and model instances would dominate the cost.
+
+def _insert_rows(rows, using=None):
+    from components.models import ComponentFacet
+    if not rows:
+        return
+    table = ComponentFacet._meta.db_table
+    connection = connections[using or router.db_for_write(ComponentFacet)]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(table)} '
+            f'(component_id, category_id, path, value, number) VALUES (%s, %s, %s, %s, %s)',
+            rows,
+        )
+
+
+def index_components(components):
+    """Rewrite the facet rows of saved components (or records with pk, category and field attributes)."""
+    from components.models import ComponentFacet
+    components = list(components)
+    if not components:
+        return 0
+    rows = []
+    for component in components:
+        rows.extend(facet_rows(component, component.category))
+    with transaction.atomic():
+        ComponentFacet.objects.filter(component__in=[c.pk for c in components]).delete()
+        _insert_rows(rows)
+    return len(rows)
+
+
+def rebuild_facet_index(queryset=None, using=None):
+    """Rebuild the index for all components (or a Component queryset) in database `using`."""
+    from components.models import Component, ComponentFacet
+    db = using or router.db_for_write(ComponentFacet)
+    queryset = Component.objects.all() if queryset is None else queryset
+    queryset = queryset.using(db).select_related('category').order_by('pk')
+    total = 0
+    with transaction.atomic(using=db):
+        if queryset.query.where:
+            ComponentFacet.objects.using(db).filter(component__in=queryset.values('pk')).delete()
+        else:
+            ComponentFacet.objects.using(db).all().delete()
+        rows = []
+        for component in queryset.iterator(chunk_size=BATCH_SIZE):
+            rows.extend(facet_rows(component, component.category))
+            if len(rows) >= BATCH_SIZE:
+                _insert_rows(rows, db)
+                total += len(rows)
+                rows = []
+        _insert_rows(rows, db)
+        total += len(rows)
+    return total
+
+
+def on_component_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_components([instance])
+
+
+def on_category_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        rebuild_facet_index(instance.components.all())
+
+
+# ── Aggregation ─────────────────────────────────────────────
+
+def _field_path(field):
+    """?where= field → facet path ('weight_g' → 'schema_data.weight_g')."""
+    from components.query import CORE_FIELDS
+    if field in CORE_FIELDS or field == 'price' or field.startswith('schema_data.'):
+        return field
+    return f'schema_data.{field}'
+
+
+def _filtered_components(category, clauses, search):
+    from components.models import Component
+    from components.query import apply_clauses
+    from components.search import apply_search
+    queryset = Component.objects.filter(category=category)
+    if clauses:
+        queryset = apply_clauses(queryset, clauses)
+    if search is not None:
+        queryset = apply_search(queryset, search, ranked=False)
+    return queryset
+
+
+def _sort_key(value):
+    number = parse_float(value)
+    return (0, number, value) if number is not None else (1, 0, value.lower())
+
+
+def _histogram(rows, ranges, bins):
+    """{path: [{min, max, count}]} for range facets with a spread."""
+    spread = {path: r for path, r in ranges.items() if r['max'] > r['min']}
+    result = {path: [{'min': r['min'], 'max': r['max'], 'count': r['count']}]
+              for path, r in ranges.items() if path not in spread}
+    if not spread:
+        return result
+    bucket = Case(
+        *[When(path=path, then=(F('number') - Value(r['min'])) * Value(bins / (r['max'] - r['min'])))
+          for path, r in spread.items()],
+        output_field=FloatField(),
+    )
+    counts = (rows.filter(path__in=list(spread), number__isnull=False)
+              .annotate(bucket=Least(Cast(bucket, IntegerField()), Value(bins - 1)))
+              .values('path', 'bucket').annotate(count=Count('id')))
+    filled = {path: [0] * bins for path in spread}
+    for row in counts:
+        filled[row['path']][row['bucket']] += row['count']
+    for path, r in spread.items():
+        width = (r['max'] - r['min']) / bins
+        result[path] = [
+            {'min': r['min'] + i * width, 'max': r['min'] + (i + 1) * width, 'count': count}
+            for i, count in enumerate(filled[path])
+        ]
+    return result
+
+
+def _aggregate(rows, facets, bins):
+    selects = [f.path for f in facets if f.type == 'select']
+    ranges_paths = [f.path for f in facets if f.type == 'range']
+    values = {path: [] for path in selects}
+    if selects:
+        for row in rows.filter(path__in=selects).values('path', 'value').annotate(count=Count('id')):
+            values[row['path']].append({'value': row['value'], 'count': row['count']})
+    ranges = {}
+    if ranges_paths:
+        stats = (rows.filter(path__in=ranges_paths, number__isnull=False).values('path')
+                 .annotate(min=Min('number'), max=Max('number'), count=Count('id'),
+                           distinct=Count('number', distinct=True)))
+        ranges = {row['path']: row for row in stats}
+    histograms = _histogram(rows, ranges, bins)
+
+    result = {}
+    for facet in facets:
+        entry = {'field': facet.field, 'path': facet.path, 'type': facet.type}
+        if facet.type == 'select':
+            options = sorted(values[facet.path], key=lambda v: _sort_key(v['value']))
+            entry.update(distinct=len(options), values=options)
+        else:
+            r = ranges.get(facet.path)
+            entry.update(
+                distinct=r['distinct'] if r else 0, count=r['count'] if r else 0,
+                min=r['min'] if r else None, max=r['max'] if r else None,
+                histogram=histograms.get(facet.path, []),
+            )
+        result[facet.path] = entry
+    return result
+
+
+def facet_summary(category, clauses=(), search=None, bins=DEFAULT_BINS):
+    """
+    {category, total, facets: [...]} for one category. `clauses` are parsed
+    ?where= clauses, `search` a ?q= string; either makes counts conditional.
+    """
+    from components.models import ComponentFacet
+    facets = facet_fields(category.slug)
+    clauses = list(clauses)
+
+    # Group facets by the filter set that applies to them (all clauses
+    # except those on the facet's own field) so shared sets query once.
+    groups = {}
+    for facet in facets:
+        applied = tuple(i for i, clause in enumerate(clauses) if _field_path(clause[0]) != facet.path)
+        groups.setdefault(applied, []).append(facet)
+
+    base = ComponentFacet.objects.filter(category=category)
+    aggregated = {}
+    for applied, group in groups.items():
+        rows = base
+        if applied or search is not None:
+            components = _filtered_components(category, [clauses[i] for i in applied], search)
+            rows = rows.filter(component__in=components.values('pk'))
+        aggregated.update(_aggregate(rows, group, bins))
+
+    total = _filtered_components(category, clauses, search).count()
+    return {
+        'category': category.slug,
+        'total': total,
+        'facets': [aggregated[facet.path] for facet in facets],
+    }
@@ -0,0 +1,280 @@
+"""
+importer.py — Bulk parts import (upsert by PID).
+
+PartsImporter takes parts one at a time (add) or all at once (import_parts)
+and writes them in batches:
+  - categories are resolved once per distinct slug and cached,
+  - existing PIDs of a batch are loaded with one query,
+  - the batch is written with one executemany of INSERT ... ON
+    CONFLICT(pid) DO UPDATE, so created and updated rows go through the
+    same prepared statement without building ORM queries per row.
+
+Duplicate PIDs behave like sequential update_or_create calls: the last
+occurrence wins, the first counts as created (if new), later ones as
+updated. If a batch fails at the database level it is retried row by row
+with a savepoint each, so one bad part still produces a per-index error
+instead of failing its neighbours.
+
+The bulk path bypasses model signals, so compat_values are normalized
+with the row, and their ComponentCompat rows and the facet and
+compatibility indexes are refreshed here, inside the batch's transaction;
+the catalogue version is bumped once per batch (once per import for
+import_parts()). The FTS index is maintained by triggers.
+
+import_ndjson() reads one part per line from a file-like stream, so memory
+stays bounded by the batch size however large the upload is, and yields
+result lines as batches commit.
+
+Used by: ImportPartsView, jobs.run_job.
+"""
+import json
+from types import SimpleNamespace
+
+from django.db import connections, router, transaction
+
+from components.catalogue import catalogue_writes
+from components import compat_index
+from components.facets import index_components
+from components.normalize import normalize, project_components
+from components.models import Category, Component
+
+
+BATCH_SIZE = 1000
+
+# Request keys stored on Component columns; everything else → schema_data
+CORE_KEYS = {'pid', 'category', 'name', 'manufacturer', 'description',
+             'link', 'approx_price', 'image_file', 'manual_link'}
+
+UPDATE_FIELDS = ['category', 'name', 'manufacturer', 'description', 'link',
+                 'approx_price', 'image_file', 'manual_link', 'schema_data', 'compat_values']
+
+
+def component_defaults(part, category):
+    """Model field values for one import row (same defaults as before bulk import)."""
+    schema_data = {k: v for k, v in part.items() if k not in CORE_KEYS}
+    return {
+        'category': category,
+        'name': part.get('name'),
+        'manufacturer': part.get('manufacturer', 'Unknown'),
+        'description': part.get('description', ''),
+        'link': part.get('link', ''),
+        'approx_price': part.get('approx_price', ''),
+        'image_file': part.get('image_file', ''),
+        'manual_link': part.get('manual_link', ''),
+        'schema_data': schema_data,
+        'compat_values': normalize(category.slug, schema_data),
+    }
+
+
+def upsert_components(records):
+    """
+    INSERT ... ON CONFLICT(pid) DO UPDATE for component_defaults()-style
+    records (objects with pid + UPDATE_FIELDS attributes), via executemany.
+    Values go through each field's get_db_prep_save, so they are stored
+    exactly as Model.save() would store them.
+    """
+    connection = connections[router.db_for_write(Component)]
+    fields = [Component._meta.get_field(name) for name in ['pid'] + UPDATE_FIELDS]
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(f.column) for f in fields)
+    updates = ', '.join(f'{quote(f.column)} = excluded.{quote(f.column)}' for f in fields[1:])
+    sql = (
+        f'INSERT INTO {quote(Component._meta.db_table)} ({columns}) '
+        f'VALUES ({", ".join(["%s"] * len(fields))}) '
+        f'ON CONFLICT ({quote("pid")}) DO UPDATE SET {updates}'
+    )
+    # Plain char/text columns need no preparation; FKs and JSON do
+    prepared = [(f.name, f if f.is_relation or f.get_internal_type() == 'JSONField' else None) for f in fields]
+    params = []
+    for record in records:
+        row = []
+        for name, field in prepared:
+            value = getattr(record, name)
+            row.append(value if field is None else field.get_db_prep_save(
+                value.pk if field.is_relation else value, connection))
+        params.append(row)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+class PartsImporter:
+    """
+    Accumulates parts and upserts them in batches.
+
+        importer = PartsImporter()
+        for i, part in enumerate(parts):
+            importer.add(i, part)
+        report = importer.finish()   # {created, updated, errors}
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, on_flush=None):
+        self.batch_size = batch_size
+        self.on_flush = on_flush  # called with the importer after each batch
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self._categories = {}
+        self._pending = []
+
+    # ── Input ──
+
+    def error(self, index, pid, message):
+        self.errors.append({"index": index, "pid": pid, "error": message})
+
+    def add(self, index, part):
+        """Validate one part and queue it; flushes when the batch is full."""
+        if not isinstance(part, dict):
+            self.error(index, None, "Each part must be a JSON object.")
+            return
+        pid = part.get('pid')
+        if not pid or not part.get('category') or not part.get('name'):
+            self.error(index, pid, "Missing required field: pid, category, or name.")
+            return
+        if isinstance(pid, (dict, list)) or not isinstance(part['category'], str):
+            self.error(index, None, "pid must be a string or number and category a string.")
+            return
+        # Stored form, so numeric pids match existing rows in the batch upsert
+        part = {**part, 'pid': str(pid)}
+        self._pending.append((index, part))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def prime_categories(self, slugs):
+        """Resolve a set of category slugs with one query."""
+        wanted = {s for s in slugs if s not in self._categories}
+        if not wanted:
+            return
+        found = {c.slug: c for c in Category.objects.filter(slug__in=wanted)}
+        for slug in wanted:
+            self._categories[slug] = found.get(slug)
+
+    def finish(self):
+        self.flush()
+        return self.report()
+
+    def report(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "errors": sorted(self.errors, key=lambda e: e['index']),
+        }
+
+    # ── Writing ──
+
+    def flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self._write(batch)
+        if self.on_flush is not None:
+            self.on_flush(self)
+
+    def _write(self, batch):
+        self.prime_categories({part['category'] for _, part in batch})
+        rows = []
+        for index, part in batch:
+            category = self._categories.get(part['category'])
+            if category is None:
+                self.error(index, part['pid'], f"Category '{part['category']}' not found.")
+            else:
+                rows.append((index, part, category))
+        if not rows:
+            return
+        # One catalogue version bump per committed batch (none extra when
+        # the caller already wraps the whole import in catalogue_writes).
+        # The derived rows commit with the batch or not at all.
+        with catalogue_writes():
+            try:
+                with transaction.atomic():
+                    created, updated, components = self._upsert(rows)
+                    project_components(components)
+                    index_components(components)
+                    compat_index.index_components(components)
+            except Exception:
+                self._upsert_rows(rows)
+                return
+            self.created += created
+            self.updated += updated
+
+    def _upsert(self, rows):
+        pids = {part['pid'] for _, part, _ in rows}
+        existing = set(Component.objects.filter(pid__in=pids).values_list('pid', flat=True))
+
+        latest = {}
+        created = updated = 0
+        for _, part, category in rows:
+            pid = part['pid']
+            if pid in existing or pid in latest:
+                updated += 1
+            else:
+                created += 1
+            latest[pid] = SimpleNamespace(pid=pid, **component_defaults(part, category))
+
+        upsert_components(latest.values())
+        ids = dict(Component.objects.filter(pid__in=list(latest)).values_list('pid', 'id'))
+        for pid, record in latest.items():
+            record.pk = ids[pid]
+        return created, updated, list(latest.values())
+
+    def _upsert_rows(self, rows):
+        """Fallback: one savepoint per row so a bad part only fails itself."""
+        for index, part, category in rows:
+            try:
+                with transaction.atomic():
+                    _, was_created = Component.objects.update_or_create(
+                        pid=part['pid'], defaults=component_defaults(part, category))
+            except Exception as e:
+                self.error(index, part['pid'], str(e))
+                continue
+            if was_created:
+                self.created += 1
+            else:
+                self.updated += 1
+
+
+@catalogue_writes()
+def import_parts(parts, batch_size=BATCH_SIZE):
+    """Upsert a list of parts; returns {created, updated, errors}."""
+    importer = PartsImporter(batch_size=batch_size)
+    importer.prime_categories({p['category'] for p in parts if isinstance(p, dict) and isinstance(p.get('category'), str)})
+    for index, part in enumerate(parts):
+        importer.add(index, part)
+    return importer.finish()
+
+
+def import_ndjson(stream, batch_size=BATCH_SIZE, on_flush=None):
+    """
+    Import newline-delimited JSON parts from a binary stream. Yields dicts
+    to send back as NDJSON: {"line", "pid", "error"} for each rejected line
+    (parse/validation errors at once, database errors when their batch is
+    written), then a final
+    {"done": true, "created", "updated", "errors", "lines"} summary.
+    Each batch is committed before the next is read.
+    """
+    importer = PartsImporter(batch_size=batch_size, on_flush=on_flush)
+    error_count = 0
+    line_no = 0
+
+    def drain():
+        nonlocal error_count
+        errors, importer.errors = importer.errors, []
+        error_count += len(errors)
+        for error in sorted(errors, key=lambda e: e['index']):
+            yield {"line": error['index'], "pid": error['pid'], "error": error['error']}
+
+    for line_no, raw in enumerate(stream, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            part = json.loads(raw)
+        except ValueError as e:
+            importer.error(line_no, None, f"Invalid JSON: {e}")
+        else:
+            importer.add(line_no, part)
+        if importer.errors:
+            yield from drain()
+    importer.flush()
+    yield from drain()
+    yield {"done": True, "created": importer.created, "updated": importer.updated,
+           "errors": error_count, "lines": line_no}
@@ -0,0 +1,203 @@
+"""
+jobs.py — Background parts import jobs.
+
+  POST /api/import/jobs/          body as for /api/import/parts/ (JSON array
+                                  or NDJSON) → 202 { id, status, url }
+  GET  /api/import/jobs/<id>/     status, progress, counts and errors
+
+Submitting spools the payload to IMPORT_JOBS_DIR as NDJSON (an NDJSON body
+is copied in chunks, so it is never held in memory), creates an ImportJob
+row and hands the job id to an in-process ThreadPoolExecutor once the row
+is committed. The worker streams the file through importer.import_ndjson()
+and saves progress (bytes processed, created/updated/error counts) after
+every committed batch. No broker is involved; a single worker thread keeps
+SQLite to one writer.
+
+Every progress save touches updated_at; a 'running' job with no update
+for STALE_AFTER (its process exited mid-import) is reported as failed
+when next read, and its payload is removed.
+
+Queued jobs live only in their process's executor, so a restart would
+strand them. resume_jobs() (wsgi.py, at process start) requeues every
+'queued' job whose payload is still on disk and fails the ones whose
+payload is gone. A worker claims its job with a conditional UPDATE
+(queued → running), so a job queued by two processes runs once.
+
+Used by: ImportJobCreateView, ImportJobDetailView, wsgi.py.
+"""
+import datetime
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import OperationalError, ProgrammingError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+
+MAX_WORKERS = 1
+MAX_STORED_ERRORS = 1000
+COPY_CHUNK = 64 * 1024
+PROGRESS_FIELDS = ['bytes_processed', 'created_count', 'updated_count', 'error_count', 'errors', 'updated_at']
+STALE_AFTER = datetime.timedelta(minutes=10)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def jobs_dir():
+    return str(getattr(settings, 'IMPORT_JOBS_DIR', os.path.join(settings.BASE_DIR, 'import_jobs')))
+
+
+def payload_path(job_id):
+    return os.path.join(jobs_dir(), f'{job_id}.ndjson')
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='import-job')
+        return _executor
+
+
+# ── Submission ──────────────────────────────────────────────
+
+def _spool_parts(job_id, parts):
+    path = payload_path(job_id)
+    with open(path, 'wb') as f:
+        for part in parts:
+            f.write(json.dumps(part).encode('utf-8'))
+            f.write(b'\n')
+    return os.path.getsize(path)
+
+
+def _spool_stream(job_id, stream):
+    path = payload_path(job_id)
+    size = 0
+    with open(path, 'wb') as f:
+        while True:
+            chunk = stream.read(COPY_CHUNK)
+            if not chunk:
+                break
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def submit_job(parts=None, stream=None):
+    """
+    Create a job for a list of parts (format 'json') or a binary NDJSON
+    stream (format 'ndjson') and schedule it after commit. Returns the job.
+    """
+    from components.models import ImportJob
+    os.makedirs(jobs_dir(), exist_ok=True)
+    job = ImportJob(format='ndjson' if stream is not None else 'json')
+    try:
+        job.bytes_total = _spool_stream(job.id, stream) if stream is not None else _spool_parts(job.id, parts)
+        job.save()
+    except BaseException:
+        _discard_payload(job.id)
+        raise
+    transaction.on_commit(lambda: start_job(job.id))
+    return job
+
+
+def start_job(job_id):
+    get_executor().submit(run_job, job_id)
+
+
+def _discard_payload(job_id):
+    try:
+        os.unlink(payload_path(job_id))
+    except OSError:
+        pass
+
+
+def resume_jobs():
+    """
+    Requeue 'queued' jobs left by a previous process whose payload still
+    exists; fail (and forget) the rest. Returns the requeued job ids.
+    """
+    from components.models import ImportJob
+    try:
+        queued = list(ImportJob.objects.filter(status='queued').order_by('submitted_at')
+                      .values_list('pk', flat=True))
+    except (OperationalError, ProgrammingError):
+        # Loaded before `migrate` created the table
+        return []
+    resumed = []
+    for job_id in queued:
+        if os.path.exists(payload_path(job_id)):
+            start_job(job_id)
+            resumed.append(job_id)
+        else:
+            ImportJob.objects.filter(pk=job_id, status='queued').update(
+                status='failed', message='Lost: the payload was gone when the server restarted.',
+                finished_at=timezone.now(), updated_at=timezone.now())
+    return resumed
+
+
+# ── Worker ──────────────────────────────────────────────────
+
+def run_job(job_id):
+    """Run one import job to completion (in a worker thread or inline)."""
+    from components.importer import import_ndjson
+    from components.models import ImportJob
+
+    # Worker threads own their DB connection; inline runs share the caller's
+    in_worker = threading.current_thread() is not threading.main_thread()
+    if in_worker:
+        close_old_connections()
+    # Claim the job; another process may have requeued it too (resume_jobs)
+    now = timezone.now()
+    if not ImportJob.objects.filter(pk=job_id, status='queued').update(
+            status='running', started_at=now, updated_at=now):
+        if in_worker:
+            connection.close()
+        return
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+
+        # JSON-array jobs report 0-based array indexes, NDJSON jobs line numbers
+        index_key, offset = ('index', 1) if job.format == 'json' else ('line', 0)
+        try:
+            with open(payload_path(job_id), 'rb') as stream:
+                def save_progress(importer):
+                    job.bytes_processed = stream.tell()
+                    job.created_count = importer.created
+                    job.updated_count = importer.updated
+                    job.save(update_fields=PROGRESS_FIELDS)
+
+                for result in import_ndjson(stream, on_flush=save_progress):
+                    if result.get('done'):
+                        job.created_count = result['created']
+                        job.updated_count = result['updated']
+                        continue
+                    job.error_count += 1
+                    if len(job.errors) < MAX_STORED_ERRORS:
+                        job.errors.append({index_key: result['line'] - offset,
+                                           'pid': result['pid'], 'error': result['error']})
+            job.status = 'succeeded'
+            job.bytes_processed = job.bytes_total
+        except Exception as e:
+            job.status = 'failed'
+            job.message = str(e)
+        job.finished_at = timezone.now()
+        job.save()
+    finally:
+        _discard_payload(job_id)
+        if in_worker:
+            connection.close()
+
+
+def check_stale(job):
+    """Fail a 'running' job whose worker stopped reporting progress, and drop its payload."""
+    if job.status == 'running' and timezone.now() - job.updated_at > STALE_AFTER:
+        job.status = 'failed'
+        job.message = 'Interrupted: the worker stopped before the job finished.'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+        _discard_payload(job.pk)
+    return job
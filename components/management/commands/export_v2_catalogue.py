@@ -1,54 +1,129 @@
+"""
+Management command: export_v2_catalogue
+
+Exports the SQL database to a V2 schema document:
+  { "schema_version": "v2", "metadata": {...},
+    "components": { "<category slug>": [ ... ], ... },
+    "drone_models": [ ... ] }
+
+Components are read in one pass ordered by (category, pid), which the
+(category, pid) index serves directly, and written to the file as they
+are read (one record per line), so memory does not grow with the catalogue.
+
+  --output PATH         default: ./drone_database_exported_v2.json (+ .gz / .xz)
+  --compress gzip|xz    compress while writing
+  --chunk-size N        rows fetched per database round trip
+
+The document is written to a temporary file next to the output and moved
+into place when complete.
+"""
+import gzip
 import json
+import lzma
 import os
+import time
+
 from django.core.management.base import BaseCommand
-from components.models import Category, Component, DroneModel
 from django.utils import timezone
 
+from components.models import Category, Component, DroneModel
+
+
+CHUNK_SIZE = 2000
+
+OPENERS = {
+    None: (open, ''),
+    'gzip': (gzip.open, '.gz'),
+    'xz': (lzma.open, '.xz'),
+}
+
+COMPONENT_COLUMNS = ['category_id', 'pid', 'name', 'manufacturer', 'description',
+                     'link', 'approx_price', 'schema_data']
+
+
+def dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ': '))
+
+
 class Command(BaseCommand):
     help = 'Exports the SQL database to a drone_database_v2.json file according to the V2 schema'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Output file path.')
+        parser.add_argument('--compress', choices=['gzip', 'xz'], help='Compress the output.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help=f'Rows fetched per database round trip (default {CHUNK_SIZE}).')
+
     def handle(self, *args, **options):
         self.stdout.write("Starting V2 Catalogue Export...")
+        opener, suffix = OPENERS[options['compress']]
+        filepath = options['output'] or os.path.join(os.getcwd(), f'drone_database_exported_v2.json{suffix}')
+        filepath = os.path.abspath(filepath)
+
+        started = time.perf_counter()
+        tmp = f'{filepath}.{os.getpid()}.tmp'
+        try:
+            with opener(tmp, 'wt', encoding='utf-8') as f:
+                components, drone_models = self.write_document(f, options['chunk_size'])
+            os.replace(tmp, filepath)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
 
-        output = {
-            "schema_version": "v2",
-            "metadata": {
-                "exported_at": timezone.now().isoformat(),
-                "source": "ProjectDClear - Live Catalogue Builder",
-                "notes": "Generated from live SQL database."
-            },
-            "components": {},
-            "drone_models": []
+        elapsed = time.perf_counter() - started
+        rows = components + drone_models
+        self.stdout.write(
+            f'{components} components, {drone_models} drone models in {elapsed:.2f}s '
+            f'({rows / elapsed if elapsed else rows:.0f} rows/s).'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Successfully exported catalogue to {filepath}'))
+
+    def write_document(self, f, chunk_size):
+        """Write the whole document to an open text file; returns (components, drone models)."""
+        metadata = {
+            "exported_at": timezone.now().isoformat(),
+            "source": "ProjectDClear - Live Catalogue Builder",
+            "notes": "Generated from live SQL database."
         }
+        f.write('{\n"schema_version": "v2",\n')
+        f.write(f'"metadata": {dumps(metadata)},\n')
 
-        # Export Components
-        categories = Category.objects.all()
-        for cat in categories:
-            components = Component.objects.filter(category=cat)
-            cat_list = []
-            
-            for c in components:
-                # Build the root keys
+        # Export Components: categories in pk order, each followed by its
+        # rows from the single (category, pid) ordered pass
+        f.write('"components": {')
+        categories = list(Category.objects.order_by('pk').values_list('pk', 'slug'))
+        rows = (Component.objects.order_by('category_id', 'pid')
+                .values_list(*COMPONENT_COLUMNS).iterator(chunk_size=chunk_size))
+        row = next(rows, None)
+        components = 0
+        for position, (category_id, slug) in enumerate(categories):
+            f.write(f'{"," if position else ""}\n{dumps(slug)}: [')
+            first = True
+            while row is not None and row[0] == category_id:
+                _, pid, name, manufacturer, description, link, approx_price, schema_data = row
                 comp_obj = {
-                    "pid": c.pid,
-                    "name": c.name,
-                    "manufacturer": c.manufacturer,
-                    "description": c.description,
-                    "link": c.link,
-                    "approx_price": c.approx_price,
+                    "pid": pid,
+                    "name": name,
+                    "manufacturer": manufacturer,
+                    "description": description,
+                    "link": link,
+                    "approx_price": approx_price,
                 }
-                
                 # Merge dynamic schema_data fields into root
-                if isinstance(c.schema_data, dict):
-                    comp_obj.update(c.schema_data)
-                
-                cat_list.append(comp_obj)
-            
-            output["components"][cat.slug] = cat_list
-            
+                if isinstance(schema_data, dict):
+                    comp_obj.update(schema_data)
+                f.write(('\n' if first else ',\n') + dumps(comp_obj))
+                first = False
+                components += 1
+                row = next(rows, None)
+            f.write(']' if first else '\n]')
+        f.write('\n},\n')
+
         # Export Drone Models
-        drones = DroneModel.objects.all()
-        for d in drones:
+        f.write('"drone_models": [')
+        drone_models = 0
+        for d in DroneModel.objects.order_by('pk').iterator(chunk_size=chunk_size):
             drone_obj = {
                 "pid": d.pid,
                 "name": d.name,
@@ -59,11 +134,7 @@ class Command(BaseCommand):
                 "pdf_file": d.pdf_file,
                 "relations": d.relations if isinstance(d.relations, dict) else {}
             }
-            output["drone_models"].append(drone_obj)
-
-        filepath = os.path.join(os.getcwd(), 'drone_database_exported_v2.json')
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2)
-            
-        self.stdout.write(self.style.SUCCESS(f'Successfully exported catalogue to {filepath}'))
+            f.write(('\n' if not drone_models else ',\n') + dumps(drone_obj))
+            drone_models += 1
+        f.write('\n]\n}\n')
+        return components, drone_models
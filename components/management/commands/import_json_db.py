@@ -1,76 +1,200 @@
+"""
+Management command: import_json_db
+
+Upserts every component of drone_database.json ({"components": {slug:
+[part, ...]}, ...}) by PID, creating categories as they are met.
+
+The file is read incrementally: parts are decoded one at a time from a
+buffered stream (iter_sections), so memory is bounded by one part plus the
+current batch, not by the file size. Parts go through importer.PartsImporter,
+which writes each batch with one bulk upsert in its own transaction and
+keeps the facet index current; the catalogue version is bumped once at the
+end. Progress and throughput are printed after every batch.
+
+  --file PATH         default: DroneClear Components Visualizer/drone_database.json
+  --batch-size N      parts per upsert transaction
+"""
 import json
 import os
-from django.core.management.base import BaseCommand
+import time
+
 from django.conf import settings
-from components.models import Category, Component
+from django.core.management.base import BaseCommand, CommandError
+
+from components.catalogue import catalogue_writes
+from components.importer import BATCH_SIZE, PartsImporter
+from components.models import Category
+
+
+READ_CHUNK = 64 * 1024
+
+# Keys handled here rather than stored in schema_data
+DROPPED_KEYS = {'_approx_price', 'category'}
+
+
+# ── Incremental reader ──────────────────────────────────────
+
+class _Reader:
+    """Decodes JSON values one at a time from a text stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.stream.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """Next non-whitespace character ('' at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f'expected {" or ".join(repr(c) for c in chars)}, found {char or "end of file"!r}')
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number may continue in the next chunk
+            if end == len(self.buf) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """Yield the keys of an object; the caller consumes each value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError('object keys must be strings')
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """Yield the values of an array."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_sections(stream):
+    """
+    Yield (category slug, parts iterator) for each section of the
+    top-level "components" object; other top-level keys are skipped.
+    """
+    reader = _Reader(stream)
+    for key in reader.members():
+        if key != 'components':
+            reader.value()
+            continue
+        for slug in reader.members():
+            parts = reader.items()
+            yield slug, parts
+            for _ in parts:  # whatever the caller left unread
+                pass
+
+
+def to_part(comp, slug):
+    """Import-format part (see importer.component_defaults) for one database entry."""
+    part = {k: v for k, v in comp.items() if k not in DROPPED_KEYS}
+    part['category'] = slug
+    part['name'] = comp.get('name') or 'Unnamed'
+    # Handle both price field conventions
+    approx_price = comp.get('approx_price', '') or comp.get('_approx_price', '')
+    if isinstance(approx_price, (int, float)):
+        approx_price = f'${approx_price:.2f}'
+    part['approx_price'] = approx_price
+    return part
+
 
 class Command(BaseCommand):
     help = 'Imports the drone_database.json into the SQLite database'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='JSON database to import.')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f'Parts per upsert transaction (default {BATCH_SIZE}).')
+
+    @catalogue_writes()
     def handle(self, *args, **options):
         # Path to the JSON database
-        json_path = os.path.join(settings.BASE_DIR, 'DroneClear Components Visualizer', 'drone_database.json')
+        json_path = options['file'] or os.path.join(
+            settings.BASE_DIR, 'DroneClear Components Visualizer', 'drone_database.json')
 
         if not os.path.exists(json_path):
             self.stdout.write(self.style.ERROR(f'Database file not found at {json_path}'))
             return
 
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        started = time.perf_counter()
+
+        def progress(importer):
+            done = importer.created + importer.updated
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {done} components ({done / elapsed if elapsed else done:.0f}/s)')
 
-        components_data = data.get('components', {})
+        importer = PartsImporter(batch_size=options['batch_size'], on_flush=progress)
         count = 0
+        with open(json_path, 'r', encoding='utf-8') as f:
+            try:
+                for cat_slug, comp_list in iter_sections(f):
+                    # Create or get category
+                    Category.objects.get_or_create(
+                        slug=cat_slug,
+                        defaults={'name': cat_slug.replace('_', ' ').title()},
+                    )
+                    importer.prime_categories([cat_slug])
+                    for comp in comp_list:
+                        if not isinstance(comp, dict) or not comp.get('pid'):
+                            continue
+                        importer.add(count, to_part(comp, cat_slug))
+                        count += 1
+            except ValueError as e:
+                importer.flush()
+                raise CommandError(f'Invalid JSON in {json_path}: {e}')
+        report = importer.finish()
 
-        # Core fields extracted into model columns (not stored in schema_data)
-        CORE_FIELDS = {
-            'pid', 'name', 'manufacturer', 'description', 'link',
-            'approx_price', '_approx_price', 'image_file', 'manual_link', 'category'
-        }
-
-        for cat_slug, comp_list in components_data.items():
-            # Create or get category
-            cat_name = cat_slug.replace('_', ' ').title()
-            category, created = Category.objects.get_or_create(
-                slug=cat_slug,
-                defaults={'name': cat_name}
-            )
-
-            for comp in comp_list:
-                # Extract core fields
-                pid = comp.get('pid')
-                if not pid:
-                    continue
-
-                name = comp.get('name', 'Unnamed')
-                manufacturer = comp.get('manufacturer', 'Unknown')
-                description = comp.get('description', '')
-                link = comp.get('link', '')
-                image_file = comp.get('image_file', '')
-                manual_link = comp.get('manual_link', '')
-
-                # Handle both price field conventions
-                approx_price = comp.get('approx_price', '') or comp.get('_approx_price', '')
-                if isinstance(approx_price, (int, float)):
-                    approx_price = f'${approx_price:.2f}'
-
-                # Store EVERYTHING else in the JSON schema_data field
-                schema_data = {k: v for k, v in comp.items() if k not in CORE_FIELDS}
-
-                # Update or create the component
-                Component.objects.update_or_create(
-                    pid=pid,
-                    defaults={
-                        'category': category,
-                        'name': name,
-                        'manufacturer': manufacturer,
-                        'description': description,
-                        'link': link,
-                        'approx_price': approx_price,
-                        'image_file': image_file,
-                        'manual_link': manual_link,
-                        'schema_data': schema_data
-                    }
-                )
-                count += 1
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported {count} components!'))
+        elapsed = time.perf_counter() - started
+        imported = report['created'] + report['updated']
+        for error in report['errors'][:10]:
+            self.stdout.write(self.style.WARNING(f'  {error["pid"]}: {error["error"]}'))
+        if len(report['errors']) > 10:
+            self.stdout.write(self.style.WARNING(f'  ... and {len(report["errors"]) - 10} more errors'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {imported} components! '
+            f'({report["created"]} created, {report["updated"]} updated, {len(report["errors"])} errors '
+            f'in {elapsed:.2f}s, {imported / elapsed if elapsed else imported:.0f} components/s)'
+        ))
@@ -3,8 +3,11 @@ Management command: reset_to_golden
 
 Wipes all Component and DroneModel records, then seeds the database
 from the golden parts in docs/golden_parts_db_seed/ plus all schema
-categories from drone_parts_schema_v3.json.
+categories from drone_parts_schema_v3.json, and prints how long each
+seeding phase took.
 """
+import time
+
 from django.core.management.base import BaseCommand
 
 from components.seed import seed_golden
@@ -15,7 +18,9 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         self.stdout.write('Resetting to golden parts database...')
+        started = time.perf_counter()
         result = seed_golden(wipe=True)
+        elapsed = time.perf_counter() - started
 
         self.stdout.write(
             f'Deleted {result["deleted_components"]} components, '
@@ -26,3 +31,5 @@ class Command(BaseCommand):
             f'{result["components"]} components, '
             f'{result["drone_models"]} drone models.'
         ))
+        phases = ', '.join(f'{phase} {seconds:.2f}s' for phase, seconds in result['timings'].items())
+        self.stdout.write(f'Took {elapsed:.2f}s ({phases}; commit {elapsed - sum(result["timings"].values()):.2f}s).')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0010_guidemediafile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['category', 'pid'], name='components__categor_bbcd54_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+"""
+FTS5 full-text index over Component name, manufacturer, description and a
+few text specs from schema_data, kept in sync by triggers (so bulk_create /
+bulk_update writes are indexed too). SQLite only.
+"""
+from django.db import migrations
+
+
+# Text specs from schema_data folded into the `specs` column
+SPECS_SQL = """TRIM(
+    COALESCE((SELECT group_concat(value, ' ') FROM json_each({row}.schema_data, '$.tags')), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.size_class'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.stator_size'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.mcu_family'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.imu'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.video_system'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.protocol'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.chemistry'), '') || ' ' ||
+    COALESCE(json_extract({row}.schema_data, '$.esc_firmware'), '')
+)"""
+
+INSERT_SQL = """INSERT INTO components_component_fts (rowid, name, manufacturer, description, specs)
+    SELECT {row}.id, {row}.name, COALESCE({row}.manufacturer, ''), COALESCE({row}.description, ''), {specs}"""
+
+FORWARD_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS components_component_fts USING fts5(
+        name, manufacturer, description, specs,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    (INSERT_SQL + " FROM components_component AS c").format(row='c', specs=SPECS_SQL.format(row='c')),
+    """CREATE TRIGGER IF NOT EXISTS components_component_fts_ai AFTER INSERT ON components_component BEGIN
+        {insert};
+    END""".format(insert=INSERT_SQL.format(row='NEW', specs=SPECS_SQL.format(row='NEW'))),
+    """CREATE TRIGGER IF NOT EXISTS components_component_fts_ad AFTER DELETE ON components_component BEGIN
+        DELETE FROM components_component_fts WHERE rowid = OLD.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS components_component_fts_au
+    AFTER UPDATE OF name, manufacturer, description, schema_data ON components_component BEGIN
+        DELETE FROM components_component_fts WHERE rowid = OLD.id;
+        {insert};
+    END""".format(insert=INSERT_SQL.format(row='NEW', specs=SPECS_SQL.format(row='NEW'))),
+]
+
+REVERSE_SQL = [
+    "DROP TRIGGER IF EXISTS components_component_fts_au",
+    "DROP TRIGGER IF EXISTS components_component_fts_ad",
+    "DROP TRIGGER IF EXISTS components_component_fts_ai",
+    "DROP TABLE IF EXISTS components_component_fts",
+]
+
+
+def _run(statements):
+    def apply(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0011_component_category_pid_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(FORWARD_SQL), _run(REVERSE_SQL)),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0012_component_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=200)),
+                ('value', models.CharField(max_length=255)),
+                ('number', models.FloatField(blank=True, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='components.category')),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facet_values', to='components.component')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'path', 'value'], name='components__categor_fa346b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0016_seed_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompatConflict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=8)),
+                ('left_key', models.TextField()),
+                ('right_key', models.TextField()),
+                ('severity', models.CharField(max_length=7)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['code', 'right_key'], name='components__code_6ff1f6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('code', 'left_key', 'right_key'), name='compat_conflict_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CompatKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=8)),
+                ('side', models.CharField(max_length=5)),
+                ('key', models.TextField()),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='components.component')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['code', 'side', 'key'], name='components__code_184ad3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0017_compat_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='compat_values',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
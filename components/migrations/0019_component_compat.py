@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('components', '0018_component_compat_values'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentCompat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(max_length=8)),
+                ('prop_size_max_in', models.FloatField(blank=True, db_index=True, null=True)),
+                ('diameter_in', models.FloatField(blank=True, db_index=True, null=True)),
+                ('mounting_pattern_mm', models.FloatField(blank=True, db_index=True, null=True)),
+                ('motor_mount_hole_spacing_mm', models.FloatField(blank=True, db_index=True, null=True)),
+                ('cell_count', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('cell_count_min', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('cell_count_max', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('voltage_min_v', models.FloatField(blank=True, db_index=True, null=True)),
+                ('voltage_max_v', models.FloatField(blank=True, db_index=True, null=True)),
+                ('continuous_current_per_motor_a', models.FloatField(blank=True, db_index=True, null=True)),
+                ('min_esc_current_per_motor_a', models.FloatField(blank=True, db_index=True, null=True)),
+                ('mounting_hole_size', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('motor_mount_bolt_size', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('connector_type', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('video_standard', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('output_signal', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('digital_system', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='components.category')),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compat_rows', to='components.component')),
+            ],
+        ),
+    ]
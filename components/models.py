@@ -1,7 +1,8 @@
 """
 models.py — DroneClear data models.
 
-Core: Category, Component, DroneModel (parts library & compatibility engine)
+Core: Category, Component, ComponentFacet, ComponentCompat, CompatKey, CompatConflict, CatalogueVersion, DerivedIndexState, SeedStatus, DroneModel (parts library & compatibility engine)
+Import: ImportJob (background parts imports)
 Guide: BuildGuide, BuildGuideStep (assembly instructions)
 Media: GuideMediaFile (uploaded images/videos for guide steps)
 Session: BuildSession, StepPhoto, BuildEvent (build tracking & audit trail)
@@ -41,10 +42,143 @@ class Component(models.Model):
     
     # Store all dynamically variable data (Specs, Compatibility, Notes) here
     schema_data = models.JSONField(default=dict, blank=True)
-    
+    # Derived from schema_data on every write: typed check values per build role (see normalize.py)
+    compat_values = models.JSONField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order (see pagination.KeysetPagination)
+            models.Index(fields=['category', 'pid']),
+        ]
+
     def __str__(self):
         return f"{self.pid} - {self.name}"
 
+class ComponentFacet(models.Model):
+    """
+    One filterable value of a Component (facet index, see facets.py).
+    Select facets store each distinct value as the frontend renders it;
+    range facets also store the parsed number.
+    """
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='facet_values')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    path = models.CharField(max_length=200)
+    value = models.CharField(max_length=255)
+    number = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'path', 'value']),
+        ]
+
+    def __str__(self):
+        return f"{self.component_id} {self.path}={self.value}"
+
+class ComponentCompat(models.Model):
+    """
+    A component's typed compatibility values in one build role, one indexed
+    column per check field (projection of compat_values, see normalize.py).
+    A stack has a row for its FC view and one for its ESC view.
+    """
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='compat_rows')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    role = models.CharField(max_length=8)  # compat.ROLE_CATEGORIES key
+    prop_size_max_in = models.FloatField(null=True, blank=True, db_index=True)
+    diameter_in = models.FloatField(null=True, blank=True, db_index=True)
+    mounting_pattern_mm = models.FloatField(null=True, blank=True, db_index=True)
+    motor_mount_hole_spacing_mm = models.FloatField(null=True, blank=True, db_index=True)
+    cell_count = models.IntegerField(null=True, blank=True, db_index=True)
+    cell_count_min = models.IntegerField(null=True, blank=True, db_index=True)
+    cell_count_max = models.IntegerField(null=True, blank=True, db_index=True)
+    voltage_min_v = models.FloatField(null=True, blank=True, db_index=True)
+    voltage_max_v = models.FloatField(null=True, blank=True, db_index=True)
+    continuous_current_per_motor_a = models.FloatField(null=True, blank=True, db_index=True)
+    min_esc_current_per_motor_a = models.FloatField(null=True, blank=True, db_index=True)
+    mounting_hole_size = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    motor_mount_bolt_size = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    connector_type = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    video_standard = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    output_signal = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    digital_system = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.component_id} as {self.role}"
+
+class CompatKey(models.Model):
+    """
+    A component's value on one side of one compatibility check
+    (compatibility index, see compat_index.py).
+    """
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='+')
+    code = models.CharField(max_length=8)   # compat.CHECKS code
+    side = models.CharField(max_length=5)   # 'left' | 'right'
+    key = models.TextField()                # JSON [value, severity]
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['code', 'side', 'key']),
+        ]
+
+    def __str__(self):
+        return f"{self.component_id} {self.code}.{self.side}={self.key}"
+
+class CompatConflict(models.Model):
+    """A pair of CompatKey values that violates its check (see compat_index.py)."""
+    code = models.CharField(max_length=8)
+    left_key = models.TextField()
+    right_key = models.TextField()
+    severity = models.CharField(max_length=7)  # 'error' | 'warning'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['code', 'left_key', 'right_key'], name='compat_conflict_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['code', 'right_key']),
+        ]
+
+    def __str__(self):
+        return f"{self.code}: {self.left_key} × {self.right_key}"
+
+class CatalogueVersion(models.Model):
+    """Single-row counter bumped on every parts catalogue write (see catalogue.py)."""
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"catalogue v{self.version}"
+
+class DerivedIndexState(models.Model):
+    """Hash of the code and definitions a derived table was last rebuilt from (see apps.py)."""
+    name = models.CharField(max_length=50, unique=True)  # 'facets' | 'compat_values' | 'compat_index'
+    inputs_hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.inputs_hash[:12]}"
+
+
+class SeedStatus(models.Model):
+    """Single-row state of a background first-boot golden seed (see autoseed.py)."""
+    STATE_CHOICES = [
+        ('pending', 'Pending'),
+        ('seeding', 'Seeding'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default='pending')
+    message = models.TextField(blank=True, default='')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Seed status"
+
+    def __str__(self):
+        return f"seed {self.state}"
+
 class DroneModel(models.Model):
     """A saved drone build (parts recipe). relations JSONField maps category → component PID."""
     pid = models.CharField(max_length=50, unique=True)
@@ -62,6 +196,38 @@ class DroneModel(models.Model):
         return f"{self.pid} - {self.name}"
 
 
+class ImportJob(models.Model):
+    """A background parts import (see jobs.py). Progress is saved after every committed batch."""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    FORMAT_CHOICES = [
+        ('json', 'JSON array'),
+        ('ndjson', 'NDJSON'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='json')
+    bytes_total = models.PositiveBigIntegerField(default=0)
+    bytes_processed = models.PositiveBigIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)  # first MAX_STORED_ERRORS errors
+    message = models.TextField(blank=True)
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # heartbeat: touched by every progress save
+
+    def __str__(self):
+        return f"import {self.id} ({self.status})"
+
+
 # =====================================================================
 # Build Guide Models — Step-by-step drone assembly workflow
 # =====================================================================
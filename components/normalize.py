@@ -0,0 +1,218 @@
+"""
+normalize.py — Canonical typed compatibility values, computed at write time.
+
+Every check reads its two values through an extractor in compat.CHECKS:
+parseFloat/parseInt/toUpperCase semantics, `a || b` fallbacks between
+the compatibility block and top-level fields, and for stacks the fc/esc
+sub-object flattened over the stack's own fields. normalize() runs those
+extractors once per part and the result is stored in
+Component.compat_values:
+
+  {role: {field: value}}
+    frame  {"fc_mounting_patterns_mm": [30.5, 20], "motor_mount_bolt_size": "M3", ...}
+    bat    {"cell_count": 6, "voltage_max_v": 25.2, "connector_type": "XT60"}
+    stack  {"fc": {...}, "esc": {...}}  (its effective FC and ESC)
+
+Values are stored as JSON, so mount pattern tuples and (min, max) ranges
+come back as lists; fields with no value are left out. A category with no
+build role normalizes to {}. NULL means not normalized (unsaved or raw
+rows), and the engine then falls back to the extractors.
+
+The scalar values are also projected into ComponentCompat, one row per
+component and role with one typed, indexed column per field, so range and
+equality filters on them (?where=compat.cell_count_max>=6, see query.py)
+are index seeks. Ranges are split into their _min/_max columns, and fields
+naming the same thing from either side of a check share a column
+(connector_type / battery_connector, fc_mounting_hole_size /
+mounting_hole_size). A frame's FC mount patterns are a list and are not
+projected.
+
+Written on: Component saves (pre_save; ComponentCompat on post_save),
+PartsImporter batches, seed bulk_create and snapshot rows, category saves
+(the slug decides the roles). Rebuilt on post_migrate, so a change to
+CHECKS reaches every stored row.
+
+Used by: compat (Part.values), compat_index, query, importer, seed,
+apps.ready().
+"""
+import json
+
+from django.db import connections, router, transaction
+
+from components.compat import CHECKS, Part, candidate_roles
+
+
+BATCH_SIZE = 2000
+
+# compat_values field → ComponentCompat column, or (min, max) columns for a range
+PROJECTED_FIELDS = {
+    'prop_size_max_in': 'prop_size_max_in',
+    'diameter_in': 'diameter_in',
+    'mounting_pattern_mm': 'mounting_pattern_mm',
+    'motor_mount_hole_spacing_mm': 'motor_mount_hole_spacing_mm',
+    'cell_count': 'cell_count',
+    'cell_count_max': 'cell_count_max',
+    'cell_count_range': ('cell_count_min', 'cell_count_max'),
+    'voltage_max_v': 'voltage_max_v',
+    'voltage_range_v': ('voltage_min_v', 'voltage_max_v'),
+    'continuous_current_per_motor_a': 'continuous_current_per_motor_a',
+    'min_esc_current_per_motor_a': 'min_esc_current_per_motor_a',
+    'fc_mounting_hole_size': 'mounting_hole_size',
+    'mounting_hole_size': 'mounting_hole_size',
+    'motor_mount_bolt_size': 'motor_mount_bolt_size',
+    'connector_type': 'connector_type',
+    'battery_connector': 'connector_type',
+    'video_standard': 'video_standard',
+    'output_signal': 'output_signal',
+    'digital_system': 'digital_system',
+}
+
+# ComponentCompat value columns, in insert order
+COLUMNS = list(dict.fromkeys(
+    column for columns in PROJECTED_FIELDS.values()
+    for column in (columns if isinstance(columns, tuple) else (columns,))
+))
+
+
+def _jsonable(value):
+    """The value as it reads back from the JSON column."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def normalize(category, data):
+    """compat_values for a part of `category` with this schema_data."""
+    data = data if isinstance(data, dict) else {}
+    part = Part(None, category, data)
+    values = {}
+    for role, view in candidate_roles(category, {}).items():
+        viewed = view(part)
+        fields = values[role] = {}
+        for check in CHECKS:
+            for side_role, field, extract in ((check.left_role, check.left_field, check.left_extract),
+                                              (check.right_role, check.right_field, check.right_extract)):
+                if side_role != role or field in fields:
+                    continue
+                value = extract(viewed.data)
+                if value is not None:
+                    fields[field] = _jsonable(value)
+    return values
+
+
+def normalize_component(component):
+    """Set compat_values on a Component (or record with category and schema_data)."""
+    component.compat_values = normalize(component.category.slug, component.schema_data)
+    return component
+
+
+# ── Maintenance ─────────────────────────────────────────────
+
+def _update(rows, using=None):
+    """UPDATE compat_values for [(json text, pk)] via executemany."""
+    from components.models import Component
+    connection = connections[using or router.db_for_write(Component)]
+    quote = connection.ops.quote_name
+    sql = (f'UPDATE {quote(Component._meta.db_table)} SET {quote("compat_values")} = %s '
+           f'WHERE {quote("id")} = %s')
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+
+
+def renormalize(queryset=None, using=None):
+    """
+    Recompute compat_values, writing only rows that changed (and their
+    ComponentCompat rows). Returns the count written.
+    """
+    from components.models import Component
+    db = using or router.db_for_write(Component)
+    queryset = Component.objects.all() if queryset is None else queryset
+    changed = []
+    for pk, category_id, category, data, stored in (
+            queryset.using(db).order_by('pk')
+            .values_list('pk', 'category_id', 'category__slug', 'schema_data', 'compat_values')
+            .iterator(chunk_size=BATCH_SIZE)):
+        values = normalize(category, data)
+        if values != stored:
+            changed.append((pk, category_id, values))
+    with transaction.atomic(using=db):
+        _update([(json.dumps(values), pk) for pk, _, values in changed], db)
+        project(changed, db)
+    return len(changed)
+
+
+# ── Typed projection (ComponentCompat) ──────────────────────
+
+def projection_rows(pk, category_id, values):
+    """ComponentCompat rows (component_id, category_id, role, *COLUMNS) for one component."""
+    rows = []
+    for role, fields in sorted((values or {}).items()):
+        row = dict.fromkeys(COLUMNS)
+        for field, value in fields.items():
+            columns = PROJECTED_FIELDS.get(field)
+            if columns is None:
+                continue
+            pairs = zip(columns, value) if isinstance(columns, tuple) else ((columns, value),)
+            for column, item in pairs:
+                if item is not None and not isinstance(item, (dict, list)):
+                    row[column] = item
+        rows.append((pk, category_id, role, *row.values()))
+    return rows
+
+
+def _insert_projection(rows, using=None):
+    from components.models import ComponentCompat
+    connection = connections[using or router.db_for_write(ComponentCompat)]
+    quote = connection.ops.quote_name
+    columns = ['component_id', 'category_id', 'role', *COLUMNS]
+    sql = (f'INSERT INTO {quote(ComponentCompat._meta.db_table)} ({", ".join(quote(c) for c in columns)}) '
+           f'VALUES ({", ".join(["%s"] * len(columns))})')
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), BATCH_SIZE):
+            cursor.executemany(sql, rows[start:start + BATCH_SIZE])
+
+
+def project(items, using=None):
+    """Rewrite the ComponentCompat rows of [(pk, category_id, compat_values)]."""
+    from components.models import ComponentCompat
+    db = using or router.db_for_write(ComponentCompat)
+    items = list(items)
+    with transaction.atomic(using=db):
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            ComponentCompat.objects.using(db).filter(component__in=[pk for pk, _, _ in batch]).delete()
+            _insert_projection([row for item in batch for row in projection_rows(*item)], db)
+    return len(items)
+
+
+def project_components(components):
+    """Rewrite the ComponentCompat rows of saved components (or records with pk, category and compat_values)."""
+    return project((c.pk, c.category.pk, c.compat_values) for c in components)
+
+
+def rebuild_projection(using=None):
+    """Rebuild ComponentCompat from the stored compat_values (in database `using`)."""
+    from components.models import Component, ComponentCompat
+    db = using or router.db_for_write(ComponentCompat)
+    rows = Component.objects.using(db).order_by('pk').values_list('pk', 'category_id', 'compat_values')
+    with transaction.atomic(using=db):
+        ComponentCompat.objects.using(db).all().delete()
+        _insert_projection([row for item in rows.iterator(chunk_size=BATCH_SIZE)
+                            for row in projection_rows(*item)], db)
+    return ComponentCompat.objects.using(db).count()
+
+
+# ── Signals ─────────────────────────────────────────────────
+
+def on_component_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        normalize_component(instance)
+
+
+def on_component_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        project_components([instance])
+
+
+def on_category_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        renormalize(instance.components.all())
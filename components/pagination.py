@@ -0,0 +1,112 @@
+"""
+pagination.py — Opt-in keyset (cursor) pagination for catalogue lists.
+
+Clients that pass neither ?cursor= nor ?page_size= get the historical
+unpaginated list. Otherwise pages are ordered by (category id, pid) and
+the next page starts strictly after the last row of the current one, so
+each page is an index seek on the (category, pid) index rather than an
+OFFSET scan. Categories therefore come in creation order, not by slug or
+name; clients that want another order sort the results themselves.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _positive_int(integer_string, strict=False, cutoff=None):
+    """Cast a string to a positive integer, capped at cutoff (as DRF's private helper)."""
+    ret = int(integer_string)
+    if ret < 0 or (ret == 0 and strict):
+        raise ValueError()
+    if cutoff:
+        return min(ret, cutoff)
+    return ret
+
+
+class KeysetPagination(BasePagination):
+    """
+    ?page_size=N       — enable pagination (default 100, max 1000)
+    ?cursor=<token>    — continue after the position encoded in the token
+    Response: { next, next_cursor, results }
+    """
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        position = self.decode_cursor(params.get(self.cursor_query_param))
+
+        queryset = queryset.order_by('category_id', 'pid')  # id, not slug: matches the index
+        if position is not None:
+            category_id, pid = position
+            queryset = queryset.filter(
+                Q(category_id__gt=category_id) | Q(category_id=category_id, pid__gt=pid)
+            )
+
+        rows = list(queryset[:size + 1])
+        self.has_next = len(rows) > size
+        rows = rows[:size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, obj):
+        raw = json.dumps([obj.category_id, obj.pid], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            category_id, pid = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(category_id, int) or not isinstance(pid, str):
+            raise NotFound(self.invalid_cursor_message)
+        return category_id, pid
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'next_cursor': self.next_cursor,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,158 @@
+"""
+projection.py — Sparse fieldsets and JSON path projection for read endpoints.
+
+  ?fields=pid,name,approx_price
+      Only these serializer fields are returned. Unrequested model columns
+      are deferred with .only(), so they are never read from the database.
+
+  ?schema_fields=compatibility.cell_count_max,weight_g
+      Only these dotted paths of the viewset's JSON column are returned,
+      rebuilt into a nested object. On SQLite each path is extracted with
+      JSON_EXTRACT in the SELECT and the full JSON column is deferred, so
+      unused JSON is never decoded or re-encoded per row.
+
+Used by ComponentViewSet, DroneModelViewSet and BuildSessionViewSet together
+with serializers.SparseFieldsetMixin.
+"""
+import json
+
+from django.db import connections
+from django.db.models import Func, TextField
+from django.db.models.fields.json import compile_json_path
+
+
+class JSONPathText(Func):
+    """
+    JSON text of the value at a path inside a JSON column, or NULL when the
+    path is missing. Strings come back quoted so every result round-trips
+    through json.loads() exactly (unlike KeyTransform, which unquotes them).
+    """
+    output_field = TextField()
+
+    def __init__(self, column, keys):
+        self.json_path = compile_json_path(keys)
+        super().__init__(column)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        lhs, params = compiler.compile(self.source_expressions[0])
+        sql = (
+            "(CASE JSON_TYPE({lhs}, %s) "
+            "WHEN 'text' THEN JSON_QUOTE(JSON_EXTRACT({lhs}, %s)) "
+            "WHEN 'true' THEN 'true' WHEN 'false' THEN 'false' WHEN 'null' THEN 'null' "
+            "ELSE CAST(JSON_EXTRACT({lhs}, %s) AS TEXT) END)"
+        ).format(lhs=lhs)
+        path = self.json_path
+        return sql, (*params, path, *params, path, *params, path)
+
+
+def parse_list(value):
+    """'a, b,,c' → ['a', 'b', 'c']"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def set_path(target, keys, value):
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def get_path(source, keys):
+    """Walk a decoded JSON value; returns (found, value)."""
+    for key in keys:
+        if isinstance(source, dict) and key in source:
+            source = source[key]
+        elif isinstance(source, list) and key.isdigit() and int(key) < len(source):
+            source = source[int(key)]
+        else:
+            return False, None
+    return True, source
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin for ?fields= / ?schema_fields= on safe (read) requests.
+
+    projected_json_fields lists the JSON columns ?schema_fields= may address.
+    A path's first segment may name one of them; otherwise the path is
+    relative to the first.
+    """
+    projected_json_fields = ()
+
+    def _is_read(self):
+        return self.request is not None and self.request.method in ('GET', 'HEAD')
+
+    def get_sparse_fields(self):
+        """Requested serializer field names, or None for all fields."""
+        if not self._is_read() or 'fields' not in self.request.query_params:
+            return None
+        return set(parse_list(self.request.query_params.get('fields')))
+
+    def get_json_projection(self):
+        """{json_column: [(keys, alias), ...]} for requested JSON paths."""
+        if not self._is_read() or not self.projected_json_fields:
+            return {}
+        projection = {}
+        for i, path in enumerate(parse_list(self.request.query_params.get('schema_fields'))):
+            keys = [k for k in path.split('.') if k]
+            column = self.projected_json_fields[0]
+            if len(keys) > 1 and keys[0] in self.projected_json_fields:
+                column = keys.pop(0)
+            if keys:
+                projection.setdefault(column, []).append((keys, f'_projected_{i}'))
+        return projection
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        sparse = self.get_sparse_fields()
+        projection = self.get_json_projection()
+        if sparse is None and not projection:
+            return queryset
+
+        in_sql = connections[queryset.db].vendor == 'sqlite'
+        model = queryset.model
+        concrete = {f.name: f for f in model._meta.concrete_fields}
+        if sparse is None:
+            keep = set(concrete)
+        else:
+            # Always keep the key, the lookup column and FKs (cheap, and
+            # required by select_related / pagination).
+            keep = {model._meta.pk.name, self.lookup_field}
+            keep |= {name for name, f in concrete.items() if f.is_relation}
+            keep |= {name for name in sparse if name in concrete}
+        for column in projection:
+            if in_sql:
+                keep.discard(column)
+            else:
+                keep.add(column)
+        queryset = queryset.only(*keep)
+
+        if in_sql:
+            annotations = {
+                alias: JSONPathText(column, keys)
+                for column, paths in projection.items()
+                for keys, alias in paths
+            }
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        context['json_projection'] = self.get_json_projection()
+        return context
+
+
+def project_json(instance, column, paths):
+    """Rebuild the projected object for one row (SQL or in-Python fallback)."""
+    result = {}
+    for keys, alias in paths:
+        if alias in instance.__dict__:
+            raw = instance.__dict__[alias]
+            if raw is None:
+                continue
+            set_path(result, keys, json.loads(raw))
+        else:
+            found, value = get_path(getattr(instance, column), keys)
+            if found:
+                set_path(result, keys, value)
+    return result
@@ -0,0 +1,381 @@
+"""
+query.py — Server-side filter/sort DSL over Component.schema_data.
+
+  ?where=compatibility.cell_count_max>=6;manufacturer=T-Motor
+  ?sort=-weight_g,name
+
+Clauses are `<field><op><value>` joined with ';' (or repeated ?where=
+params), all ANDed. Operators: = != > >= < <= ~ (case-insensitive
+substring). Fields are core columns (pid, name, manufacturer,
+description), `price` (numeric approx_price), or dotted schema_data paths.
+
+Schema paths compile to SQLite JSON1 expressions with the path inlined as
+a literal, so they textually match the expression indexes created by
+ensure_query_indexes(). Numeric fields classified in the schema's
+_compat_hard/_compat_soft arrays (plus weight_g) are indexed on
+(category_id, <numeric expression>), so a category-scoped range filter or
+sort is an index seek.
+
+Numeric extraction follows parseFloat(): numbers as-is, numeric-looking
+strings ('5.1', '30.5mm') by their leading number, anything else NULL.
+
+`compat.<column>` fields (?where=compat.cell_count_max>=6) filter and sort
+on the typed ComponentCompat columns instead (normalize.py): the values the
+compatibility engine reads, with its fallbacks and stack views applied.
+Each column has its own index, so a range or equality clause is a seek
+that yields the matching component ids. A part matches when any of its
+roles does; numeric columns take = != > >= < <=, text columns = != ~.
+"""
+import json
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import (
+    BooleanField, F, FloatField, Func, IntegerField, OuterRef, Q, Subquery, TextField, Value,
+)
+from django.db.models.functions import Cast, NullIf
+from rest_framework.exceptions import ValidationError
+
+
+SCHEMA_PATH = os.path.join(settings.BASE_DIR, 'drone_parts_schema_v3.json')
+JSON_COLUMN = 'schema_data'
+INDEX_PREFIX = 'dc_q_'
+
+# Always-indexed top-level paths in addition to the schema-derived ones
+EXTRA_INDEXED_PATHS = ('weight_g',)
+
+CORE_FIELDS = {'pid', 'name', 'manufacturer', 'description'}
+COMPAT_PREFIX = 'compat.'
+PATH_RE = re.compile(r'^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$')
+CLAUSE_RE = re.compile(r'^\s*([A-Za-z0-9_.]+)\s*(>=|<=|!=|=|>|<|~)\s*(.*?)\s*$')
+
+
+# ── SQL expressions ─────────────────────────────────────────
+
+def json_path_literal(path):
+    """'compatibility.cell_count_max' → '$."compatibility"."cell_count_max"' (SQL literal)."""
+    if not PATH_RE.match(path):
+        raise ValueError(f'Invalid path: {path!r}')
+    return "'$" + ''.join(f'."{key}"' for key in path.split('.')) + "'"
+
+
+def numeric_sql(column, path):
+    """Numeric value of a JSON path (parseFloat semantics), NULL if not numeric."""
+    p = json_path_literal(path)
+    return (
+        f"(CASE WHEN json_type({column}, {p}) IN ('integer', 'real') THEN json_extract({column}, {p}) "
+        f"WHEN json_type({column}, {p}) = 'text' AND ltrim(json_extract({column}, {p})) GLOB '[-+.0-9]*' "
+        f"THEN CAST(ltrim(json_extract({column}, {p})) AS REAL) END)"
+    )
+
+
+def text_sql(column, path):
+    return f'json_extract({column}, {json_path_literal(path)})'
+
+
+class _JSONPathFunc(Func):
+    """Base for expressions over a literal JSON path of one column."""
+    sql_builder = None
+
+    def __init__(self, path, column=JSON_COLUMN):
+        json_path_literal(path)  # validate early
+        self.path = path
+        super().__init__(F(column))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        lhs, params = compiler.compile(self.source_expressions[0])
+        return type(self).sql_builder(lhs, self.path), params
+
+
+class JSONNumber(_JSONPathFunc):
+    output_field = FloatField()
+    sql_builder = staticmethod(numeric_sql)
+
+
+class JSONText(_JSONPathFunc):
+    output_field = TextField()
+    sql_builder = staticmethod(text_sql)
+
+
+class JSONType(_JSONPathFunc):
+    output_field = TextField()
+    sql_builder = staticmethod(lambda column, path: f'json_type({column}, {json_path_literal(path)})')
+
+
+class JSONArrayContains(Func):
+    """True when the JSON path is an array containing `value`."""
+    output_field = BooleanField()
+
+    def __init__(self, path, value, column=JSON_COLUMN):
+        json_path_literal(path)
+        self.path = path
+        self.value = value
+        super().__init__(F(column))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        lhs, params = compiler.compile(self.source_expressions[0])
+        p = json_path_literal(self.path)
+        sql = (
+            f"(json_type({lhs}, {p}) = 'array' AND "
+            f"EXISTS (SELECT 1 FROM json_each({lhs}, {p}) AS je WHERE je.value = %s))"
+        )
+        return sql, (*params, *params, self.value)
+
+
+def price_expression():
+    """approx_price as a number ('$24.99' → 24.99), NULL when blank."""
+    return Cast(
+        Func(NullIf('approx_price', Value('')), Value('$~ '), function='LTRIM'),
+        FloatField(),
+    )
+
+
+# ── Schema-derived path registry ────────────────────────────
+
+_registry_lock = threading.Lock()
+_registry_cache = {'mtime': None, 'types': None, 'indexed': None}
+
+
+def _walk(prefix, data, types):
+    for key, value in data.items():
+        if key.startswith('_') or not PATH_RE.match(key):
+            continue
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            if not prefix:
+                _walk(f'{path}.', value, types)
+        elif isinstance(value, list):
+            types.setdefault(path, 'list')
+        elif isinstance(value, bool):
+            types.setdefault(path, 'bool')
+        elif isinstance(value, (int, float)):
+            types.setdefault(path, 'number')
+        elif isinstance(value, str):
+            types.setdefault(path, 'text')
+
+
+def build_registry(schema):
+    """
+    From the schema examples: ({path: 'number'|'text'|'bool'|'list'},
+    [indexed numeric paths]). Indexed = numeric fields listed in any
+    category's _compat_hard/_compat_soft, plus EXTRA_INDEXED_PATHS.
+    """
+    types, indexed = {}, set(EXTRA_INDEXED_PATHS)
+    for items in (schema.get('components') or {}).values():
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            _walk('', item, types)
+            compat = item.get('compatibility') if isinstance(item.get('compatibility'), dict) else {}
+            for field in (compat.get('_compat_hard') or []) + (compat.get('_compat_soft') or []):
+                value = compat.get(field)
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and PATH_RE.match(field):
+                    indexed.add(f'compatibility.{field}')
+    for path in EXTRA_INDEXED_PATHS:
+        types.setdefault(path, 'number')
+    return types, sorted(indexed)
+
+
+def get_registry():
+    """(path types, indexed paths), recomputed when the schema file changes."""
+    try:
+        mtime = os.path.getmtime(SCHEMA_PATH)
+    except OSError:
+        mtime = None
+    with _registry_lock:
+        if _registry_cache['types'] is None or _registry_cache['mtime'] != mtime:
+            schema = {}
+            if mtime is not None:
+                with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+                    schema = json.load(f)
+            _registry_cache['types'], _registry_cache['indexed'] = build_registry(schema)
+            _registry_cache['mtime'] = mtime
+        return _registry_cache['types'], _registry_cache['indexed']
+
+
+# ── Expression indexes ──────────────────────────────────────
+
+def index_name(path):
+    return INDEX_PREFIX + path.replace('.', '__')
+
+
+def ensure_query_indexes(using='default'):
+    """
+    Create (category_id, numeric expression) indexes for the hot schema
+    paths and drop ones no longer in the schema. SQLite only; a no-op
+    elsewhere. Safe to call repeatedly.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return []
+    from components.models import Component
+    table = Component._meta.db_table
+    _, indexed = get_registry()
+    wanted = {index_name(path): path for path in indexed}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name LIKE %s",
+            [table, INDEX_PREFIX + '%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        for name in existing - set(wanted):
+            cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+        for name, path in wanted.items():
+            if name not in existing:
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" '
+                    f'("category_id", {numeric_sql(JSON_COLUMN, path)})'
+                )
+    return sorted(wanted)
+
+
+# ── DSL compiler ────────────────────────────────────────────
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _schema_path(field, param='where'):
+    path = field[len(JSON_COLUMN) + 1:] if field.startswith(JSON_COLUMN + '.') else field
+    if not PATH_RE.match(path):
+        raise ValidationError({param: [f'Invalid field path: {field!r}']})
+    return path
+
+
+LOOKUPS = {'=': 'exact', '>': 'gt', '>=': 'gte', '<': 'lt', '<=': 'lte', '~': 'icontains'}
+
+
+def _compat_column(field, param='where'):
+    """'compat.cell_count_max' → ('cell_count_max', is numeric)."""
+    from components.models import ComponentCompat
+    from components.normalize import COLUMNS
+    column = field[len(COMPAT_PREFIX):]
+    if column not in COLUMNS:
+        raise ValidationError({param: [f'Unknown compat column: {column!r} (one of {", ".join(COLUMNS)})']})
+    return column, isinstance(ComponentCompat._meta.get_field(column), (FloatField, IntegerField))
+
+
+def _compat_clause(queryset, field, op, value):
+    """Components with a ComponentCompat row matching the clause."""
+    from components.models import ComponentCompat
+    column, numeric = _compat_column(field)
+    if numeric:
+        number = _number(value)
+        if op == '~' or number is None:
+            raise ValidationError({'where': [f'{field} requires a numeric value and one of = != > >= < <=']})
+        value = number
+    elif op not in ('=', '!=', '~'):
+        raise ValidationError({'where': [f'{op} requires a numeric field, {field} is text']})
+    rows = ComponentCompat.objects.filter(**{f'{column}__isnull': False})
+    if op == '!=':
+        rows = rows.exclude(**{column: value})
+    else:
+        rows = rows.filter(**{f'{column}__{LOOKUPS[op]}': value})
+    return queryset.filter(pk__in=rows.values('component_id'))
+
+
+def _compat_sort_expression(field, descending):
+    """A component's lowest (highest, descending) value of a compat column over its roles."""
+    from components.models import ComponentCompat
+    column, _ = _compat_column(field, 'sort')
+    rows = (ComponentCompat.objects.filter(component=OuterRef('pk'), **{f'{column}__isnull': False})
+            .order_by(f'-{column}' if descending else column).values(column)[:1])
+    return Subquery(rows)
+
+
+def parse_clauses(values):
+    """['a>=1;b=x', 'c~y'] → [(field, op, value), ...]"""
+    clauses = []
+    for value in values:
+        for raw in value.split(';'):
+            if not raw.strip():
+                continue
+            match = CLAUSE_RE.match(raw)
+            if not match:
+                raise ValidationError({'where': [f'Could not parse clause: {raw!r}']})
+            clauses.append(match.groups())
+    return clauses
+
+
+def apply_where(queryset, values):
+    """Apply ?where= clauses to a Component queryset."""
+    return apply_clauses(queryset, parse_clauses(values))
+
+
+def apply_clauses(queryset, clauses):
+    """Apply parsed (field, op, value) clauses to a Component queryset."""
+    types, _ = get_registry()
+    for i, (field, op, value) in enumerate(clauses):
+        alias = f'_where_{i}'
+        if field.startswith(COMPAT_PREFIX):
+            queryset = _compat_clause(queryset, field, op, value)
+            continue
+        if field in CORE_FIELDS or field == 'price':
+            expression = price_expression() if field == 'price' else F(field)
+            if field == 'price' and op != '~':
+                number = _number(value)
+                if number is None:
+                    raise ValidationError({'where': [f'price requires a numeric value, got {value!r}']})
+                value = number
+            queryset = queryset.alias(**{alias: expression})
+            lookup = {f'{alias}__{LOOKUPS.get(op, "exact")}': value}
+            queryset = queryset.exclude(**lookup) if op == '!=' else queryset.filter(**lookup)
+            continue
+
+        path = _schema_path(field)
+        kind = types.get(path)
+        number = _number(value)
+        if op == '~':
+            queryset = queryset.alias(**{alias: JSONText(path)}).filter(**{f'{alias}__icontains': value})
+        elif value.lower() in ('true', 'false') and op in ('=', '!='):
+            queryset = queryset.alias(**{alias: JSONType(path)})
+            wanted = value.lower() if op == '=' else ('false' if value.lower() == 'true' else 'true')
+            queryset = queryset.filter(**{alias: wanted})
+        elif op in ('=', '!='):
+            scalar = JSONNumber(path) if number is not None else JSONText(path)
+            compare = number if number is not None else value
+            queryset = queryset.alias(**{alias: scalar})
+            if kind == 'list' or kind is None:
+                contains = JSONArrayContains(path, compare)
+                match = Q(**{alias: compare}) | contains
+            else:
+                match = Q(**{alias: compare})
+            if op == '=':
+                queryset = queryset.filter(match)
+            else:
+                queryset = queryset.filter(**{f'{alias}__isnull': False}).exclude(match)
+        else:
+            if number is None:
+                raise ValidationError({'where': [f'{op} requires a numeric value, got {value!r}']})
+            queryset = queryset.alias(**{alias: JSONNumber(path)}).filter(**{f'{alias}__{LOOKUPS[op]}': number})
+    return queryset
+
+
+def apply_sort(queryset, value):
+    """Apply ?sort=-weight_g,name. Missing values sort last in both directions."""
+    types, _ = get_registry()
+    ordering = []
+    for i, key in enumerate(k.strip() for k in value.split(',') if k.strip()):
+        descending = key.startswith('-')
+        field = key.lstrip('-+')
+        if field in CORE_FIELDS:
+            expression = F(field)
+        elif field.startswith(COMPAT_PREFIX):
+            expression = _compat_sort_expression(field, descending)
+        elif field == 'price':
+            expression = price_expression()
+        else:
+            path = _schema_path(field, 'sort')
+            expression = JSONText(path) if types.get(path) == 'text' else JSONNumber(path)
+        alias = f'_sort_{i}'
+        queryset = queryset.alias(**{alias: expression})
+        ordering.append(F(alias).desc(nulls_last=True) if descending else F(alias).asc(nulls_last=True))
+    if not ordering:
+        return queryset
+    return queryset.order_by(*ordering, 'pid')
@@ -0,0 +1,76 @@
+"""
+search.py — Full-text search over the parts library.
+
+  GET /api/components/?q=t-motor 2207
+
+On SQLite, Components are indexed in the FTS5 table components_component_fts
+(name, manufacturer, description, and a `specs` column of text fields from
+schema_data: tags, size_class, stator_size, mcu_family, ...). The table and
+the triggers that keep it in sync with every insert/update/delete are
+created by migration 0012, so bulk writes stay indexed without signals.
+
+Each query word is matched as a prefix and all words must match. Results
+span every category and are ordered by bm25 rank (name and manufacturer
+hits weigh more than description/specs). Other backends fall back to an
+unranked icontains match on the core columns.
+
+Used by: ComponentViewSet (?q=).
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = 'components_component_fts'
+
+# bm25 column weights: name, manufacturer, description, specs
+RANK_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TOKENS = 16
+
+
+def match_query(text):
+    """'T-Motor 2207' → '"T"* "Motor"* "2207"*' (FTS5 syntax-safe), or '' if empty."""
+    tokens = TOKEN_RE.findall(text or '')[:MAX_TOKENS]
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_available(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    return SEARCH_TABLE in connection.introspection.table_names()
+
+
+def apply_search(queryset, text, ranked=True):
+    """
+    Restrict a Component queryset to rows matching `text`. With ranked=True
+    the result is ordered best match first (ties by pid).
+    """
+    query = match_query(text)
+    if not query:
+        return queryset.none()
+    if not search_available(queryset.db):
+        words = TOKEN_RE.findall(text)[:MAX_TOKENS]
+        for word in words:
+            queryset = queryset.filter(
+                Q(name__icontains=word) | Q(manufacturer__icontains=word) | Q(description__icontains=word)
+            )
+        return queryset.order_by('pid') if ranked else queryset
+
+    table = queryset.model._meta.db_table
+    queryset = queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', (query,),
+    ))
+    if not ranked:
+        return queryset
+    weights = ', '.join(str(w) for w in RANK_WEIGHTS)
+    rank = RawSQL(
+        f'(SELECT bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} '
+        f'WHERE {SEARCH_TABLE} MATCH %s AND rowid = "{table}"."id")',
+        (query,), output_field=FloatField(),
+    )
+    return queryset.alias(_search_rank=rank).order_by(F('_search_rank').asc(nulls_last=True), 'pid')
@@ -9,6 +9,21 @@ Seed data includes:
   - 12 curated drone model build recipes (5", 6", 7", 10" builds)
   - 3 detailed build guides with expert assembly instructions
 
+Rows are written with bulk_create in batches of BATCH_SIZE; the schema file
+is parsed once per seed and the per-category seed files are read by a small
+thread pool. bulk_create skips model signals, so the facet index is written
+here per batch and the compatibility index once all components exist (FTS
+rows come from the table triggers); the catalogue version is bumped once
+by catalogue_writes(). seed_golden() returns per-phase timings alongside
+its counts.
+
+A wiping seed_golden() (every reset) does not write from JSON at all: it
+builds the golden catalogue into a content-hashed shadow database file once
+(seed_snapshot.py), outside any transaction on the live database, then swaps
+it in with one short transaction that wipes the catalogue tables and copies
+the snapshot rows. Concurrent readers are served the old catalogue until
+that transaction commits.
+
 Used by:
   - management command: reset_to_golden
   - API view: ResetToGoldenView
@@ -16,13 +31,21 @@ Used by:
 """
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from django.conf import settings
-from django.db import transaction
-
+from django.db import connections, router, transaction
+
+from components.catalogue import catalogue_writes
+from components.compat import Part
+from components.compat_index import index_rows, rebuild_compat_index
+from components.facets import facet_rows, index_components
+from components.normalize import COLUMNS, normalize, project_components, projection_rows
+from components.seed_snapshot import restore_snapshot, seed_hash, snapshot_exists, write_snapshot
 from components.models import (
-    Category, Component, DroneModel,
+    Category, Component, ComponentCompat, ComponentFacet, CompatConflict, CompatKey, DroneModel,
     BuildGuide, BuildGuideStep,
 )
 
@@ -40,43 +63,48 @@ SCHEMA_PATH = os.path.join(settings.BASE_DIR, 'drone_parts_schema_v3.json')
 SEED_DRONE_MODELS_PATH = os.path.join(SEED_DIR, 'drone_models.json')
 SEED_BUILD_GUIDES_PATH = os.path.join(SEED_DIR, 'build_guides.json')
 
+BATCH_SIZE = 500
+LOAD_WORKERS = 4
 
-def _load_schema_categories():
-    """Return list of category slugs from the schema file."""
+
+def _load_schema():
+    """Parse the schema file once. Returns {} if it is missing."""
     if not os.path.exists(SCHEMA_PATH):
-        return []
+        return {}
     with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        schema = json.load(f)
-    return list(schema.get('components', {}).keys())
+        return json.load(f)
+
+
+def _load_json_list(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else []
+
+
+def _seed_input_paths():
+    """Every file the golden seed is built from."""
+    paths = [str(p) for p in Path(SEED_DIR).glob('*.json')] if os.path.isdir(SEED_DIR) else []
+    if os.path.exists(SCHEMA_PATH):
+        paths.append(SCHEMA_PATH)
+    return paths
 
 
 def _load_seed_parts():
     """Load all parts from the golden seed directory. Returns list of dicts.
-    Skips drone_models.json and build_guides.json (handled separately)."""
+    Skips drone_models.json and build_guides.json (handled separately).
+    Files are read in parallel; parts keep sorted file order."""
     parts = []
     seed_path = Path(SEED_DIR)
     if not seed_path.is_dir():
         return parts
     skip_files = {'drone_models.json', 'build_guides.json'}
-    for json_file in sorted(seed_path.glob('*.json')):
-        if json_file.name in skip_files:
-            continue
-        with open(json_file, 'r', encoding='utf-8') as f:
-            file_parts = json.load(f)
-        if isinstance(file_parts, list):
+    files = [f for f in sorted(seed_path.glob('*.json')) if f.name not in skip_files]
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        for file_parts in pool.map(_load_json_list, files):
             parts.extend(file_parts)
     return parts
 
 
-def _load_drone_models():
-    """Load golden drone models from the schema file."""
-    if not os.path.exists(SCHEMA_PATH):
-        return []
-    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        schema = json.load(f)
-    return schema.get('drone_models', [])
-
-
 def _load_seed_drone_models():
     """Load curated drone models from the seed directory."""
     if not os.path.exists(SEED_DRONE_MODELS_PATH):
@@ -93,12 +121,12 @@ def _load_seed_build_guides():
         return json.load(f)
 
 
-def _create_drone_model(model_data):
-    """Create a single DroneModel from seed data dict. Returns the model or None."""
+def _build_drone_model(model_data):
+    """Unsaved DroneModel from seed data dict, or None without a pid."""
     pid = model_data.get('pid')
     if not pid:
         return None
-    return DroneModel.objects.create(
+    return DroneModel(
         pid=pid,
         name=model_data.get('name', ''),
         description=model_data.get('description', ''),
@@ -110,103 +138,52 @@ def _create_drone_model(model_data):
     )
 
 
-@transaction.atomic
-def seed_golden(wipe=True):
-    """
-    Seed the database with golden parts data.
+def _build_component(part, category):
+    """Unsaved Component from a seed part, normalized."""
+    schema_data = {k: v for k, v in part.items() if k not in CORE_KEYS}
+    return Component(
+        pid=part['pid'],
+        category=category,
+        name=part.get('name', ''),
+        manufacturer=part.get('manufacturer', 'Unknown'),
+        description=part.get('description', ''),
+        link=part.get('link', ''),
+        image_file=part.get('image_file', ''),
+        manual_link=part.get('manual_link', ''),
+        approx_price=part.get('approx_price', ''),
+        schema_data=schema_data,
+        compat_values=normalize(category.slug, schema_data),
+    )
 
-    Args:
-        wipe: If True, delete all existing components/models/categories first.
 
-    Returns:
-        dict with counts: deleted_components, deleted_models,
-                          categories, components, drone_models,
-                          build_guides
+def _bulk_create_components(components):
     """
-    result = {
-        'deleted_components': 0,
-        'deleted_models': 0,
-        'categories': 0,
-        'components': 0,
-        'drone_models': 0,
-        'build_guides': 0,
-    }
+    bulk_create in batches, projecting compat values and indexing facets
+    for each batch, then rebuild the compatibility index. Returns the count.
+    """
+    for start in range(0, len(components), BATCH_SIZE):
+        batch = Component.objects.bulk_create(components[start:start + BATCH_SIZE])
+        project_components(batch)
+        index_components(batch)
+    rebuild_compat_index()
+    return len(components)
 
-    if wipe:
-        result['deleted_components'] = Component.objects.count()
-        result['deleted_models'] = DroneModel.objects.count()
-        # Delete build guides first (steps cascade via FK)
-        BuildGuide.objects.all().delete()
-        Component.objects.all().delete()
-        DroneModel.objects.all().delete()
-        Category.objects.all().delete()
-
-    # 1. Create all categories from schema (ensures full category list in UI)
-    category_slugs = _load_schema_categories()
-    category_map = {}
-    for slug in category_slugs:
-        cat, _ = Category.objects.get_or_create(
-            slug=slug,
-            defaults={'name': slug.replace('_', ' ').title()},
-        )
-        category_map[slug] = cat
-
-    # 2. Load seed parts and create components
-    seed_parts = _load_seed_parts()
-    components_created = 0
-    for part in seed_parts:
-        pid = part.get('pid')
-        cat_slug = part.get('category')
-        if not pid or not cat_slug:
-            continue
 
-        # Create category on-the-fly if seed file references one not in schema
-        if cat_slug not in category_map:
-            cat, _ = Category.objects.get_or_create(
-                slug=cat_slug,
-                defaults={'name': cat_slug.replace('_', ' ').title()},
-            )
-            category_map[cat_slug] = cat
+def _bulk_create_drone_models(models_data):
+    models = [m for m in map(_build_drone_model, models_data) if m is not None]
+    DroneModel.objects.bulk_create(models, batch_size=BATCH_SIZE)
+    return len(models)
 
-        schema_data = {k: v for k, v in part.items() if k not in CORE_KEYS}
 
-        Component.objects.create(
-            pid=pid,
-            category=category_map[cat_slug],
-            name=part.get('name', ''),
-            manufacturer=part.get('manufacturer', 'Unknown'),
-            description=part.get('description', ''),
-            link=part.get('link', ''),
-            image_file=part.get('image_file', ''),
-            manual_link=part.get('manual_link', ''),
-            approx_price=part.get('approx_price', ''),
-            schema_data=schema_data,
-        )
-        components_created += 1
-
-    # 3. Seed drone models from schema + seed file
-    models_created = 0
-    # Schema models first (example models)
-    for model_data in _load_drone_models():
-        if _create_drone_model(model_data):
-            models_created += 1
-    # Golden seed models (curated real builds)
-    for model_data in _load_seed_drone_models():
-        if _create_drone_model(model_data):
-            models_created += 1
-
-    # 4. Seed build guides from seed file
-    guides_created = 0
-    drone_model_map = {m.pid: m for m in DroneModel.objects.all()}
-    for guide_data in _load_seed_build_guides():
+def _build_guides(guides_data, drone_model_map):
+    """Unsaved build guides and their steps; drone model FKs resolved by PID."""
+    guides = []
+    steps = []
+    for guide_data in guides_data:
         pid = guide_data.get('pid')
         if not pid:
             continue
-
-        # Resolve drone model FK by PID
-        drone_model = drone_model_map.get(guide_data.get('drone_model_pid'))
-
-        guide = BuildGuide.objects.create(
+        guide = BuildGuide(
             pid=pid,
             name=guide_data.get('name', ''),
             description=guide_data.get('description', ''),
@@ -214,14 +191,13 @@ def seed_golden(wipe=True):
             estimated_time_minutes=guide_data.get('estimated_time_minutes', 60),
             drone_class=guide_data.get('drone_class', ''),
             thumbnail=guide_data.get('thumbnail', ''),
-            drone_model=drone_model,
+            drone_model=drone_model_map.get(guide_data.get('drone_model_pid')),
             required_tools=guide_data.get('required_tools', []),
             settings=guide_data.get('settings', {}),
         )
-
-        # Create steps for this guide
+        guides.append(guide)
         for step_data in guide_data.get('steps', []):
-            BuildGuideStep.objects.create(
+            steps.append(BuildGuideStep(
                 guide=guide,
                 order=step_data.get('order', 0),
                 title=step_data.get('title', 'Untitled'),
@@ -233,27 +209,228 @@ def seed_golden(wipe=True):
                 step_type=step_data.get('step_type', 'assembly'),
                 estimated_time_minutes=step_data.get('estimated_time_minutes', 5),
                 required_components=step_data.get('required_components', []),
-            )
+            ))
+    return guides, steps
+
+
+def _bulk_create_guides(guides_data):
+    """Create build guides and all their steps with two bulk inserts."""
+    guides, steps = _build_guides(guides_data, {m.pid: m for m in DroneModel.objects.all()})
+    BuildGuide.objects.bulk_create(guides)
+    BuildGuideStep.objects.bulk_create(steps, batch_size=BATCH_SIZE)
+    return len(guides)
+
+
+def _new_category(slug):
+    return Category(slug=slug, name=slug.replace('_', ' ').title())
+
+
+def _ensure_categories(slugs):
+    """{slug: Category} for the given slugs, creating missing ones in one insert."""
+    category_map = {c.slug: c for c in Category.objects.filter(slug__in=set(slugs))}
+    missing = [_new_category(slug) for slug in dict.fromkeys(slugs) if slug not in category_map]
+    for cat in Category.objects.bulk_create(missing):
+        category_map[cat.slug] = cat
+    return category_map
+
+
+def _wipe_catalogue():
+    """Delete build guides, components, drone models and categories."""
+    # Delete build guides first (steps cascade via FK)
+    BuildGuide.objects.all().delete()
+    # Components have post_delete receivers, which make the ORM load and
+    # delete them one by one. Those receivers only bump the catalogue
+    # version (deferred here), and facet, compat value and compatibility
+    # rows are the only rows pointing at components, so clear the tables
+    # with one DELETE each.
+    ComponentCompat.objects.all().delete()
+    ComponentFacet.objects.all().delete()
+    CompatKey.objects.all().delete()
+    CompatConflict.objects.all().delete()
+    connection = connections[router.db_for_write(Component)]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(Component._meta.db_table)}')
+    DroneModel.objects.all().delete()
+    Category.objects.all().delete()
+
+
+class _Timer:
+    """Collects elapsed seconds per named phase."""
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.timings[phase] = round(now - self._last, 3)
+        self._last = now
+
+
+def _golden_objects():
+    """
+    The golden catalogue as unsaved instances with explicit pks, by model
+    (the same rows _seed_from_json() writes, facet, compat value and
+    compatibility rows included).
+    """
+    schema = _load_schema()
+    seed_parts = [p for p in _load_seed_parts() if p.get('pid') and p.get('category')]
+
+    # FK columns are copied from the related object when an instance is
+    # built, so each model gets its pks before anything referencing it
+    slugs = dict.fromkeys(list(schema.get('components', {})) + [p['category'] for p in seed_parts])
+    categories = {slug: _new_category(slug) for slug in slugs}
+    for pk, category in enumerate(categories.values(), 1):
+        category.pk = pk
+    components = [_build_component(part, categories[part['category']]) for part in seed_parts]
+    drone_models = [m for m in map(_build_drone_model, schema.get('drone_models', []) + _load_seed_drone_models()) if m]
+    for objects in (components, drone_models):
+        for pk, obj in enumerate(objects, 1):
+            obj.pk = pk
+    compat_rows = [
+        ComponentCompat(pk=pk, component_id=row[0], category_id=row[1], role=row[2], **dict(zip(COLUMNS, row[3:])))
+        for pk, row in enumerate((row for c in components
+                                  for row in projection_rows(c.pk, c.category.pk, c.compat_values)), 1)
+    ]
+    facets = [
+        ComponentFacet(pk=pk, component_id=row[0], category_id=row[1], path=row[2], value=row[3], number=row[4])
+        for pk, row in enumerate((row for c in components for row in facet_rows(c, c.category)), 1)
+    ]
+    key_rows, conflicts = index_rows((c.pk, Part(c.pid, c.category.slug, c.schema_data, c.compat_values))
+                                     for c in components)
+    compat_keys = [
+        CompatKey(pk=pk, component_id=row[0], code=row[1], side=row[2], key=row[3])
+        for pk, row in enumerate(key_rows, 1)
+    ]
+    compat_conflicts = [
+        CompatConflict(pk=pk, code=row[0], left_key=row[1], right_key=row[2], severity=row[3])
+        for pk, row in enumerate(conflicts, 1)
+    ]
+    guides, steps = _build_guides(_load_seed_build_guides(), {m.pid: m for m in drone_models})
+    for pk, guide in enumerate(guides, 1):
+        guide.pk = pk
+    for pk, step in enumerate(steps, 1):
+        step.pk = pk
+        step.guide_id = step.guide.pk  # guide had no pk when the step was built
+
+    return {
+        Category: list(categories.values()),
+        Component: components,
+        ComponentCompat: compat_rows,
+        ComponentFacet: facets,
+        CompatKey: compat_keys,
+        CompatConflict: compat_conflicts,
+        DroneModel: drone_models,
+        BuildGuide: guides,
+        BuildGuideStep: steps,
+    }
+
+
+def seed_golden(wipe=True, use_snapshot=True):
+    """
+    Seed the database with golden parts data.
+
+    Args:
+        wipe: If True, delete all existing components/models/categories first.
+        use_snapshot: With wipe, build the catalogue in the shadow snapshot
+            and swap it in (the default) instead of writing from JSON.
+
+    Returns:
+        dict with counts: deleted_components, deleted_models,
+                          categories, components, drone_models,
+                          build_guides
+        and timings: {phase: seconds}
+    """
+    if not (wipe and use_snapshot):
+        return _seed_from_json(wipe)
+    timer = _Timer()
+    content_hash = seed_hash(_seed_input_paths())
+    if not snapshot_exists(content_hash):
+        write_snapshot(content_hash, _golden_objects())
+    timer.mark('snapshot')
+    return _swap_in_snapshot(content_hash, timer)
 
-        guides_created += 1
+
+@transaction.atomic
+@catalogue_writes()
+def _swap_in_snapshot(content_hash, timer):
+    """Replace the catalogue with the snapshot rows in one transaction."""
+    result = {
+        'deleted_components': Component.objects.count(),
+        'deleted_models': DroneModel.objects.count(),
+    }
+    _wipe_catalogue()
+    timer.mark('wipe')
+    counts = restore_snapshot(content_hash)
+    if counts is None:
+        # Removed by a concurrent reset with newer seed files; rebuild it
+        write_snapshot(content_hash, _golden_objects())
+        counts = restore_snapshot(content_hash)
+    timer.mark('restore')
+    result['categories'] = counts[Category._meta.db_table]
+    result['components'] = counts[Component._meta.db_table]
+    result['drone_models'] = counts[DroneModel._meta.db_table]
+    result['build_guides'] = counts[BuildGuide._meta.db_table]
+    result['timings'] = timer.timings
+    return result
+
+
+@transaction.atomic
+@catalogue_writes()
+def _seed_from_json(wipe):
+    """Write the golden catalogue from the seed JSON with bulk inserts."""
+    timer = _Timer()
+    result = {
+        'deleted_components': 0,
+        'deleted_models': 0,
+        'categories': 0,
+        'components': 0,
+        'drone_models': 0,
+        'build_guides': 0,
+    }
+
+    if wipe:
+        result['deleted_components'] = Component.objects.count()
+        result['deleted_models'] = DroneModel.objects.count()
+        _wipe_catalogue()
+    timer.mark('wipe')
+
+    schema = _load_schema()
+    seed_parts = [p for p in _load_seed_parts() if p.get('pid') and p.get('category')]
+    seed_drone_models = _load_seed_drone_models()
+    seed_guides = _load_seed_build_guides()
+    timer.mark('load')
+
+    # 1. Create all categories from schema (ensures full category list in UI),
+    #    plus any a seed file references that is not in the schema
+    category_map = _ensure_categories(
+        list(schema.get('components', {})) + [p['category'] for p in seed_parts])
+    timer.mark('categories')
+
+    # 2. Create components
+    components_created = _bulk_create_components(
+        [_build_component(part, category_map[part['category']]) for part in seed_parts])
+    timer.mark('components')
+
+    # 3. Seed drone models: schema models first (example models), then
+    #    golden seed models (curated real builds)
+    models_created = _bulk_create_drone_models(schema.get('drone_models', []) + seed_drone_models)
+    timer.mark('drone_models')
+
+    # 4. Seed build guides and their steps
+    guides_created = _bulk_create_guides(seed_guides)
+    timer.mark('build_guides')
 
     result['categories'] = Category.objects.count()
     result['components'] = components_created
     result['drone_models'] = models_created
     result['build_guides'] = guides_created
+    result['timings'] = timer.timings
     return result
 
 
-def _load_schema_components():
-    """Load the single-example components from the schema file."""
-    if not os.path.exists(SCHEMA_PATH):
-        return {}
-    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        schema = json.load(f)
-    return schema.get('components', {})
-
-
 @transaction.atomic
+@catalogue_writes()
 def seed_examples():
     """
     Wipe and re-seed from the single-example entries in drone_parts_schema_v3.json.
@@ -271,41 +448,17 @@ def seed_examples():
         'build_guides': 0,
     }
 
-    BuildGuide.objects.all().delete()
-    Component.objects.all().delete()
-    DroneModel.objects.all().delete()
-    Category.objects.all().delete()
-
-    schema_components = _load_schema_components()
-    components_created = 0
-    for cat_slug, items in schema_components.items():
-        category = Category.objects.create(
-            name=cat_slug.replace('_', ' ').title(),
-            slug=cat_slug,
-        )
-        for item in items:
-            pid = item.get('pid')
-            if not pid:
-                continue
-            schema_data = {k: v for k, v in item.items() if k not in CORE_KEYS}
-            Component.objects.create(
-                pid=pid,
-                category=category,
-                name=item.get('name', ''),
-                manufacturer=item.get('manufacturer', 'Unknown'),
-                description=item.get('description', ''),
-                link=item.get('link', ''),
-                image_file=item.get('image_file', ''),
-                manual_link=item.get('manual_link', ''),
-                approx_price=item.get('approx_price', ''),
-                schema_data=schema_data,
-            )
-            components_created += 1
-
-    models_created = 0
-    for model_data in _load_drone_models():
-        if _create_drone_model(model_data):
-            models_created += 1
+    _wipe_catalogue()
+
+    schema = _load_schema()
+    schema_components = schema.get('components', {})
+    category_map = _ensure_categories(list(schema_components))
+    components_created = _bulk_create_components([
+        _build_component(item, category_map[cat_slug])
+        for cat_slug, items in schema_components.items()
+        for item in items if item.get('pid')
+    ])
+    models_created = _bulk_create_drone_models(schema.get('drone_models', []))
 
     result['categories'] = Category.objects.count()
     result['components'] = components_created
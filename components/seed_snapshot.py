@@ -0,0 +1,185 @@
+"""
+seed_snapshot.py — Prebuilt row snapshot of the golden seed (shadow database).
+
+The golden catalogue is built once per set of inputs into a separate SQLite
+file, SEED_SNAPSHOT_DIR/seed-<hash>.sqlite3, straight from the seed JSON:
+rows get explicit primary keys and are converted to database values the
+way Model.save() would, without touching the live database. A reset then
+swaps the catalogue in with one short transaction (seed.seed_golden): wipe
+the live tables and copy the snapshot rows in with multi-row INSERT
+statements. Readers keep seeing the old catalogue until that commit (in
+WAL mode, settings.SQLITE_JOURNAL_MODE; otherwise they wait for it), and
+the JSON is never parsed while the write lock is held.
+
+The hash covers everything the rows depend on:
+  - the bytes of every seed file and of the schema file,
+  - the column list of each snapshotted table (a migration invalidates it),
+  - the sources of the modules that build the rows: seed.py (components,
+    drone models, guides), facets.py (definitions and facet_rows), and the
+    compatibility engine (compat.py, compat_index.py, normalize.py, from
+    which compat_values, ComponentCompat, CompatKey and CompatConflict
+    rows are derived),
+  - SNAPSHOT_FORMAT (bump it for a change outside those modules, such as
+    a helper they import, that alters the rows).
+so stale snapshots are not restored; they are removed when a new one is
+written. The FTS index is filled by its triggers during the copy.
+
+auto_now / auto_now_add columns (guide created_at / updated_at) are set to
+the time of the restore, not the time the snapshot was built.
+
+Used by: seed.seed_golden.
+"""
+import hashlib
+import os
+import sqlite3
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connections, router
+from django.utils import timezone
+
+
+SNAPSHOT_FORMAT = 1
+FILE_PREFIX = 'seed-'
+FETCH_SIZE = 5000
+
+
+def snapshot_models():
+    """Seeded models in insert (foreign key) order."""
+    from components.models import (
+        Category, Component, ComponentCompat, ComponentFacet, CompatKey, CompatConflict, DroneModel,
+        BuildGuide, BuildGuideStep,
+    )
+    return [Category, Component, ComponentCompat, ComponentFacet, CompatKey, CompatConflict, DroneModel,
+            BuildGuide, BuildGuideStep]
+
+
+def snapshot_dir():
+    return str(getattr(settings, 'SEED_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'seed_snapshots')))
+
+
+def snapshot_path(content_hash):
+    return os.path.join(snapshot_dir(), f'{FILE_PREFIX}{content_hash}.sqlite3')
+
+
+def _columns(model):
+    return [f.column for f in model._meta.concrete_fields]
+
+
+def seed_hash(paths):
+    """Hash of the seed input files plus the table layout and the modules that build the rows."""
+    from components import compat, compat_index, facets, normalize, seed
+    from components.facets import COMMON_FACETS, FACET_FIELDS
+    digest = hashlib.sha256(f'format {SNAPSHOT_FORMAT}\n'.encode())
+    for path in sorted(paths):
+        digest.update(f'{os.path.basename(path)}\n'.encode())
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    for model in snapshot_models():
+        digest.update(f'{model._meta.db_table}:{",".join(_columns(model))}\n'.encode())
+    digest.update(repr((COMMON_FACETS, sorted(FACET_FIELDS.items()))).encode())
+    for module in (seed, facets, compat, compat_index, normalize):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+# ── Write ───────────────────────────────────────────────────
+
+def snapshot_exists(content_hash):
+    return os.path.exists(snapshot_path(content_hash))
+
+
+def write_snapshot(content_hash, objects):
+    """
+    Write a snapshot from {model: unsaved instances with pks set}; covers
+    every model in snapshot_models(). Drops older snapshots.
+    """
+    os.makedirs(snapshot_dir(), exist_ok=True)
+    path = snapshot_path(content_hash)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    connection = connections[router.db_for_write(snapshot_models()[0])]
+    quote = connection.ops.quote_name
+    try:
+        target = sqlite3.connect(tmp)
+        try:
+            for model in snapshot_models():
+                table = model._meta.db_table
+                fields = model._meta.concrete_fields
+                target.execute(f'CREATE TABLE {quote(table)} ({", ".join(quote(f.column) for f in fields)})')
+                target.executemany(
+                    f'INSERT INTO {quote(table)} VALUES ({", ".join(["?"] * len(fields))})',
+                    ([f.get_db_prep_save(f.pre_save(obj, True), connection) for f in fields]
+                     for obj in objects.get(model, [])),
+                )
+            target.commit()
+        finally:
+            target.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    _cleanup(content_hash)
+    return path
+
+
+def _cleanup(keep_hash):
+    keep = os.path.basename(snapshot_path(keep_hash))
+    for name in os.listdir(snapshot_dir()):
+        if name.startswith(FILE_PREFIX) and name != keep:
+            try:
+                os.unlink(os.path.join(snapshot_dir(), name))
+            except OSError:
+                pass
+
+
+# ── Restore ─────────────────────────────────────────────────
+
+def restore_snapshot(content_hash):
+    """
+    Insert the snapshot rows into the (empty) seeded tables. Returns
+    {db_table: row count}, or None when no snapshot exists for the hash.
+    """
+    path = snapshot_path(content_hash)
+    if not os.path.exists(path):
+        return None
+    models = snapshot_models()
+    connection = connections[router.db_for_write(models[0])]
+    quote = connection.ops.quote_name
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    counts = {}
+    source = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        with connection.cursor() as cursor:
+            for model in models:
+                table = model._meta.db_table
+                fields = model._meta.concrete_fields
+                columns = ', '.join(quote(f.column) for f in fields)
+                placeholders = f'({", ".join(["%s"] * len(fields))})'
+                rows = source.execute(f'SELECT {columns} FROM {quote(table)}')
+                # Timestamps Model.save() would set are stamped with the restore time
+                stamped = [i for i, f in enumerate(fields)
+                           if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+                counts[table] = 0
+                # Multi-row INSERTs: per-statement trigger and index upkeep
+                # makes executemany about 3x slower for components
+                batch_size = connection.ops.bulk_batch_size(fields, [None] * FETCH_SIZE)
+                while True:
+                    batch = rows.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    if stamped:
+                        batch = [tuple(now if i in stamped else value for i, value in enumerate(row))
+                                 for row in batch]
+                    cursor.execute(
+                        f'INSERT INTO {quote(table)} ({columns}) VALUES {", ".join([placeholders] * len(batch))}',
+                        [value for row in batch for value in row],
+                    )
+                    counts[table] += len(batch)
+            # Explicit pks were inserted; let sequences catch up (no-op on SQLite)
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+    finally:
+        source.close()
+    return counts
@@ -7,12 +7,38 @@ annotate(count=Count('components')) applied (done in CategoryViewSet).
 
 from django.db import transaction
 from rest_framework import serializers
-from .models import Category, Component, DroneModel, BuildGuide, BuildGuideStep, BuildSession, StepPhoto
+from .models import (
+    Category, Component, DroneModel, BuildGuide, BuildGuideStep, BuildSession, StepPhoto, ImportJob,
+)
+from .projection import project_json
+
+
+class SparseFieldsetMixin:
+    """
+    Honours the 'sparse_fields' / 'json_projection' context set by
+    projection.SparseFieldsMixin. Unrequested fields are dropped before
+    representation so deferred columns are never touched.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        sparse = self.context.get('sparse_fields')
+        projection = self.context.get('json_projection') or {}
+        for name in list(fields):
+            if name in projection or (sparse is not None and name not in sparse):
+                fields.pop(name)
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        for column, paths in (self.context.get('json_projection') or {}).items():
+            data[column] = project_json(instance, column, paths)
+        return data
 
 
 # ── Core Model Serializers ──────────────────────────────────
 
-class ComponentSerializer(serializers.ModelSerializer):
+class ComponentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     # Allow writing components by category slug
     category = serializers.SlugRelatedField(slug_field='slug', queryset=Category.objects.all())
 
@@ -27,7 +53,7 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ['slug', 'name', 'count']
 
-class DroneModelSerializer(serializers.ModelSerializer):
+class DroneModelSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = DroneModel
         fields = ['pid', 'name', 'description', 'image_file', 'pdf_file', 'vehicle_type', 'build_class', 'relations']
@@ -135,7 +161,7 @@ class StepPhotoSerializer(serializers.ModelSerializer):
         return obj.image.url if obj.image else None
 
 
-class BuildSessionSerializer(serializers.ModelSerializer):
+class BuildSessionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     photos = StepPhotoSerializer(many=True, read_only=True)
     guide = serializers.SlugRelatedField(slug_field='pid', queryset=BuildGuide.objects.all())
 
@@ -148,3 +174,24 @@ class BuildSessionSerializer(serializers.ModelSerializer):
             'step_timing', 'guide_snapshot', 'component_snapshot',
         ]
         read_only_fields = ['serial_number', 'started_at', 'guide_snapshot', 'component_snapshot']
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'status', 'format', 'progress', 'bytes_total', 'bytes_processed',
+            'created_count', 'updated_count', 'error_count', 'errors', 'message',
+            'submitted_at', 'started_at', 'finished_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """Fraction of the payload processed (0.0–1.0)."""
+        if obj.status == 'succeeded':
+            return 1.0
+        if not obj.bytes_total:
+            return 0.0
+        return round(obj.bytes_processed / obj.bytes_total, 4)
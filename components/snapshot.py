@@ -0,0 +1,197 @@
+"""
+snapshot.py — Precompressed whole-catalogue snapshot.
+
+  GET /api/catalogue/snapshot/           current snapshot (ETag = content hash)
+  GET /api/catalogue/snapshot/<hash>/    a specific snapshot, cached as immutable
+
+The snapshot is one JSON document:
+  { "version": N, "categories": [...], "components": [...], "drone_models": [...] }
+serialized with the same serializers as the list endpoints. It is built
+lazily on the first request after the catalogue version changes (see
+catalogue.py), written to CATALOGUE_SNAPSHOT_DIR as
+catalogue-<sha256 prefix>.json plus .json.gz and, when the optional
+`brotli` package is installed, .json.br. Requests are served straight
+from those files with the best encoding the client accepts. The previous
+snapshot is kept until the next one replaces it, so a client that just
+read its hash can still fetch it; older ones are deleted.
+
+Used by: views.CatalogueSnapshotView.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db.models import Count
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are produced
+    brotli = None
+
+
+FILE_PREFIX = 'catalogue-'
+POINTER_FILE = 'current.json'
+HASH_LENGTH = 16
+HASH_RE = re.compile(r'^[0-9a-f]{%d}$' % HASH_LENGTH)
+
+# Content-Encoding → file suffix, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+_build_lock = threading.Lock()
+_memo = {'version': None, 'hash': None}
+
+
+def snapshot_dir():
+    return str(getattr(settings, 'CATALOGUE_SNAPSHOT_DIR', os.path.join(settings.BASE_DIR, 'snapshots')))
+
+
+def snapshot_path(content_hash, suffix=''):
+    return os.path.join(snapshot_dir(), f'{FILE_PREFIX}{content_hash}.json{suffix}')
+
+
+def available_encodings():
+    return [(name, suffix) for name, suffix in ENCODINGS if name != 'br' or brotli is not None]
+
+
+# ── Build ───────────────────────────────────────────────────
+
+def render_catalogue(version):
+    """Serialize the whole catalogue to compact JSON bytes."""
+    from components.models import Category, Component, DroneModel
+    from components.serializers import CategorySerializer, ComponentSerializer, DroneModelSerializer
+
+    categories = Category.objects.annotate(count=Count('components')).order_by('name')
+    components = Component.objects.select_related('category').order_by('category__slug', 'pid')
+    drone_models = DroneModel.objects.order_by('pid')
+    document = {
+        'version': version,
+        'categories': CategorySerializer(categories, many=True).data,
+        'components': ComponentSerializer(components, many=True).data,
+        'drone_models': DroneModelSerializer(drone_models, many=True).data,
+    }
+    return json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _write_atomic(path, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _cleanup(keep_hashes):
+    directory = snapshot_dir()
+    keep = tuple(f'{FILE_PREFIX}{content_hash}.' for content_hash in keep_hashes if content_hash)
+    for name in os.listdir(directory):
+        if name.startswith(FILE_PREFIX) and not name.startswith(keep):
+            try:
+                os.unlink(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def build_snapshot(version):
+    """Render, hash, compress and store the snapshot. Returns its hash."""
+    os.makedirs(snapshot_dir(), exist_ok=True)
+    data = render_catalogue(version)
+    content_hash = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    if not os.path.exists(snapshot_path(content_hash)):
+        _write_atomic(snapshot_path(content_hash, '.gz'), gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write_atomic(snapshot_path(content_hash, '.br'), brotli.compress(data, quality=11))
+        # The plain file goes last: its presence marks a complete set
+        _write_atomic(snapshot_path(content_hash), data)
+    _, previous_hash = _read_pointer()
+    pointer = json.dumps({'version': version, 'hash': content_hash}).encode()
+    _write_atomic(os.path.join(snapshot_dir(), POINTER_FILE), pointer)
+    _cleanup([content_hash, previous_hash])
+    return content_hash
+
+
+def _read_pointer():
+    try:
+        with open(os.path.join(snapshot_dir(), POINTER_FILE), 'rb') as f:
+            pointer = json.loads(f.read())
+        return pointer.get('version'), pointer.get('hash')
+    except (OSError, ValueError):
+        return None, None
+
+
+def current_snapshot():
+    """Hash of the snapshot for the current catalogue version, building it if stale."""
+    from components.catalogue import get_version
+    version = get_version()
+    if _memo['version'] == version and os.path.exists(snapshot_path(_memo['hash'])):
+        return _memo['hash']
+    with _build_lock:
+        pointer_version, content_hash = _read_pointer()
+        if pointer_version != version or not content_hash or not os.path.exists(snapshot_path(content_hash)):
+            content_hash = build_snapshot(version)
+        _memo.update(version=version, hash=content_hash)
+        return content_hash
+
+
+# ── Serving ─────────────────────────────────────────────────
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header with q > 0."""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def pick_variant(content_hash, accept_encoding):
+    """(path, content_encoding or None) of the best stored variant for a request."""
+    accepted = accepted_encodings(accept_encoding)
+    for name, suffix in available_encodings():
+        path = snapshot_path(content_hash, suffix)
+        if (name in accepted or '*' in accepted) and os.path.exists(path):
+            return path, name
+    return snapshot_path(content_hash), None
+
+
+def serve_snapshot(request, content_hash, cache_control):
+    """
+    FileResponse for the best variant; 304 when If-None-Match matches.
+    Raises FileNotFoundError if the snapshot was deleted meanwhile.
+    """
+    path, encoding = pick_variant(content_hash, request.META.get('HTTP_ACCEPT_ENCODING'))
+    etag = f'"{content_hash}-{encoding}"' if encoding else f'"{content_hash}"'
+    headers = {
+        'ETag': etag,
+        'Vary': 'Accept-Encoding',
+        'Cache-Control': cache_control,
+        'Content-Location': f'/api/catalogue/snapshot/{content_hash}/',
+    }
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(path, 'rb'), content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    for key, value in headers.items():
+        response[key] = value
+    return response
@@ -0,0 +1,505 @@
+"""
+solver.py — Whole-build search over the compatibility index.
+
+  POST /api/builds/solve/
+  Body: { "drone_class": "5inch", "budget": 400, "pinned": ["FRM-0042"],
+          "rank": "price", "max_results": 5 }
+
+The wizard fills its slots one at a time, so an early pick can leave no
+compatible battery or ESC further down. The solver searches every slot at
+once and returns the N cheapest (or lightest) builds with no compatibility
+warnings (or no errors, with allow_warnings).
+
+Each slot's domain is an int bitset over its candidates sorted by cost, so
+the lowest set bit is the cheapest part left. Candidates are filtered up
+front: frames by drone class (inferFrameClass() in wizard.js), parts by
+budget, a pinned slot down to its pinned part. For every pair of slots a
+check connects, each candidate gets the bitset of partners it may sit
+with, built from the CompatKey/CompatConflict index (compat_index.py).
+  - arc consistency prunes the domains before the search
+  - depth first, most constrained slot first, cheapest part first
+  - forward checking narrows the connected domains after every pick
+  - branch and bound: cost so far + the cheapest part left in every open
+    slot is compared against the budget and the N-th best build so far
+The FC/ESC pair is searched both as two parts and as one stack unless a
+pin decides it. The search stops at time_limit_ms or max_nodes and then
+returns the best builds found so far with complete=false.
+
+Price is read the way updateBuildTotals() reads it (first number in
+approx_price), weight from schema_data.weight_g; zero counts as unknown.
+A budget leaves out parts with no price unless pinned. Ranking counts a part with no value as worse
+than any known total, so fully priced (weighed) builds come first.
+
+Used by: views.BuildSolveView
+"""
+import heapq
+import json
+import re
+import time
+
+from components.compat import STACK_CATEGORY, compat_block, first, get_engine, summarize, to_float, to_int
+
+
+DRONE_CLASSES = ['micro', '3inch', '5inch', '7inch', 'heavy', 'all']
+RANKS = ['price', 'weight']
+
+# Wizard slots filled by default; a stack stands in for the FC + ESC pair
+DEFAULT_SLOTS = [
+    'frames', 'flight_controllers', 'escs', 'motors', 'propellers',
+    'video_transmitters', 'fpv_cameras', 'receivers', 'batteries',
+]
+STACK_PAIR = ('flight_controllers', 'escs')
+
+DEFAULT_RESULTS = 5
+MAX_RESULTS = 25
+DEFAULT_TIME_LIMIT_MS = 2000
+MAX_TIME_LIMIT_MS = 10000
+DEFAULT_MAX_NODES = 200000
+MAX_NODES = 2000000
+
+# Cost of a part with no price/weight: more than any catalogue total
+UNKNOWN_COST = 1e9
+
+
+# ── Values (build.js / wizard.js semantics) ─────────────────
+
+_PRICE_RE = re.compile(r'[\d.]+')
+
+
+def parse_price(approx_price):
+    """
+    updateBuildTotals() price: the first number in approx_price ('$24.99' →
+    24.99). Zero is a placeholder in the catalogue, so it counts as no price.
+    """
+    if isinstance(approx_price, (int, float)):
+        return to_float(approx_price)
+    match = _PRICE_RE.search(approx_price) if isinstance(approx_price, str) else None
+    return to_float(match.group(0)) if match else None
+
+
+def _size_class(value, limits):
+    for limit, drone_class in zip(limits, DRONE_CLASSES):
+        if value <= limit:
+            return drone_class
+    return 'heavy'
+
+
+_INCH_LIMITS = (2.5, 3.5, 5.5, 8)
+_MM_LIMITS = (100, 150, 250, 400)
+_INCH_NAME_RE = re.compile(r'\b(\d+(?:\.\d+)?)\s*(?:"|\'\'|inch|in)\b')
+_MM_NAME_RE = re.compile(r'\b(\d{2,3})mm\b')
+_CLASS_KEYWORDS = [
+    ('micro', re.compile(r'whoop|tiny|micro|1s|65mm|75mm')),
+    ('3inch', re.compile(r'toothpick|3\s*inch|cinewhoop')),
+    ('5inch', re.compile(r'freestyle|racing|5\s*inch|nazgul')),
+    ('7inch', re.compile(r'long\s*range|lr|7\s*inch|cine')),
+    ('heavy', re.compile(r'x-class|cinelifter|10\s*inch|heavy')),
+]
+
+
+def infer_frame_class(name, data):
+    """Port of inferFrameClass(): a frame's drone class, or 'unknown'."""
+    data = data if isinstance(data, dict) else {}
+    prop_max = to_float(compat_block(data).get('prop_size_max_in'))
+    if prop_max:
+        return _size_class(prop_max, _INCH_LIMITS)
+    wheelbase = to_float(first(data.get('wheelbase_mm'), compat_block(data).get('wheelbase_mm')))
+    if wheelbase:
+        return _size_class(wheelbase, _MM_LIMITS)
+
+    name = (name or '').lower()
+    match = _INCH_NAME_RE.search(name)
+    if match:
+        return _size_class(float(match.group(1)), _INCH_LIMITS)
+    match = _MM_NAME_RE.search(name)
+    if match:
+        return _size_class(to_int(match.group(1)), _MM_LIMITS)
+    for drone_class, pattern in _CLASS_KEYWORDS:
+        if pattern.search(name):
+            return drone_class
+    return 'unknown'
+
+
+def frame_matches_class(name, data, drone_class):
+    """Port of frameMatchesClass(): 'unknown' frames show in every class."""
+    if drone_class == 'all':
+        return True
+    return infer_frame_class(name, data) in (drone_class, 'unknown')
+
+
+# ── Request options ─────────────────────────────────────────
+
+def _bounded_int(data, key, default, maximum):
+    value = data.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"'{key}' must be a positive integer.")
+    return min(value, maximum)
+
+
+def parse_options(data):
+    """
+    Validate a solve request body into solve() keyword arguments.
+    Raises ValueError with a message for the response.
+    """
+    from components.models import Category, Component
+
+    drone_class = data.get('drone_class') or 'all'
+    if drone_class not in DRONE_CLASSES:
+        raise ValueError(f"Unknown drone_class '{drone_class}'. Use {', '.join(DRONE_CLASSES)}.")
+    rank = data.get('rank') or 'price'
+    if rank not in RANKS:
+        raise ValueError(f"Unknown rank '{rank}'. Use {', '.join(RANKS)}.")
+
+    budget = data.get('budget')
+    if budget not in (None, ''):
+        budget = parse_price(budget)
+        if budget is None or budget <= 0:
+            raise ValueError("'budget' must be a positive amount.")
+    else:
+        budget = None
+
+    slots = data.get('slots')
+    if slots is not None:
+        if not isinstance(slots, list) or not slots or not all(isinstance(s, str) for s in slots):
+            raise ValueError("'slots' must be a non-empty list of category slugs.")
+        known = set(Category.objects.filter(slug__in=slots).values_list('slug', flat=True))
+        unknown = [s for s in slots if s not in known]
+        if unknown:
+            raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+        slots = list(dict.fromkeys(slots))
+
+    # Pins: a list of PIDs or a {category: PID} mapping
+    pinned = data.get('pinned') or []
+    if isinstance(pinned, dict):
+        pinned = list(pinned.values())
+    if not isinstance(pinned, list) or not all(isinstance(p, str) for p in pinned):
+        raise ValueError("'pinned' must be a list of PIDs or a mapping of category to PID.")
+    found = dict(Component.objects.filter(pid__in=pinned).values_list('pid', 'category__slug'))
+    missing = sorted(set(pinned) - set(found))
+    if missing:
+        raise ValueError(f"Unknown PIDs: {', '.join(missing)}")
+    pins = {}
+    for pid in pinned:
+        if pins.setdefault(found[pid], pid) != pid:
+            raise ValueError(f"Only one part can be pinned per category ('{found[pid]}').")
+
+    return {
+        'drone_class': drone_class,
+        'budget': budget,
+        'pins': pins,
+        'rank': rank,
+        'slots': slots,
+        'allow_warnings': bool(data.get('allow_warnings', False)),
+        'max_results': _bounded_int(data, 'max_results', DEFAULT_RESULTS, MAX_RESULTS),
+        'time_limit_ms': _bounded_int(data, 'time_limit_ms', DEFAULT_TIME_LIMIT_MS, MAX_TIME_LIMIT_MS),
+        'max_nodes': _bounded_int(data, 'max_nodes', DEFAULT_MAX_NODES, MAX_NODES),
+    }
+
+
+# ── Search ──────────────────────────────────────────────────
+
+def _bits(mask):
+    """Set bit indexes of `mask`, lowest (cheapest) first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _lowest(mask):
+    return (mask & -mask).bit_length() - 1
+
+
+class _Stop(Exception):
+    pass
+
+
+class _Layout:
+    """One slot list with its candidate domains and pairwise allowed-partner bitsets."""
+
+    def __init__(self, slots, candidates, keys, opposite, cost):
+        self.slots = slots
+        self.candidates = candidates          # per slot: [candidate dict] sorted by cost
+        self.domains = [(1 << len(c)) - 1 for c in candidates]
+        self.costs = [[cost(c) for c in slot] for slot in candidates]
+        self.prices = [[c['price'] or 0 for c in slot] for slot in candidates]
+        self.by_price = [sorted(range(len(slot)), key=lambda i, slot=slot: slot[i]['price'] or 0)
+                         for slot in candidates]
+
+        holders = {}                          # (code, side, key) → {slot: bitset of candidates}
+        for s, slot_candidates in enumerate(candidates):
+            for i, candidate in enumerate(slot_candidates):
+                for key in keys.get(candidate['pk'], ()):
+                    held = holders.setdefault(key, {})
+                    held[s] = held.get(s, 0) | (1 << i)
+
+        # arcs[x] = [(y, [allowed bitset of y per candidate of x])]
+        self.arcs = [[] for _ in slots]
+        conflicting = {}                      # own key → {slot: bitset of candidates it conflicts with}
+        for key in holders:
+            masks = conflicting[key] = {}
+            for partner_key in opposite.get(key, ()):
+                for y, mask in holders.get(partner_key, {}).items():
+                    masks[y] = masks.get(y, 0) | mask
+        for x, slot_candidates in enumerate(candidates):
+            banned = {}
+            for i, candidate in enumerate(slot_candidates):
+                for key in keys.get(candidate['pk'], ()):
+                    for y, mask in conflicting[key].items():
+                        if y != x:
+                            row = banned.setdefault(y, [0] * len(slot_candidates))
+                            row[i] |= mask
+            for y, row in sorted(banned.items()):
+                self.arcs[x].append((y, [self.domains[y] & ~b for b in row]))
+
+    def min_cost(self, slot, mask):
+        return self.costs[slot][_lowest(mask)]
+
+    def min_price(self, slot, mask):
+        return next(self.prices[slot][i] for i in self.by_price[slot] if mask >> i & 1)
+
+    def propagate(self):
+        """Arc consistency: drop candidates with no allowed partner left in a connected slot."""
+        queue = [(x, y, table) for x in range(len(self.slots)) for y, table in self.arcs[x]]
+        while queue:
+            x, y, table = queue.pop()
+            domain, other = self.domains[x], self.domains[y]
+            revised = domain
+            for i in _bits(domain):
+                if not table[i] & other:
+                    revised &= ~(1 << i)
+            if revised != domain:
+                self.domains[x] = revised
+                if not revised:
+                    return False
+                queue.extend((z, x, t) for z in range(len(self.slots))
+                             for w, t in self.arcs[z] if w == x and z != y)
+        return all(self.domains)
+
+
+class BuildSolver:
+    """Branch-and-bound search for the top-N compatible builds."""
+
+    def __init__(self, drone_class='all', budget=None, pins=None, rank='price', slots=None,
+                 allow_warnings=False, max_results=DEFAULT_RESULTS,
+                 time_limit_ms=DEFAULT_TIME_LIMIT_MS, max_nodes=DEFAULT_MAX_NODES):
+        self.drone_class = drone_class
+        self.budget = budget
+        self.pins = pins or {}
+        self.rank = rank
+        self.requested_slots = slots
+        self.allow_warnings = allow_warnings
+        self.max_results = max_results
+        self.time_limit = time_limit_ms / 1000
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.best = []                        # heap of (-cost, -sequence, layout, picks)
+        self.sequence = 0
+
+    # ── Setup ───────────────────────────────────────────────
+
+    def layouts(self, populated):
+        """Slot lists to search: FC + ESC as two parts and/or as one stack."""
+        if self.requested_slots is not None:
+            slots = list(self.requested_slots)
+            return [slots + [c for c in self.pins if c not in slots]]
+        base = [s for s in DEFAULT_SLOTS if s in populated]
+        extra = [c for c in self.pins if c not in DEFAULT_SLOTS and c != STACK_CATEGORY]
+        separate = base + extra
+        stacked = [STACK_CATEGORY if s == STACK_PAIR[0] else s for s in DEFAULT_SLOTS
+                   if s == STACK_PAIR[0] or (s in base and s not in STACK_PAIR)] + extra
+        stack_pinned = STACK_CATEGORY in self.pins
+        pair_pinned = any(c in self.pins for c in STACK_PAIR)
+        if pair_pinned:
+            return [separate + ([STACK_CATEGORY] if stack_pinned else [])]
+        if stack_pinned:
+            return [stacked]
+        layouts = []
+        if any(c in populated for c in STACK_PAIR):
+            layouts.append(separate)
+        if STACK_CATEGORY in populated:
+            layouts.append(stacked)
+        return layouts or [separate]
+
+    def _cost(self, candidate):
+        value = candidate['price'] if self.rank == 'price' else candidate['weight_g']
+        return UNKNOWN_COST if value is None else value
+
+    def load(self, categories):
+        """Candidate dicts per category, filtered and sorted by cost."""
+        from components.models import Component
+        from components.projection import JSONPathText
+
+        # Only weight_g is read out of schema_data; frames need it whole to infer their class
+        components = Component.objects.filter(category__slug__in=categories)
+        frame_data = {}
+        if self.drone_class != 'all' and 'frames' in categories:
+            frame_data = dict(components.filter(category__slug='frames').values_list('pk', 'schema_data'))
+        rows = (components.annotate(weight=JSONPathText('schema_data', ['weight_g']))
+                .values_list('pk', 'pid', 'name', 'approx_price', 'category__slug', 'weight'))
+
+        pinned = set(self.pins.values())
+        candidates = {c: [] for c in categories}
+        for pk, pid, name, approx_price, category, weight in rows:
+            if category in self.pins and pid != self.pins[category]:
+                continue
+            price = parse_price(approx_price)
+            if pid not in pinned:
+                if self.budget is not None and (price is None or price > self.budget):
+                    continue
+                if pk in frame_data and not frame_matches_class(name, frame_data[pk], self.drone_class):
+                    continue
+            candidates[category].append({
+                'pk': pk, 'pid': pid, 'name': name, 'approx_price': approx_price,
+                'price': price, 'weight_g': to_float(json.loads(weight)) if weight is not None else None,
+            })
+        for slot_candidates in candidates.values():
+            slot_candidates.sort(key=lambda c: (self._cost(c), c['pid']))
+        return candidates
+
+    def index(self, categories):
+        """CompatKeys per component and the partner keys each conflicts with, from the compat index."""
+        from components.models import CompatConflict, CompatKey
+        keys = {}
+        for pk, code, side, key in (CompatKey.objects.filter(component__category__slug__in=categories)
+                                    .values_list('component_id', 'code', 'side', 'key')):
+            keys.setdefault(pk, []).append((code, side, key))
+        conflicts = CompatConflict.objects.all()
+        if self.allow_warnings:
+            conflicts = conflicts.filter(severity='error')
+        opposite = {}
+        for code, left_key, right_key in conflicts.values_list('code', 'left_key', 'right_key'):
+            opposite.setdefault((code, 'left', left_key), []).append((code, 'right', right_key))
+            opposite.setdefault((code, 'right', right_key), []).append((code, 'left', left_key))
+        return keys, opposite
+
+    # ── Search ──────────────────────────────────────────────
+
+    def _bound(self):
+        if len(self.best) < self.max_results:
+            return float('inf')
+        return -self.best[0][0]
+
+    def _record(self, layout, picks, cost):
+        self.sequence += 1
+        entry = (-cost, -self.sequence, layout, tuple(picks))
+        if len(self.best) < self.max_results:
+            heapq.heappush(self.best, entry)
+        else:
+            heapq.heappushpop(self.best, entry)
+
+    def _search(self, layout, domains, picks, cost, price):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _Stop('node_limit')
+        if not self.nodes & 255 and time.perf_counter() > self.deadline:
+            raise _Stop('time_limit')
+
+        open_slots = [s for s, pick in enumerate(picks) if pick is None]
+        if not open_slots:
+            self._record(layout, picks, cost)
+            return
+
+        # Most constrained slot first
+        slot = min(open_slots, key=lambda s: (domains[s].bit_count(), s))
+        rest = [s for s in open_slots if s != slot]
+        costs, prices = layout.costs, layout.prices
+        rest_cost = sum(layout.min_cost(s, domains[s]) for s in rest)
+        rest_price = sum(layout.min_price(s, domains[s]) for s in rest) if self.budget is not None else 0
+        arcs = [(y, table) for y, table in layout.arcs[slot] if picks[y] is None]
+
+        for i in _bits(domains[slot]):
+            new_cost = cost + costs[slot][i]
+            if new_cost + rest_cost >= self._bound():
+                break                         # candidates are sorted by cost
+            new_price = price + prices[slot][i]
+            if self.budget is not None and new_price + rest_price > self.budget:
+                if self.rank == 'price':
+                    break
+                continue
+
+            narrowed = list(domains)
+            narrowed[slot] = 1 << i
+            for y, table in arcs:
+                narrowed[y] &= table[i]
+                if not narrowed[y]:
+                    break
+            else:
+                bound = new_cost + sum(layout.min_cost(s, narrowed[s]) for s in rest)
+                if bound >= self._bound():
+                    continue
+                if self.budget is not None and (
+                        new_price + sum(layout.min_price(s, narrowed[s]) for s in rest) > self.budget):
+                    continue
+                picks[slot] = i
+                self._search(layout, narrowed, picks, new_cost, new_price)
+                picks[slot] = None
+
+    def solve(self):
+        from components.models import Component
+        started = time.perf_counter()
+        self.deadline = started + self.time_limit
+
+        populated = set(Component.objects.values_list('category__slug', flat=True).distinct())
+        layouts = self.layouts(populated)
+        categories = sorted({slot for slots in layouts for slot in slots})
+        candidates = self.load(categories)
+        keys, opposite = self.index(categories)
+
+        prepared = []
+        for slots in layouts:
+            layout = _Layout(slots, [candidates[s] for s in slots], keys, opposite, self._cost)
+            feasible = layout.propagate()
+            prepared.append((layout, feasible))
+
+        stopped = None
+        try:
+            # Search the layout with the cheaper lower bound first: its builds tighten the other's bound
+            order = sorted((p for p in prepared if p[1]),
+                           key=lambda p: sum(p[0].min_cost(s, d) for s, d in enumerate(p[0].domains)))
+            for layout, _ in order:
+                self._search(layout, list(layout.domains), [None] * len(layout.slots), 0, 0)
+        except _Stop as stop:
+            stopped = stop.args[0]
+
+        return {
+            'complete': stopped is None,
+            'stopped': stopped,
+            'nodes': self.nodes,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+            'layouts': [{
+                'slots': layout.slots,
+                'candidates': {slot: domain.bit_count() for slot, domain in zip(layout.slots, layout.domains)},
+                'feasible': feasible,
+            } for layout, feasible in prepared],
+            'builds': self.results(),
+        }
+
+    # ── Results ─────────────────────────────────────────────
+
+    def results(self):
+        """The best builds, cheapest first, re-checked with the compatibility engine."""
+        from components.models import Component
+        ranked = sorted(self.best, key=lambda entry: (-entry[0], -entry[1]))
+        chosen = [(layout, [layout.candidates[s][i] for s, i in enumerate(picks)]) for _, _, layout, picks in ranked]
+        components = Component.objects.select_related('category').in_bulk(
+            {c['pk'] for _, parts in chosen for c in parts})
+        engine = get_engine()
+        builds = []
+        for layout, parts in chosen:
+            warnings = engine.check_build({slot: components[c['pk']] for slot, c in zip(layout.slots, parts)})
+            builds.append({
+                'parts': {slot: {k: c[k] for k in ('pid', 'name', 'approx_price', 'price', 'weight_g')}
+                          for slot, c in zip(layout.slots, parts)},
+                'total_price': round(sum(c['price'] or 0 for c in parts), 2),
+                'total_weight_g': round(sum(c['weight_g'] or 0 for c in parts), 1),
+                'unknown_price': sum(1 for c in parts if c['price'] is None),
+                'unknown_weight': sum(1 for c in parts if c['weight_g'] is None),
+                'status': summarize(warnings),
+                'warnings': warnings,
+            })
+        return builds
+
+
+def solve(**options):
+    return BuildSolver(**options).solve()
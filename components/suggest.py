@@ -0,0 +1,239 @@
+"""
+suggest.py — "Complete my build": top-k fills for every empty build slot.
+
+  POST /api/builds/suggest/
+  Body: { "build": <currentBuild>, "k": 5 }
+
+The build has the shape of currentBuild in state.js ({category: component
+object | PID | null}). Every slot left empty (the renderBuildSlots() slot
+list, or an explicit "slots" list) gets its k best components against the
+filled parts, ordered by
+  1. failed hard checks (errors), fewest first
+  2. soft warnings, fewest first
+  3. price, then weight (unknown last; see solver.parse_price)
+A filled stack leaves the FC and ESC slots out, and a filled FC or ESC
+leaves out the stack.
+
+Nothing is read from schema_data per request. Each category is held in
+memory as pre-extracted columns (CategoryColumns): price and weight
+arrays, the positions pre-sorted by price/weight, and the category's
+compat index keys (compat_index.py) grouped by value. A check then runs
+once per distinct value rather than once per part, and only parts that
+fail something are touched; the rest are already in ranked order. The
+columns are built on first use, keyed by the catalogue version
+(catalogue.py) and the compiled engine, and every version bump drops them.
+
+Used by: views.BuildSuggestView
+"""
+import heapq
+import json
+import threading
+from array import array
+
+from components.catalogue import get_version
+from components.compat import STACK_CATEGORY, build_roles, candidate_roles, get_engine, to_float
+from components.solver import STACK_PAIR, parse_price
+
+
+# renderBuildSlots() order
+BUILD_SLOTS = [
+    'frames', 'stacks', 'flight_controllers', 'escs', 'motors', 'propellers',
+    'video_transmitters', 'fpv_cameras', 'receivers', 'batteries', 'antennas', 'action_cameras',
+]
+
+DEFAULT_K = 5
+MAX_K = 50
+
+
+# ── Columns ─────────────────────────────────────────────────
+
+class CategoryColumns:
+    """One category's parts as parallel columns, indexed by position."""
+
+    def __init__(self, category):
+        from django.db import transaction
+        from components.models import CompatKey, Component
+        from components.projection import JSONPathText
+
+        self.category = category
+        # Both reads in one transaction so a concurrent import can't add
+        # keys for parts the first read didn't see (SQLite snapshot)
+        with transaction.atomic():
+            rows = list(Component.objects.filter(category__slug=category).order_by('pk')
+                        .annotate(weight=JSONPathText('schema_data', ['weight_g']))
+                        .values_list('pk', 'pid', 'name', 'approx_price', 'weight'))
+            keys = list(CompatKey.objects.filter(component__category__slug=category)
+                        .values_list('component_id', 'code', 'side', 'key'))
+        self.pids, self.names, self.approx_prices = [], [], []
+        self.prices, self.weights = array('d'), array('d')
+        position = {}
+        for pk, pid, name, approx_price, weight in rows:
+            position[pk] = len(self.pids)
+            self.pids.append(pid)
+            self.names.append(name)
+            self.approx_prices.append(approx_price)
+            self.prices.append(parse_price(approx_price) or float('nan'))
+            weight = to_float(json.loads(weight)) if weight is not None else None
+            self.weights.append(weight or float('nan'))
+
+        # Cheapest first, then lightest; unknown values last
+        def sort_key(i):
+            price, weight = self.prices[i], self.weights[i]
+            return (price != price, price if price == price else 0,
+                    weight != weight, weight if weight == weight else 0, self.pids[i])
+        self.order = array('i', sorted(range(len(self.pids)), key=sort_key))
+        self.rank = array('i', [0]) * len(self.pids)
+        for rank, i in enumerate(self.order):
+            self.rank[i] = rank
+
+        # (code, side) → [(value, severity, positions)]
+        grouped = {}
+        for pk, code, side, key in keys:
+            if pk not in position:
+                continue  # committed between the reads (read-committed backends)
+            grouped.setdefault((code, side, key), array('i')).append(position[pk])
+        self.groups = {}
+        for (code, side, key), positions in grouped.items():
+            value, severity = json.loads(key)
+            self.groups.setdefault((code, side), []).append((value, severity, positions))
+
+    def __len__(self):
+        return len(self.pids)
+
+    def number(self, column, i):
+        value = column[i]
+        return None if value != value else value
+
+
+_columns_lock = threading.Lock()
+_columns_cache = {'key': None, 'columns': {}}
+
+
+def get_columns(category):
+    """CategoryColumns for the current catalogue version and engine."""
+    key = (get_version(), get_engine())
+    with _columns_lock:
+        if _columns_cache['key'] != key:
+            _columns_cache['key'] = key
+            _columns_cache['columns'] = {}
+        columns = _columns_cache['columns'].get(category)
+        if columns is None:
+            columns = _columns_cache['columns'][category] = CategoryColumns(category)
+        return columns
+
+
+def clear_columns():
+    """Drop this process's columns (catalogue.bump_version())."""
+    with _columns_lock:
+        _columns_cache['key'] = None
+        _columns_cache['columns'] = {}
+
+
+# ── Ranking ─────────────────────────────────────────────────
+
+def empty_slots(payload, build):
+    """Slots to fill: empty currentBuild keys in renderBuildSlots() order."""
+    slots = [s for s in BUILD_SLOTS if s not in build]
+    slots += [s for s in payload if s not in build and s not in BUILD_SLOTS]
+    if STACK_CATEGORY in build:
+        slots = [s for s in slots if s not in STACK_PAIR]
+    elif any(s in build for s in STACK_PAIR):
+        slots = [s for s in slots if s != STACK_CATEGORY]
+    return slots
+
+
+def slot_failures(engine, build, category, columns):
+    """
+    {position: [(check, severity, left value, right value)]} for the parts
+    of `category` that fail a check against the filled parts of `build`.
+    """
+    fixed_build = {k: v for k, v in build.items() if k != category}
+    fixed, has_stack = build_roles(fixed_build)
+    has_stack = has_stack or category == STACK_CATEGORY
+    roles = candidate_roles(category, fixed_build)
+    for role in roles:
+        fixed.pop(role, None)
+
+    failures = {}
+    for check in engine.checks:
+        if check.unless_stack and has_stack:
+            continue
+        for side, own_role, other_role in (('left', *check.roles), ('right', *reversed(check.roles))):
+            other = fixed.get(other_role)
+            if own_role not in roles or other is None:
+                continue
+            fixed_value = check.right_value(other) if side == 'left' else check.left_value(other)
+            if fixed_value is None:
+                continue
+            # Compared the way the index stores values (tuples come back as lists)
+            fixed_value = json.loads(json.dumps(fixed_value, default=str))
+            decides = check.check.severity
+            literal = decides if isinstance(decides, str) else None
+            fixed_severity = None
+            if not literal and decides[0] != side:
+                fixed_severity = engine.severity(other, decides[1])
+            violated = check.check.violated
+            for value, severity, positions in columns.groups.get((check.code, side), ()):
+                a, b = (value, fixed_value) if side == 'left' else (fixed_value, value)
+                if not violated(a, b):
+                    continue
+                entry = (check, literal or fixed_severity or severity, a, b)
+                for i in positions:
+                    failures.setdefault(i, []).append(entry)
+    return failures
+
+
+def rank_slot(engine, build, category, k):
+    """{counts, candidates} for one empty slot: its k best parts against `build`."""
+    columns = get_columns(category)
+    failures = slot_failures(engine, build, category, columns)
+
+    scored = {}
+    for i, entries in failures.items():
+        errors = sum(1 for entry in entries if entry[1] == 'error')
+        scored[i] = (errors, len(entries) - errors, columns.rank[i])
+    incompatible = sum(1 for score in scored.values() if score[0])
+    counts = {
+        'compatible': len(columns) - len(scored),
+        'warning': len(scored) - incompatible,
+        'incompatible': incompatible,
+    }
+
+    # Parts that pass every check are already ranked; failing ones follow by score
+    picks = []
+    for i in columns.order:
+        if len(picks) == k:
+            break
+        if i not in scored:
+            picks.append(i)
+    if len(picks) < k:
+        picks += heapq.nsmallest(k - len(picks), scored, key=scored.get)
+
+    candidates = []
+    for i in picks:
+        entries = failures.get(i, [])
+        warnings = [{
+            'check': check.code,
+            'type': severity,
+            'title': check.check.title,
+            'message': check.check.message(a, b),
+        } for check, severity, a, b in entries]
+        candidates.append({
+            'pid': columns.pids[i],
+            'name': columns.names[i],
+            'approx_price': columns.approx_prices[i],
+            'price': columns.number(columns.prices, i),
+            'weight_g': columns.number(columns.weights, i),
+            'status': 'incompatible' if i in scored and scored[i][0] else ('warning' if entries else 'compatible'),
+            'warnings': warnings,
+        })
+    return {'counts': counts, 'candidates': candidates}
+
+
+def suggest(build, slots, k=DEFAULT_K):
+    """Top-k parts for every slot in `slots` against the {category: Component} build."""
+    engine = get_engine()
+    return {
+        'build_warnings': engine.check_build(build),
+        'slots': {category: rank_slot(engine, build, category, k) for category in slots},
+    }
@@ -7,6 +7,8 @@ photo SHA-256 integrity, and audit endpoint.
 """
 
 import io
+import os
+import re
 import json
 import hashlib
 import tempfile
@@ -14,9 +16,10 @@ from unittest.mock import patch
 
 from PIL import Image
 
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.db.models import ProtectedError
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework.test import APIClient
 
@@ -74,6 +77,12 @@ def make_test_image(width=100, height=100, color='red', fmt='PNG'):
     return buf
 
 
+def streamed_json(response):
+    """Decode the body of a (possibly streaming) JSON response."""
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+    return json.loads(content)
+
+
 # =====================================================================
 # Model Tests
 # =====================================================================
@@ -331,15 +340,15 @@ class ImportExportTests(TestCase):
         make_component(self.cat, pid='MTR-0002', name='Motor B')
         resp = self.client.get('/api/export/parts/')
         self.assertEqual(resp.status_code, 200)
-        self.assertEqual(len(resp.data), 2)
+        self.assertEqual(len(streamed_json(resp)), 2)
 
     def test_export_by_category(self):
         cat2 = make_category(name='ESCs', slug='escs')
         make_component(self.cat, pid='MTR-0001')
         make_component(cat2, pid='ESC-0001', name='Test ESC')
-        resp = self.client.get('/api/export/parts/?category=motors')
-        self.assertEqual(len(resp.data), 1)
-        self.assertEqual(resp.data[0]['pid'], 'MTR-0001')
+        exported = streamed_json(self.client.get('/api/export/parts/?category=motors'))
+        self.assertEqual(len(exported), 1)
+        self.assertEqual(exported[0]['pid'], 'MTR-0001')
 
     def test_import_export_round_trip(self):
         """Import parts, export them, re-import — data should be stable."""
@@ -352,7 +361,7 @@ class ImportExportTests(TestCase):
         self.client.post('/api/import/parts/', original, format='json')
 
         # Export
-        exported = self.client.get('/api/export/parts/').data
+        exported = streamed_json(self.client.get('/api/export/parts/'))
         self.assertEqual(len(exported), 1)
         self.assertEqual(exported[0]['pid'], 'MTR-0001')
         self.assertEqual(exported[0]['name'], 'Motor A')
@@ -364,6 +373,42 @@ class ImportExportTests(TestCase):
         self.assertEqual(resp.data['updated'], 1)
         self.assertEqual(resp.data['created'], 0)
 
+    def test_export_streams_in_chunks(self):
+        for i in range(5):
+            make_component(self.cat, pid=f'MTR-{i:04d}', schema_data={'kv': i})
+        with patch('components.export.CHUNK_SIZE', 2):
+            resp = self.client.get('/api/export/parts/')
+            chunks = list(resp.streaming_content)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(len(chunks), 5)  # '[', three blocks of <= 2 parts, ']'
+        parts = json.loads(b''.join(chunks))
+        self.assertEqual(sorted(p['kv'] for p in parts), [0, 1, 2, 3, 4])
+
+    def test_export_empty(self):
+        self.assertEqual(streamed_json(self.client.get('/api/export/parts/')), [])
+
+    def test_export_ndjson(self):
+        make_component(self.cat, pid='MTR-0001', schema_data={'kv': 2400})
+        make_component(self.cat, pid='MTR-0002')
+        for kwargs in ({'path': '/api/export/parts/?format=ndjson'},
+                       {'path': '/api/export/parts/', 'HTTP_ACCEPT': 'application/x-ndjson'}):
+            resp = self.client.get(**kwargs)
+            self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+            lines = b''.join(resp.streaming_content).decode().splitlines()
+            self.assertEqual(len(lines), 2)
+            self.assertEqual(json.loads(lines[0])['category'], 'motors')
+
+    def test_export_gzip(self):
+        import gzip
+        make_component(self.cat, pid='MTR-0001', name='Motor A')
+        resp = self.client.get('/api/export/parts/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp['Vary'])
+        parts = json.loads(gzip.decompress(b''.join(resp.streaming_content)))
+        self.assertEqual(parts[0]['name'], 'Motor A')
+        resp = self.client.get('/api/export/parts/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(resp.has_header('Content-Encoding'))
+
 
 # =====================================================================
 # Build Guide API Tests
@@ -1166,3 +1211,1503 @@ class StepPhotoValidationTests(TestCase):
         }, format='multipart')
         self.assertEqual(resp.status_code, 201)
         self.assertEqual(StepPhoto.objects.count(), 1)
+
+
+# =====================================================================
+# Compatibility Engine Tests
+# =====================================================================
+
+def make_compat_catalogue():
+    """Frame, motors, ESC, battery and stack with known (in)compatibilities."""
+    cats = {slug: make_category(name=slug.title(), slug=slug)
+            for slug in ('frames', 'motors', 'escs', 'batteries', 'stacks', 'propellers')}
+    make_component(cats['frames'], pid='FRM-0001', name='5in Frame', schema_data={
+        'fc_mounting_hole_size': 'M3',
+        'compatibility': {
+            'prop_size_max_in': 5.1, 'fc_mounting_patterns_mm': [30.5],
+            'motor_mount_hole_spacing_mm': 16, 'motor_mount_bolt_size': 'M3',
+            '_compat_hard': ['fc_mounting_patterns_mm', 'motor_mount_hole_spacing_mm', 'motor_mount_bolt_size'],
+            '_compat_soft': ['prop_size_max_in'],
+        },
+    })
+    make_component(cats['motors'], pid='MTR-0001', name='2207 Motor', schema_data={
+        'compatibility': {
+            'motor_mount_hole_spacing_mm': 16, 'motor_mount_bolt_size': 'M3',
+            'cell_count_max': 6, 'min_esc_current_per_motor_a': 35,
+            '_compat_hard': ['motor_mount_hole_spacing_mm'], '_compat_soft': ['cell_count_max'],
+        },
+    })
+    make_component(cats['motors'], pid='MTR-0002', name='1404 Motor', schema_data={
+        'compatibility': {'motor_mount_hole_spacing_mm': 9, 'motor_mount_bolt_size': 'M2', 'cell_count_max': 4},
+    })
+    make_component(cats['escs'], pid='ESC-0001', name='50A ESC', schema_data={
+        'continuous_current_per_motor_a': 50,
+        'compatibility': {
+            'mounting_pattern_mm': 30.5, 'battery_connector': 'XT60',
+            'cell_count_min': 3, 'cell_count_max': 6,
+            '_compat_hard': ['mounting_pattern_mm', 'battery_connector'],
+            '_compat_soft': ['cell_count_min', 'cell_count_max'],
+        },
+    })
+    make_component(cats['batteries'], pid='BAT-6S', name='6S Pack', schema_data={
+        'compatibility': {'cell_count': 6, 'connector_type': 'xt60', 'voltage_max_v': 25.2},
+    })
+    make_component(cats['batteries'], pid='BAT-8S', name='8S Pack', schema_data={
+        'compatibility': {'cell_count': 8, 'connector_type': 'XT90', 'voltage_max_v': 33.6},
+    })
+    make_component(cats['stacks'], pid='STK-0001', name='20x20 Stack', schema_data={
+        'mounting_pattern_mm': 20,
+        'compatibility': {'mounting_pattern_mm': 20, '_compat_hard': ['mounting_pattern_mm'], '_compat_soft': []},
+    })
+    make_component(cats['propellers'], pid='PRP-0001', name='5.1in Props', schema_data={'diameter_in': '5.1'})
+    make_component(cats['propellers'], pid='PRP-0002', name='6in Props', schema_data={'diameter_in': '6'})
+    return cats
+
+
+class CompatEngineTests(TestCase):
+    def setUp(self):
+        from .compat import CompatibilityEngine
+        make_compat_catalogue()
+        self.engine = CompatibilityEngine.from_schema({
+            'components': {
+                'escs': [{'compatibility': {'_compat_hard': ['battery_connector'], '_compat_soft': []}}],
+            },
+        })
+
+    def build(self, **pids):
+        return {cat: Component.objects.get(pid=pid) for cat, pid in pids.items()}
+
+    def codes(self, warnings):
+        return {w['check'] for w in warnings}
+
+    def test_compatible_build_has_no_warnings(self):
+        warnings = self.engine.check_build(self.build(
+            frames='FRM-0001', motors='MTR-0001', escs='ESC-0001',
+            batteries='BAT-6S', propellers='PRP-0001',
+        ))
+        self.assertEqual(warnings, [])
+
+    def test_motor_mount_mismatch_is_hard(self):
+        warnings = self.engine.check_build(self.build(frames='FRM-0001', motors='MTR-0002'))
+        by_code = {w['check']: w for w in warnings}
+        self.assertEqual(by_code['3']['type'], 'error')
+        self.assertEqual(by_code['3']['message'], 'These motors use 9mm spacing. The frame uses 16mm.')
+        self.assertIn('B2', by_code)
+
+    def test_prop_size_is_soft(self):
+        warnings = self.engine.check_build(self.build(frames='FRM-0001', propellers='PRP-0002'))
+        self.assertEqual([(w['check'], w['type']) for w in warnings], [('1', 'warning')])
+
+    def test_battery_checks(self):
+        warnings = self.engine.check_build(self.build(motors='MTR-0001', escs='ESC-0001', batteries='BAT-8S'))
+        self.assertEqual(self.codes(warnings), {'4', '5', 'B4'})
+
+    def test_connector_compare_is_case_insensitive(self):
+        warnings = self.engine.check_build(self.build(escs='ESC-0001', batteries='BAT-6S'))
+        self.assertNotIn('B4', self.codes(warnings))
+
+    def test_stack_stands_in_for_fc_and_esc(self):
+        warnings = self.engine.check_build(self.build(frames='FRM-0001', stacks='STK-0001'))
+        self.assertEqual(self.codes(warnings), {'2'})
+        self.assertEqual(warnings[0]['type'], 'error')
+
+    def test_schema_classification_fallback(self):
+        from .compat import Part
+        part = Part('ESC-X', 'escs', {'compatibility': {}})
+        self.assertEqual(self.engine.severity(part, 'battery_connector'), 'error')
+        self.assertEqual(self.engine.severity(part, 'cell_count_max'), 'warning')
+
+
+class CompatCheckAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_compat_catalogue()
+
+    def test_check_build(self):
+        resp = self.client.post('/api/compat/check/', {
+            'build': {'frames': 'FRM-0001', 'motors': 'MTR-0002', 'escs': None},
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['status'], 'incompatible')
+        self.assertEqual(resp.data['errors'], 2)
+
+    def test_accepts_relations_format(self):
+        resp = self.client.post('/api/compat/check/', {
+            'build': {'frames': [{'pid': 'FRM-0001'}], 'motors': [{'pid': 'MTR-0001', 'quantity': 4}]},
+        }, format='json')
+        self.assertEqual(resp.data['status'], 'compatible')
+
+    def test_unknown_pid_rejected(self):
+        resp = self.client.post('/api/compat/check/', {'build': {'frames': 'FRM-NOPE'}}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('FRM-NOPE', resp.data['error'])
+
+    def test_missing_build_rejected(self):
+        resp = self.client.post('/api/compat/check/', ['FRM-0001'], format='json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class CompatCandidatesAPITests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_compat_catalogue()
+
+    def rank(self, build, category):
+        return self.client.post('/api/compat/candidates/', {'build': build, 'category': category}, format='json')
+
+    def test_ranks_every_candidate(self):
+        resp = self.rank({'frames': 'FRM-0001'}, 'motors')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([c['pid'] for c in resp.data['candidates']], ['MTR-0001', 'MTR-0002'])
+        self.assertEqual([c['status'] for c in resp.data['candidates']], ['compatible', 'incompatible'])
+        self.assertEqual(resp.data['counts'], {'compatible': 1, 'warning': 0, 'incompatible': 1})
+
+    def test_matches_single_build_check(self):
+        """Column-wise ranking agrees with a full per-candidate evaluation."""
+        from .compat import get_engine
+        build = {'frames': 'FRM-0001', 'motors': 'MTR-0001', 'escs': 'ESC-0001'}
+        resp = self.rank(build, 'batteries')
+        fixed = {cat: Component.objects.get(pid=pid) for cat, pid in build.items()}
+        for candidate in resp.data['candidates']:
+            full = get_engine().check_build({**fixed, 'batteries': Component.objects.get(pid=candidate['pid'])})
+            self.assertEqual(candidate['warnings'], full)
+
+    def test_replaces_existing_slot(self):
+        resp = self.rank({'frames': 'FRM-0001', 'propellers': 'PRP-0002'}, 'propellers')
+        statuses = {c['pid']: c['status'] for c in resp.data['candidates']}
+        self.assertEqual(statuses, {'PRP-0001': 'compatible', 'PRP-0002': 'warning'})
+
+    def test_stack_candidates_fill_fc_slot(self):
+        resp = self.rank({'frames': 'FRM-0001'}, 'stacks')
+        self.assertEqual(resp.data['candidates'][0]['status'], 'incompatible')
+        self.assertEqual(resp.data['candidates'][0]['warnings'][0]['check'], '2')
+
+    def test_build_warnings_apply_to_all_candidates(self):
+        resp = self.rank({'frames': 'FRM-0001', 'motors': 'MTR-0002'}, 'propellers')
+        self.assertEqual(len(resp.data['build_warnings']), 2)
+        self.assertEqual(resp.data['counts']['incompatible'], 2)
+
+    def test_unknown_category(self):
+        resp = self.rank({}, 'nonexistent')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_missing_category_rejected(self):
+        resp = self.client.post('/api/compat/candidates/', {'build': {}}, format='json')
+        self.assertEqual(resp.status_code, 400)
+
+
+class CompatIndexTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_compat_catalogue()
+
+    def compatible(self, pid, category, **params):
+        return self.client.get(f'/api/components/{pid}/compatible/', {'category': category, **params})
+
+    def test_lists_partners_from_index(self):
+        resp = self.compatible('FRM-0001', 'motors')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['candidates'], [
+            {'pid': 'MTR-0001', 'name': '2207 Motor', 'status': 'compatible', 'checks': []},
+            {'pid': 'MTR-0002', 'name': '1404 Motor', 'status': 'incompatible', 'checks': ['3', 'B2']},
+        ])
+        self.assertEqual(resp.data['counts'], {'compatible': 1, 'warning': 0, 'incompatible': 1})
+        # Either side of a pair can ask
+        resp = self.compatible('MTR-0002', 'frames', status='compatible')
+        self.assertEqual(resp.data['candidates'], [])
+
+    def test_matches_engine_for_every_pair(self):
+        from .compat import get_engine, summarize
+        from .compat_index import partner_categories
+        for component in Component.objects.select_related('category'):
+            for category in partner_categories(component.category.slug):
+                resp = self.compatible(component.pid, category)
+                for candidate in resp.data['candidates']:
+                    other = Component.objects.get(pid=candidate['pid'])
+                    warnings = get_engine().check_build({component.category.slug: component, category: other})
+                    self.assertEqual((candidate['status'], candidate['checks']),
+                                     (summarize(warnings), [w['check'] for w in warnings]))
+
+    def test_index_follows_saves(self):
+        motor = Component.objects.get(pid='MTR-0002')
+        motor.schema_data['compatibility'].update(motor_mount_hole_spacing_mm=16, motor_mount_bolt_size='M3')
+        motor.save()
+        statuses = {c['pid']: c['status'] for c in self.compatible('FRM-0001', 'motors').data['candidates']}
+        self.assertEqual(statuses['MTR-0002'], 'compatible')
+        # A spacing no part had before is evaluated on save
+        motor.schema_data['compatibility']['motor_mount_hole_spacing_mm'] = 19
+        motor.save()
+        candidate = self.compatible('FRM-0001', 'motors', status='incompatible').data['candidates'][0]
+        self.assertEqual((candidate['pid'], candidate['checks']), ('MTR-0002', ['3']))
+
+    def test_bulk_import_is_indexed(self):
+        self.client.post('/api/import/parts/', [
+            {'pid': 'PRP-0003', 'category': 'propellers', 'name': '7in Props', 'diameter_in': 7},
+        ], format='json')
+        resp = self.compatible('FRM-0001', 'propellers', status='warning')
+        self.assertEqual([c['pid'] for c in resp.data['candidates']], ['PRP-0002', 'PRP-0003'])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.compatible('FRM-NOPE', 'motors').status_code, 404)
+        self.assertEqual(self.client.get('/api/components/FRM-0001/compatible/').status_code, 400)
+        resp = self.compatible('FRM-0001', 'fpv_cameras')
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn('motors', resp.data['categories'])
+        self.assertEqual(self.compatible('FRM-0001', 'motors', status='maybe').status_code, 400)
+
+    def test_post_migrate_rebuilds_only_when_stale(self):
+        from django.apps import apps
+        from . import apps as components_apps
+        from .models import DerivedIndexState
+        config = apps.get_app_config('components')
+        DerivedIndexState.objects.all().delete()
+        with patch('components.compat_index.rebuild_compat_index') as rebuild:
+            components_apps._rebuild_compat_index(config, using='default', plan=[])
+            components_apps._rebuild_compat_index(config, using='default', plan=[])
+            self.assertEqual(rebuild.call_count, 1)  # a no-op migrate reuses the stored hash
+            rebuild.assert_called_with(using='default')
+            DerivedIndexState.objects.filter(name='compat_index').update(inputs_hash='old')
+            components_apps._rebuild_compat_index(config, using='default', plan=[])
+            self.assertEqual(rebuild.call_count, 2)  # the inputs changed
+            applied = type('Migration', (), {'app_label': 'components'})()
+            components_apps._rebuild_compat_index(config, using='default', plan=[(applied, False)])
+            self.assertEqual(rebuild.call_count, 3)  # this app's migrations ran
+            other = type('Migration', (), {'app_label': 'auth'})()
+            components_apps._rebuild_compat_index(config, using='default', plan=[(other, False)])
+            self.assertEqual(rebuild.call_count, 3)
+
+
+class BuildSolverTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_compat_catalogue()
+        # The cheapest motor and battery each break a check
+        for pid, price in [('FRM-0001', '$60'), ('MTR-0001', '$25'), ('MTR-0002', '$5'), ('ESC-0001', '$40'),
+                           ('BAT-6S', '$30'), ('BAT-8S', '$10'), ('STK-0001', '$20'),
+                           ('PRP-0001', '$4'), ('PRP-0002', '$3')]:
+            Component.objects.filter(pid=pid).update(approx_price=price)
+
+    def solve(self, **body):
+        return self.client.post('/api/builds/solve/', body, format='json')
+
+    def test_skips_greedy_dead_ends(self):
+        resp = self.solve(drone_class='5inch')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.data['complete'])
+        [build] = resp.data['builds']
+        self.assertEqual({slot: part['pid'] for slot, part in build['parts'].items()}, {
+            'frames': 'FRM-0001', 'escs': 'ESC-0001', 'motors': 'MTR-0001',
+            'propellers': 'PRP-0001', 'batteries': 'BAT-6S',
+        })
+        self.assertEqual((build['status'], build['total_price'], build['unknown_weight']), ('compatible', 159.0, 5))
+        # The 20x20 stack never fits the 30.5 frame
+        stacked = resp.data['layouts'][1]
+        self.assertEqual((stacked['feasible'], stacked['candidates']['stacks']), (False, 0))
+
+    def test_ranking_and_warnings(self):
+        resp = self.solve(allow_warnings=True)
+        self.assertEqual([b['parts']['propellers']['pid'] for b in resp.data['builds']], ['PRP-0002', 'PRP-0001'])
+        self.assertEqual([b['status'] for b in resp.data['builds']], ['warning', 'compatible'])
+        for pid, weight in [('PRP-0001', 8), ('PRP-0002', 12)]:
+            component = Component.objects.get(pid=pid)
+            component.schema_data['weight_g'] = weight
+            component.save()
+        resp = self.solve(allow_warnings=True, rank='weight', max_results=1)
+        self.assertEqual([b['parts']['propellers']['pid'] for b in resp.data['builds']], ['PRP-0001'])
+
+    def test_budget_class_and_pins(self):
+        self.assertEqual(self.solve(budget='$158').data['builds'], [])
+        self.assertEqual(len(self.solve(budget=159).data['builds']), 1)
+        self.assertEqual(self.solve(drone_class='7inch').data['builds'], [])
+        self.assertEqual(self.solve(pinned={'propellers': 'PRP-0002'}).data['builds'], [])
+        resp = self.solve(pinned=['STK-0001'], allow_warnings=True)
+        self.assertEqual([layout['slots'][1] for layout in resp.data['layouts']], ['stacks'])
+        self.assertEqual(resp.data['builds'], [])
+
+    def test_node_limit(self):
+        resp = self.solve(max_nodes=1)
+        self.assertEqual((resp.data['complete'], resp.data['stopped'], resp.data['builds']),
+                         (False, 'node_limit', []))
+
+    def test_infers_frame_class_like_wizard(self):
+        from .solver import infer_frame_class
+        self.assertEqual(infer_frame_class('Frame', {'compatibility': {'prop_size_max_in': '7'}}), '7inch')
+        self.assertEqual(infer_frame_class('Frame', {'wheelbase_mm': 120}), '3inch')
+        self.assertEqual(infer_frame_class('Mobula 75mm Whoop', {}), 'micro')
+        self.assertEqual(infer_frame_class('Nazgul Evoque', {}), '5inch')
+        self.assertEqual(infer_frame_class('Mystery Frame', None), 'unknown')
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.solve(drone_class='huge').status_code, 400)
+        self.assertEqual(self.solve(rank='colour').status_code, 400)
+        self.assertEqual(self.solve(budget='free').status_code, 400)
+        self.assertEqual(self.solve(max_results=0).status_code, 400)
+        self.assertEqual(self.solve(pinned=['FRM-NOPE']).status_code, 400)
+        self.assertEqual(self.solve(pinned=['MTR-0001', 'MTR-0002']).status_code, 400)
+        self.assertEqual(self.solve(slots=['gimbals']).status_code, 400)
+
+
+class BuildSuggestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        make_compat_catalogue()
+        for pid, price in [('MTR-0001', '$25'), ('MTR-0002', '$5'), ('PRP-0001', '$4'), ('PRP-0002', '$3')]:
+            Component.objects.filter(pid=pid).update(approx_price=price)
+
+    def suggest(self, build, **body):
+        return self.client.post('/api/builds/suggest/', {'build': build, **body}, format='json')
+
+    def test_ranks_every_empty_slot(self):
+        frame = self.client.get('/api/components/FRM-0001/').data
+        resp = self.suggest({'frames': frame, 'stacks': None, 'motors': None, 'batteries': None})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.data['slots'])[:4], ['stacks', 'flight_controllers', 'escs', 'motors'])
+        motors = resp.data['slots']['motors']
+        # The cheaper motor fails hard checks, so it ranks last
+        self.assertEqual([(c['pid'], c['status'], c['price']) for c in motors['candidates']],
+                         [('MTR-0001', 'compatible', 25.0), ('MTR-0002', 'incompatible', 5.0)])
+        self.assertEqual(motors['counts'], {'compatible': 1, 'warning': 0, 'incompatible': 1})
+        self.assertEqual([w['check'] for w in motors['candidates'][1]['warnings']], ['3', 'B2'])
+        props = resp.data['slots']['propellers']['candidates']
+        self.assertEqual([(c['pid'], c['status']) for c in props], [('PRP-0001', 'compatible'), ('PRP-0002', 'warning')])
+        self.assertEqual(resp.data['slots']['receivers']['candidates'], [])
+
+    def test_matches_engine(self):
+        from .compat import get_engine, load_build, load_candidates
+        payload = {'frames': 'FRM-0001', 'motors': 'MTR-0002', 'batteries': 'BAT-8S'}
+        resp = self.suggest(payload, k=10)
+        build, _ = load_build(payload)
+        self.assertEqual(set(resp.data['slots']), {'stacks', 'flight_controllers', 'escs', 'propellers',
+                                                   'video_transmitters', 'fpv_cameras', 'receivers',
+                                                   'antennas', 'action_cameras'})
+        for slot, ranked in resp.data['slots'].items():
+            parts, _ = load_candidates(slot)
+            _, per_candidate = get_engine().rank_candidates(build, slot, parts)
+            expected = {part.pid: warnings for part, warnings in zip(parts, per_candidate)}
+            self.assertEqual({c['pid']: c['warnings'] for c in ranked['candidates']}, expected)
+
+    def test_stack_slots_and_refresh(self):
+        resp = self.suggest({'stacks': 'STK-0001'}, k=1)
+        self.assertNotIn('escs', resp.data['slots'])
+        self.assertEqual(len(resp.data['slots']['motors']['candidates']), 1)
+        resp = self.suggest({'frames': 'FRM-0001'}, slots=['motors'])
+        self.assertEqual(list(resp.data['slots']), ['motors'])
+        # Saves bump the catalogue version, which drops the cached columns
+        motor = Component.objects.get(pid='MTR-0002')
+        motor.schema_data['compatibility'].update(motor_mount_hole_spacing_mm=16, motor_mount_bolt_size='M3')
+        motor.save()
+        resp = self.suggest({'frames': 'FRM-0001'}, slots=['motors'])
+        self.assertEqual([c['pid'] for c in resp.data['slots']['motors']['candidates']], ['MTR-0002', 'MTR-0001'])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post('/api/builds/suggest/', {}, format='json').status_code, 400)
+        self.assertEqual(self.suggest({'frames': 'FRM-NOPE'}).status_code, 400)
+        self.assertEqual(self.suggest({}, k=0).status_code, 400)
+        self.assertEqual(self.suggest({}, slots='motors').status_code, 400)
+
+    def test_columns_skip_keys_of_unseen_parts(self):
+        from .suggest import CategoryColumns
+        # A part committed between the component and key reads
+        unseen = lambda **kw: Component._base_manager.filter(**kw).exclude(pid='MTR-0002')
+        with patch.object(Component.objects, 'filter', side_effect=unseen):
+            columns = CategoryColumns('motors')
+        self.assertEqual(columns.pids, ['MTR-0001'])
+        for groups in columns.groups.values():
+            for _, _, positions in groups:
+                self.assertEqual(list(positions), [0])
+
+
+class NormalizeTests(TestCase):
+    def setUp(self):
+        self.cats = make_compat_catalogue()
+
+    def test_values_are_canonical(self):
+        frame = Component.objects.get(pid='FRM-0001')
+        self.assertEqual(frame.compat_values['frame']['fc_mounting_patterns_mm'], [30.5])
+        self.assertEqual(frame.compat_values['frame']['fc_mounting_hole_size'], 'M3')
+        battery = Component.objects.get(pid='BAT-6S')
+        self.assertEqual(battery.compat_values['bat']['connector_type'], 'XT60')
+        # A stack stores its effective FC and ESC
+        stack = Component.objects.get(pid='STK-0001')
+        self.assertEqual(set(stack.compat_values), {'fc', 'esc'})
+        self.assertEqual(stack.compat_values['fc']['mounting_pattern_mm'], 20)
+        self.assertEqual(stack.compat_values['esc']['mounting_pattern_mm'], 20)
+        prop = Component.objects.get(pid='PRP-0001')
+        self.assertEqual(prop.compat_values, {'props': {'diameter_in': 5.1}})
+
+    def test_saves_and_imports_normalize(self):
+        motor = Component.objects.get(pid='MTR-0002')
+        motor.schema_data['compatibility']['motor_mount_hole_spacing_mm'] = '12'
+        motor.save()
+        motor.refresh_from_db()
+        self.assertEqual(motor.compat_values['motors']['motor_mount_hole_spacing_mm'], 12)
+        APIClient().post('/api/import/parts/', [
+            {'pid': 'BAT-4S', 'category': 'batteries', 'name': '4S Pack',
+             'compatibility': {'cell_count': '4', 'connector_type': 'xt30'}},
+        ], format='json')
+        self.assertEqual(Component.objects.get(pid='BAT-4S').compat_values,
+                         {'bat': {'cell_count': 4, 'connector_type': 'XT30'}})
+
+    def test_engine_matches_extractors(self):
+        from .compat import get_engine
+        engine = get_engine()
+        parts = list(Component.objects.select_related('category'))
+        for a in parts:
+            for b in parts:
+                if a.category_id == b.category_id:
+                    continue
+                build = {a.category.slug: a, b.category.slug: b}
+                raw = {c.category.slug: Component(pid=c.pid, category=c.category, schema_data=c.schema_data)
+                       for c in (a, b)}
+                self.assertEqual(engine.check_build(build), engine.check_build(raw))
+
+    def test_renormalize_writes_changed_rows(self):
+        from .normalize import renormalize
+        self.assertEqual(renormalize(), 0)
+        Component.objects.filter(pid='BAT-8S').update(compat_values=None)
+        self.assertEqual(renormalize(), 1)
+        self.assertEqual(Component.objects.get(pid='BAT-8S').compat_values['bat']['cell_count'], 8)
+
+
+class ComponentCompatTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cats = make_compat_catalogue()
+
+    def rows(self, pid):
+        from .models import ComponentCompat
+        return {row.role: row for row in ComponentCompat.objects.filter(component__pid=pid)}
+
+    def pids(self, **params):
+        resp = self.client.get('/api/components/', params)
+        self.assertEqual(resp.status_code, 200)
+        return [c['pid'] for c in resp.json()]
+
+    def test_rows_project_compat_values(self):
+        esc = self.rows('ESC-0001')['esc']
+        self.assertEqual((esc.cell_count_min, esc.cell_count_max, esc.connector_type), (3, 6, 'XT60'))
+        self.assertEqual(self.rows('BAT-6S')['bat'].connector_type, 'XT60')
+        self.assertEqual(self.rows('FRM-0001')['frame'].mounting_hole_size, 'M3')
+        stack = self.rows('STK-0001')
+        self.assertEqual({role: row.mounting_pattern_mm for role, row in stack.items()}, {'fc': 20, 'esc': 20})
+
+    def test_rows_follow_writes(self):
+        from .normalize import rebuild_projection
+        battery = Component.objects.get(pid='BAT-8S')
+        battery.schema_data['compatibility']['connector_type'] = 'xt60'
+        battery.save()
+        self.assertEqual(self.rows('BAT-8S')['bat'].connector_type, 'XT60')
+        self.client.post('/api/import/parts/', [
+            {'pid': 'BAT-4S', 'category': 'batteries', 'name': '4S Pack', 'compatibility': {'cell_count': 4}},
+        ], format='json')
+        self.assertEqual(self.rows('BAT-4S')['bat'].cell_count, 4)
+        battery.delete()
+        self.assertEqual(self.rows('BAT-8S'), {})
+        before = sorted(map(str, self.rows('BAT-4S').values()))
+        rebuild_projection()
+        self.assertEqual(sorted(map(str, self.rows('BAT-4S').values())), before)
+
+    def test_where_and_sort(self):
+        self.assertEqual(sorted(self.pids(where='compat.cell_count_max>=6')), ['ESC-0001', 'MTR-0001'])
+        self.assertEqual(sorted(self.pids(where='compat.connector_type=XT60')), ['BAT-6S', 'ESC-0001'])
+        self.assertEqual(self.pids(where='compat.mounting_pattern_mm=20'), ['STK-0001'])
+        self.assertEqual(self.pids(category='batteries', where='compat.voltage_max_v<30'), ['BAT-6S'])
+        self.assertEqual(self.pids(category='batteries', sort='-compat.cell_count'), ['BAT-8S', 'BAT-6S'])
+        for where in ('compat.nope=1', 'compat.cell_count>=x', 'compat.connector_type>=X'):
+            self.assertEqual(self.client.get('/api/components/', {'where': where}).status_code, 400)
+
+    def test_index_used(self):
+        from .query import apply_where
+        plan = apply_where(Component.objects.all(), ['compat.cell_count_max>=6']).explain()
+        self.assertIn('componentcompat_cell_count_max', plan)
+
+
+# =====================================================================
+# Keyset Pagination Tests
+# =====================================================================
+
+class ComponentPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.motors = make_category()
+        self.escs = make_category(name='ESCs', slug='escs')
+        for i in range(5):
+            make_component(self.motors, pid=f'MTR-{i:04d}', name=f'Motor {i}')
+            make_component(self.escs, pid=f'ESC-{i:04d}', name=f'ESC {i}')
+
+    def test_unpaginated_by_default(self):
+        resp = self.client.get('/api/components/')
+        self.assertIsInstance(resp.data, list)
+        self.assertEqual(len(resp.data), 10)
+
+    def test_walks_all_pages_in_category_pid_order(self):
+        seen = []
+        url = '/api/components/?page_size=3'
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            self.assertLessEqual(len(resp.data['results']), 3)
+            seen.extend(c['pid'] for c in resp.data['results'])
+            url = resp.data['next']
+        # Category id order (motors was created first), not slug order
+        expected = [f'MTR-{i:04d}' for i in range(5)] + [f'ESC-{i:04d}' for i in range(5)]
+        self.assertEqual(seen, expected)
+
+    def test_cursor_is_stable_across_inserts(self):
+        first = self.client.get('/api/components/?page_size=2').data
+        make_component(self.motors, pid='MTR-0000A', name='Inserted before cursor')
+        second = self.client.get(f'/api/components/?page_size=2&cursor={first["next_cursor"]}').data
+        self.assertEqual([c['pid'] for c in second['results']], ['MTR-0002', 'MTR-0003'])
+
+    def test_pagination_respects_category_filter(self):
+        resp = self.client.get('/api/components/?category=escs&page_size=10')
+        self.assertEqual(len(resp.data['results']), 5)
+        self.assertIsNone(resp.data['next'])
+        self.assertIsNone(resp.data['next_cursor'])
+
+    def test_invalid_cursor(self):
+        resp = self.client.get('/api/components/?cursor=not-a-cursor')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_page_size_capped(self):
+        from .pagination import KeysetPagination
+        with patch.object(KeysetPagination, 'max_page_size', 4):
+            resp = self.client.get('/api/components/?page_size=500')
+        self.assertEqual(len(resp.data['results']), 4)
+
+    def test_invalid_page_size_uses_default(self):
+        from .pagination import KeysetPagination
+        with patch.object(KeysetPagination, 'page_size', 2):
+            for value in ('0', '-3', 'abc'):
+                resp = self.client.get(f'/api/components/?page_size={value}')
+                self.assertEqual(len(resp.data['results']), 2)
+
+
+# =====================================================================
+# Sparse Fieldset / Projection Tests
+# =====================================================================
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+        make_component(self.cat, pid='MTR-0001', approx_price='$25', schema_data={
+            'weight_g': 31.5, 'kv': 1950, 'notes': 'x' * 500,
+            'compatibility': {'cell_count_max': 6, 'motor_mount_bolt_size': 'M3', 'shaft': '5'},
+        })
+
+    def test_fields_limits_output(self):
+        resp = self.client.get('/api/components/?fields=pid,name,approx_price')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data[0], {'pid': 'MTR-0001', 'name': 'Test Motor', 'approx_price': '$25'})
+
+    def test_schema_fields_projects_nested_paths(self):
+        resp = self.client.get(
+            '/api/components/?fields=pid&schema_fields=compatibility.cell_count_max,'
+            'compatibility.motor_mount_bolt_size,compatibility.shaft,weight_g,missing.path'
+        )
+        self.assertEqual(resp.data[0], {
+            'pid': 'MTR-0001',
+            'schema_data': {
+                'weight_g': 31.5,
+                'compatibility': {'cell_count_max': 6, 'motor_mount_bolt_size': 'M3', 'shaft': '5'},
+            },
+        })
+
+    def test_schema_fields_defers_json_column(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/components/?fields=pid&schema_fields=weight_g')
+        select = [q['sql'] for q in ctx.captured_queries if 'components_component' in q['sql']][0]
+        # schema_data only appears inside JSON_EXTRACT, never as a selected column
+        self.assertIsNone(re.search(r'"components_component"\."schema_data"(,\s*"|\s+FROM)', select))
+        self.assertIn('JSON_EXTRACT', select)
+
+    def test_schema_fields_on_detail(self):
+        resp = self.client.get('/api/components/MTR-0001/?schema_fields=kv')
+        self.assertEqual(resp.data['schema_data'], {'kv': 1950})
+        self.assertEqual(resp.data['category'], 'motors')
+
+    def test_full_output_without_params(self):
+        resp = self.client.get('/api/components/MTR-0001/')
+        self.assertEqual(resp.data['schema_data']['kv'], 1950)
+
+    def test_works_with_pagination(self):
+        resp = self.client.get('/api/components/?page_size=1&fields=pid')
+        self.assertEqual(resp.data['results'], [{'pid': 'MTR-0001'}])
+
+    def test_writes_ignore_projection(self):
+        resp = self.client.put('/api/components/MTR-0001/?fields=pid', {
+            'pid': 'MTR-0001', 'category': 'motors', 'name': 'Renamed', 'schema_data': {'kv': 1},
+        }, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['name'], 'Renamed')
+
+    def test_drone_model_relations_projection(self):
+        DroneModel.objects.create(pid='DM-001', name='Build', relations={
+            'frames': [{'pid': 'FRM-0001'}], 'motors': [{'pid': 'MTR-0001', 'quantity': 4}],
+        })
+        resp = self.client.get('/api/drone-models/?fields=pid&schema_fields=motors')
+        self.assertEqual(resp.data[0], {'pid': 'DM-001', 'relations': {'motors': [{'pid': 'MTR-0001', 'quantity': 4}]}})
+
+    def test_build_session_projection(self):
+        guide = make_guide()
+        BuildSession.objects.create(
+            serial_number='DC-TEST-0001', guide=guide,
+            component_snapshot={'MTR-0001': {'name': 'Test Motor', 'schema_data': {}}},
+        )
+        resp = self.client.get(
+            '/api/build-sessions/?fields=serial_number,status&schema_fields=component_snapshot.MTR-0001.name'
+        )
+        self.assertEqual(resp.data[0], {
+            'serial_number': 'DC-TEST-0001', 'status': 'in_progress',
+            'component_snapshot': {'MTR-0001': {'name': 'Test Motor'}},
+        })
+
+
+# =====================================================================
+# Filter / Sort DSL Tests
+# =====================================================================
+
+class ComponentQueryDSLTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+        make_component(self.cat, pid='MTR-A', name='Alpha', manufacturer='T-Motor', approx_price='$30.99',
+                       schema_data={'weight_g': 32, 'is_new': True,
+                                    'compatibility': {'cell_count_max': 6, 'motor_mount_bolt_size': 'M3'}})
+        make_component(self.cat, pid='MTR-B', name='Bravo', manufacturer='iFlight', approx_price='$18.50',
+                       schema_data={'weight_g': '28.5g',
+                                    'compatibility': {'cell_count_max': 4, 'motor_mount_bolt_size': 'M2'}})
+        make_component(self.cat, pid='MTR-C', name='Charlie', manufacturer='T-Motor', approx_price='',
+                       schema_data={'compatibility': {'cell_count_max': '8', 'patterns': [20, 30.5]}})
+
+    def pids(self, query):
+        resp = self.client.get(f'/api/components/?{query}')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return [c['pid'] for c in resp.data]
+
+    def test_numeric_range(self):
+        self.assertEqual(sorted(self.pids('where=compatibility.cell_count_max>=6')), ['MTR-A', 'MTR-C'])
+        self.assertEqual(self.pids('where=compatibility.cell_count_max<5'), ['MTR-B'])
+
+    def test_text_equality_and_contains(self):
+        self.assertEqual(self.pids('where=compatibility.motor_mount_bolt_size=M3'), ['MTR-A'])
+        self.assertEqual(sorted(self.pids('where=name~a')), ['MTR-A', 'MTR-B', 'MTR-C'])
+        self.assertEqual(self.pids('where=name~RAV'), ['MTR-B'])
+
+    def test_clauses_are_anded(self):
+        self.assertEqual(self.pids('where=manufacturer=T-Motor;compatibility.cell_count_max<7'), ['MTR-A'])
+        self.assertEqual(self.pids('where=manufacturer=T-Motor&where=weight_g>30'), ['MTR-A'])
+
+    def test_not_equal_excludes_missing(self):
+        self.assertEqual(self.pids('where=compatibility.motor_mount_bolt_size!=M3'), ['MTR-B'])
+
+    def test_array_membership(self):
+        self.assertEqual(self.pids('where=compatibility.patterns=30.5'), ['MTR-C'])
+
+    def test_boolean(self):
+        self.assertEqual(self.pids('where=is_new=true'), ['MTR-A'])
+
+    def test_price(self):
+        self.assertEqual(self.pids('where=price<20'), ['MTR-B'])
+
+    def test_sort_numeric_missing_last(self):
+        self.assertEqual(self.pids('sort=-weight_g'), ['MTR-A', 'MTR-B', 'MTR-C'])
+        self.assertEqual(self.pids('sort=weight_g'), ['MTR-B', 'MTR-A', 'MTR-C'])
+        self.assertEqual(self.pids('sort=price'), ['MTR-B', 'MTR-A', 'MTR-C'])
+        self.assertEqual(self.pids('sort=-name'), ['MTR-C', 'MTR-B', 'MTR-A'])
+
+    def test_invalid_clause(self):
+        resp = self.client.get('/api/components/?where=weight_g')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get("/api/components/?where=weight_g>abc")
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get("/api/components/?sort=schema_data.a'b")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_sort_with_pagination_rejected(self):
+        resp = self.client.get('/api/components/?sort=name&page_size=2')
+        self.assertEqual(resp.status_code, 400)
+
+    def test_expression_index_used(self):
+        from .query import ensure_query_indexes, JSONNumber
+        self.assertIn('dc_q_compatibility__cell_count_max', ensure_query_indexes())
+        qs = (Component.objects.filter(category=self.cat)
+              .alias(x=JSONNumber('compatibility.cell_count_max')).filter(x__gte=6))
+        plan = qs.explain()
+        self.assertIn('dc_q_compatibility__cell_count_max', plan)
+        self.assertEqual(qs.count(), 2)
+
+
+class ComponentSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        motors = make_category(name='Motors', slug='motors')
+        frames = make_category(name='Frames', slug='frames')
+        make_component(motors, pid='MTR-A', name='Velox 2207', manufacturer='T-Motor',
+                       description='Freestyle motor', schema_data={'tags': ['freestyle'], 'stator_size': '2207'})
+        make_component(motors, pid='MTR-B', name='Xing 2306', manufacturer='iFlight',
+                       description='Smooth motor for T-Motor style builds')
+        make_component(frames, pid='FRM-A', name='Source One', manufacturer='TBS',
+                       description='Budget frame', schema_data={'tags': ['freestyle', 'budget']})
+
+    def pids(self, query):
+        resp = self.client.get(f'/api/components/?{query}')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return [c['pid'] for c in resp.data]
+
+    def test_ranked_across_categories(self):
+        # Manufacturer hit outranks a description mention
+        self.assertEqual(self.pids('q=t-motor'), ['MTR-A', 'MTR-B'])
+        self.assertEqual(sorted(self.pids('q=freestyle')), ['FRM-A', 'MTR-A'])
+
+    def test_prefix_and_all_words(self):
+        self.assertEqual(self.pids('q=vel'), ['MTR-A'])
+        self.assertEqual(self.pids('q=motor%202306'), ['MTR-B'])
+        self.assertEqual(self.pids('q=%22)(*'), [])
+
+    def test_index_follows_writes(self):
+        comp = Component.objects.get(pid='FRM-A')
+        comp.name = 'Apex Evo'
+        comp.save()
+        self.assertEqual(self.pids('q=apex'), ['FRM-A'])
+        self.assertEqual(self.pids('q=source'), [])
+        comp.delete()
+        self.assertEqual(self.pids('q=apex'), [])
+
+    def test_composes_with_filters(self):
+        self.assertEqual(self.pids('q=freestyle&category=motors'), ['MTR-A'])
+        self.assertEqual(self.pids('q=motor&sort=-name'), ['MTR-B', 'MTR-A'])
+
+
+class CategoryFacetsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+        make_component(self.cat, pid='MTR-A', manufacturer='T-Motor',
+                       schema_data={'motor_size': '2207', 'kv_rating': 1750, 'weight_g': 32,
+                                    'compatibility': {'cell_count_max': 6}})
+        make_component(self.cat, pid='MTR-B', manufacturer='iFlight',
+                       schema_data={'motor_size': '2306', 'kv_rating': '2450KV', 'weight_g': 30,
+                                    'compatibility': {'cell_count_max': 4}})
+        make_component(self.cat, pid='MTR-C', manufacturer='T-Motor',
+                       schema_data={'motor_size': '2207', 'kv_rating': 1950,
+                                    'compatibility': {'cell_count_max': 6}})
+
+    def facets(self, query=''):
+        resp = self.client.get(f'/api/categories/motors/facets/?{query}')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data, {f['path']: f for f in resp.data['facets']}
+
+    def test_select_counts_and_ranges(self):
+        data, facets = self.facets()
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(facets['schema_data.motor_size']['values'],
+                         [{'value': '2207', 'count': 2}, {'value': '2306', 'count': 1}])
+        kv = facets['schema_data.kv_rating']
+        self.assertEqual((kv['min'], kv['max'], kv['count']), (1750, 2450, 3))
+        self.assertEqual(sum(b['count'] for b in kv['histogram']), 3)
+        self.assertEqual(len(kv['histogram']), 10)
+        self.assertEqual(kv['histogram'][-1]['count'], 1)
+
+    def test_conditional_counts(self):
+        data, facets = self.facets('where=compatibility.cell_count_max>=6')
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(facets['manufacturer']['values'], [{'value': 'T-Motor', 'count': 2}])
+        # A facet's own clause does not narrow its options
+        _, facets = self.facets('where=manufacturer=iFlight')
+        self.assertEqual(facets['manufacturer']['distinct'], 2)
+        self.assertEqual(facets['schema_data.motor_size']['values'], [{'value': '2306', 'count': 1}])
+
+    def test_index_follows_writes(self):
+        comp = Component.objects.get(pid='MTR-B')
+        comp.schema_data['motor_size'] = '2207'
+        comp.save()
+        _, facets = self.facets()
+        self.assertEqual(facets['schema_data.motor_size']['values'], [{'value': '2207', 'count': 3}])
+        comp.delete()
+        _, facets = self.facets()
+        self.assertEqual(facets['schema_data.kv_rating']['max'], 1950)
+
+    def test_unknown_category(self):
+        resp = self.client.get('/api/categories/nope/facets/')
+        self.assertEqual(resp.status_code, 404)
+
+
+class CatalogueETagTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+        self.comp = make_component(self.cat)
+
+    def test_version_bumps_on_writes(self):
+        from .catalogue import get_version
+        v0 = get_version()
+        self.comp.name = 'Renamed'
+        self.comp.save()
+        v1 = get_version()
+        self.assertGreater(v1, v0)
+        DroneModel.objects.create(pid='DM-1', name='Build')
+        self.assertGreater(get_version(), v1)
+
+    def test_batch_writes_bump_once(self):
+        from .catalogue import get_version
+        v0 = get_version()
+        resp = self.client.post('/api/import/parts/', [
+            {'pid': 'MTR-0100', 'category': 'motors', 'name': 'A'},
+            {'pid': 'MTR-0101', 'category': 'motors', 'name': 'B'},
+        ], format='json')
+        self.assertEqual(resp.data['created'], 2)
+        self.assertEqual(get_version(), v0 + 1)
+
+    def test_not_modified_until_write(self):
+        for url in ('/api/components/', '/api/categories/', '/api/drone-models/',
+                    f'/api/components/{self.comp.pid}/'):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            etag = resp['ETag']
+            self.assertTrue(etag.startswith('"v'))
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 304)
+            self.assertEqual(len(ctx.captured_queries), 1)
+            self.assertEqual(resp['ETag'], etag)
+
+        etag = self.client.get('/api/components/')['ETag']
+        self.assertNotEqual(self.client.get('/api/components/?category=motors')['ETag'], etag)
+        make_component(self.cat, pid='MTR-0002')
+        resp = self.client.get('/api/components/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data), 2)
+
+
+class CatalogueSnapshotTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = override_settings(CATALOGUE_SNAPSHOT_DIR=self.tmpdir)
+        self.settings_override.enable()
+        self.cat = make_category()
+        make_component(self.cat)
+        DroneModel.objects.create(pid='DM-1', name='Build')
+
+    def tearDown(self):
+        import shutil
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def body(self, resp):
+        import gzip
+        data = b''.join(resp.streaming_content)
+        if resp.get('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return json.loads(data)
+
+    def test_snapshot_contents_and_encodings(self):
+        resp = self.client.get('/api/catalogue/snapshot/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn('Content-Encoding', resp)
+        data = self.body(resp)
+        self.assertEqual([c['pid'] for c in data['components']], ['MTR-0001'])
+        self.assertEqual(data['categories'][0]['count'], 1)
+        self.assertEqual(data['drone_models'][0]['pid'], 'DM-1')
+
+        resp = self.client.get('/api/catalogue/snapshot/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertEqual(self.body(resp), data)
+
+    def test_revalidation_and_immutable_blob(self):
+        resp = self.client.get('/api/catalogue/snapshot/')
+        etag, location = resp['ETag'], resp['Content-Location']
+        self.assertEqual(resp['Cache-Control'], 'no-cache')
+        resp = self.client.get('/api/catalogue/snapshot/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        blob = self.client.get(location)
+        self.assertEqual(blob.status_code, 200)
+        self.assertIn('immutable', blob['Cache-Control'])
+
+        make_component(self.cat, pid='MTR-0002')
+        resp = self.client.get('/api/catalogue/snapshot/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self.body(resp)['components']), 2)
+        self.assertNotEqual(resp['Content-Location'], location)
+        # The previous snapshot survives one write, older ones are removed from disk
+        self.assertEqual(self.client.get(location).status_code, 200)
+        make_component(self.cat, pid='MTR-0003')
+        self.assertEqual(self.client.get('/api/catalogue/snapshot/').status_code, 200)
+        self.assertEqual(self.client.get(location).status_code, 404)
+        self.assertEqual(self.client.get('/api/catalogue/snapshot/zz/').status_code, 404)
+
+    def test_snapshot_deleted_while_serving(self):
+        location = self.client.get('/api/catalogue/snapshot/')['Content-Location']
+        missing = (os.path.join(self.tmpdir, 'gone.json'), None)
+        with patch('components.snapshot.pick_variant', return_value=missing):
+            self.assertEqual(self.client.get(location).status_code, 404)
+
+
+class CatalogueResponseCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+        make_component(self.cat)
+
+    def test_hit_skips_queryset_and_serializer(self):
+        first = self.client.get('/api/components/?category=motors')
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get('/api/components/?category=motors')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(ctx.captured_queries), 1)  # catalogue version only
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_writes_invalidate(self):
+        self.assertEqual(self.client.get('/api/categories/').json()[0]['count'], 1)
+        make_component(self.cat, pid='MTR-0002')
+        self.assertEqual(self.client.get('/api/categories/').json()[0]['count'], 2)
+        self.client.post('/api/import/parts/', [{'pid': 'MTR-0003', 'category': 'motors', 'name': 'C'}],
+                         format='json')
+        self.assertEqual(len(self.client.get('/api/components/').json()), 3)
+        Component.objects.get(pid='MTR-0003').delete()
+        self.assertEqual(len(self.client.get('/api/components/').json()), 2)
+
+    def test_query_params_are_separate_entries(self):
+        make_component(make_category('Frames', 'frames'), pid='FRM-0001')
+        self.assertEqual(len(self.client.get('/api/components/').json()), 2)
+        self.assertEqual(len(self.client.get('/api/components/?category=frames').json()), 1)
+        self.assertEqual(set(self.client.get('/api/components/?fields=pid').json()[0]), {'pid'})
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+
+    def test_batched_upsert_report(self):
+        from .importer import import_parts
+        make_component(self.cat, pid='MTR-0002', name='Old')
+        parts = [
+            {'pid': 'MTR-0001', 'category': 'motors', 'name': 'A', 'kv': 1},
+            {'pid': 'MTR-0002', 'category': 'motors', 'name': 'B'},
+            'not a dict',
+            {'pid': 'MTR-0003', 'category': 'nope', 'name': 'C'},
+            {'pid': 'MTR-0001', 'category': 'motors', 'name': 'A2', 'kv': 2},
+            {'pid': 'MTR-0004', 'category': 'motors', 'name': 'D'},
+        ]
+        report = import_parts(parts, batch_size=2)
+        self.assertEqual((report['created'], report['updated']), (2, 2))
+        self.assertEqual([e['index'] for e in report['errors']], [2, 3])
+        a = Component.objects.get(pid='MTR-0001')
+        self.assertEqual((a.name, a.schema_data), ('A2', {'kv': 2}))
+        self.assertEqual(Component.objects.get(pid='MTR-0002').name, 'B')
+
+    def test_query_count_is_per_batch(self):
+        parts = [{'pid': f'MTR-{i:04d}', 'category': 'motors', 'name': f'M{i}'} for i in range(300)]
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.post('/api/import/parts/', parts, format='json')
+        self.assertEqual(resp.data['created'], 300)
+        self.assertLess(len(ctx.captured_queries), 20)
+
+    def test_indexes_follow_bulk_writes(self):
+        from .models import ComponentFacet
+        self.client.post('/api/import/parts/', [
+            {'pid': 'MTR-0001', 'category': 'motors', 'name': 'Zephyr', 'manufacturer': 'T-Motor'},
+        ], format='json')
+        self.assertTrue(ComponentFacet.objects.filter(component__pid='MTR-0001', value='T-Motor').exists())
+        resp = self.client.get('/api/components/?q=zephyr')
+        self.assertEqual([c['pid'] for c in resp.data], ['MTR-0001'])
+
+    def test_index_failure_rolls_back_the_batch(self):
+        from .importer import import_parts
+        from .models import ComponentFacet
+        parts = [{'pid': 'MTR-0001', 'category': 'motors', 'name': 'A', 'manufacturer': 'T-Motor'}]
+        # The batch rolls back as a whole; the row-by-row retry goes through model signals
+        with patch('components.importer.compat_index.index_components', side_effect=RuntimeError('boom')), \
+                patch('components.importer.PartsImporter._upsert_rows') as retry:
+            import_parts(parts)
+        retry.assert_called_once()
+        self.assertFalse(Component.objects.filter(pid='MTR-0001').exists())
+        self.assertFalse(ComponentFacet.objects.exists())
+
+    def test_pid_and_category_types(self):
+        from .importer import import_parts
+        report = import_parts([
+            {'pid': 42, 'category': 'motors', 'name': 'A'},
+            {'pid': ['x'], 'category': 'motors', 'name': 'B'},
+            {'pid': 'MTR-0003', 'category': 7, 'name': 'C'},
+        ])
+        self.assertEqual(report['created'], 1)
+        self.assertEqual([e['error'] for e in report['errors']],
+                         ['pid must be a string or number and category a string.'] * 2)
+
+    def test_numeric_pid_updates_in_batch(self):
+        from .importer import PartsImporter, import_parts
+        make_component(self.cat, pid='42')
+        with patch.object(PartsImporter, '_upsert_rows') as fallback:
+            report = import_parts([{'pid': 42, 'category': 'motors', 'name': 'Renamed'}])
+        fallback.assert_not_called()
+        self.assertEqual((report['created'], report['updated'], report['errors']), (0, 1, []))
+        self.assertEqual(Component.objects.get(pid='42').name, 'Renamed')
+
+
+class NDJSONImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+
+    def post_lines(self, lines, query=''):
+        body = '\n'.join(lines).encode()
+        resp = self.client.post(f'/api/import/parts/{query}', body, content_type='application/x-ndjson')
+        results = [json.loads(line) for line in b''.join(resp.streaming_content).splitlines()]
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'application/x-ndjson')
+        return results
+
+    def test_streams_line_errors_and_summary(self):
+        make_component(self.cat, pid='MTR-0002', name='Old')
+        results = self.post_lines([
+            json.dumps({'pid': 'MTR-0001', 'category': 'motors', 'name': 'A'}),
+            '{not json',
+            '',
+            json.dumps({'pid': 'MTR-0002', 'category': 'motors', 'name': 'B'}),
+            json.dumps({'pid': 'MTR-0003', 'category': 'nope', 'name': 'C'}),
+        ], query='?batch_size=2')
+        self.assertEqual([(r['line'], r['pid']) for r in results[:-1]], [(2, None), (5, 'MTR-0003')])
+        self.assertIn('Invalid JSON', results[0]['error'])
+        self.assertEqual(results[-1], {'done': True, 'created': 1, 'updated': 1, 'errors': 2, 'lines': 5})
+        self.assertEqual(Component.objects.get(pid='MTR-0002').name, 'B')
+
+    def test_body_is_not_subject_to_upload_limit(self):
+        lines = [json.dumps({'pid': f'MTR-{i:04d}', 'category': 'motors', 'name': 'x' * 200}) for i in range(50)]
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=1024):
+            results = self.post_lines(lines)
+        self.assertEqual(results[-1]['created'], 50)
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.cat = make_category()
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = override_settings(IMPORT_JOBS_DIR=self.tmpdir)
+        self.settings_override.enable()
+        # Run the worker inline: a thread could not see this test's transaction
+        from .jobs import run_job
+        self.inline = patch('components.jobs.start_job', side_effect=run_job)
+        self.inline.start()
+
+    def tearDown(self):
+        import shutil
+        self.inline.stop()
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def submit(self, body, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post('/api/import/jobs/', body, **kwargs)
+        self.assertEqual(resp.status_code, 202, getattr(resp, 'data', None))
+        self.assertEqual(resp['Location'], resp.data['url'])
+        return self.client.get(resp.data['url']).data
+
+    def test_json_job_runs_and_reports(self):
+        job = self.submit([
+            {'pid': 'MTR-0001', 'category': 'motors', 'name': 'A'},
+            {'pid': 'MTR-0002', 'category': 'nope', 'name': 'B'},
+        ], format='json')
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual((job['created_count'], job['updated_count'], job['error_count']), (1, 0, 1))
+        self.assertEqual(job['errors'][0]['index'], 1)
+        self.assertEqual(job['progress'], 1.0)
+        self.assertTrue(Component.objects.filter(pid='MTR-0001').exists())
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_ndjson_job(self):
+        body = b'{"pid": "MTR-0001", "category": "motors", "name": "A"}\n{oops\n'
+        job = self.submit(body, content_type='application/x-ndjson')
+        self.assertEqual(job['format'], 'ndjson')
+        self.assertEqual(job['errors'][0]['line'], 2)
+        self.assertEqual(job['created_count'], 1)
+
+    def test_bad_body_and_unknown_job(self):
+        resp = self.client.post('/api/import/jobs/', {'a': 1}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.get('/api/import/jobs/00000000-0000-0000-0000-000000000000/')
+        self.assertEqual(resp.status_code, 404)
+
+    def test_stale_running_job_is_failed(self):
+        from .jobs import STALE_AFTER, payload_path
+        from .models import ImportJob
+        job = ImportJob.objects.create(status='running')
+        ImportJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - STALE_AFTER * 2)
+        open(payload_path(job.pk), 'wb').close()
+        data = self.client.get(f'/api/import/jobs/{job.pk}/').data
+        self.assertEqual(data['status'], 'failed')
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_queued_job_with_payload_is_resumed(self):
+        from .jobs import payload_path, resume_jobs
+        from .models import ImportJob
+        job = ImportJob.objects.create(format='ndjson')
+        with open(payload_path(job.pk), 'wb') as f:
+            f.write(b'{"pid": "MTR-0001", "category": "motors", "name": "A"}\n')
+        self.assertEqual(resume_jobs(), [job.pk])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.created_count), ('succeeded', 1))
+        self.assertEqual(os.listdir(self.tmpdir), [])
+        # A job another process already claimed is left alone
+        from .jobs import run_job
+        run_job(job.pk)
+        self.assertEqual(Component.objects.filter(pid='MTR-0001').count(), 1)
+
+    def test_queued_job_without_payload_is_failed(self):
+        from .jobs import resume_jobs
+        from .models import ImportJob
+        job = ImportJob.objects.create()
+        self.assertEqual(resume_jobs(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('payload', job.message)
+
+
+class ExportV2CatalogueTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        motors = make_category()
+        make_category(name='Servos', slug='servos')
+        escs = make_category(name='ESCs', slug='escs')
+        make_component(motors, pid='MTR-0002', schema_data={'kv': 1700})
+        make_component(motors, pid='MTR-0001', schema_data={'kv': 2400})
+        make_component(escs, pid='ESC-0001', name='Test ESC')
+        DroneModel.objects.create(pid='MDL-0001', name='Quad', relations={'motors': [{'pid': 'MTR-0001'}]})
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def export(self, *args):
+        from django.core.management import call_command
+        out = io.StringIO()
+        call_command('export_v2_catalogue', *args, stdout=out)
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_export_document(self):
+        path = os.path.join(self.tmpdir, 'catalogue.json')
+        self.export('--output', path, '--chunk-size', '1')
+        with open(path, encoding='utf-8') as f:
+            doc = json.load(f)
+        self.assertEqual(doc['schema_version'], 'v2')
+        self.assertEqual(list(doc['components']), ['motors', 'servos', 'escs'])
+        self.assertEqual([c['pid'] for c in doc['components']['motors']], ['MTR-0001', 'MTR-0002'])
+        self.assertEqual(doc['components']['motors'][0]['kv'], 2400)
+        self.assertEqual(doc['components']['servos'], [])
+        self.assertEqual(doc['drone_models'][0]['relations']['motors'][0]['pid'], 'MTR-0001')
+        self.assertEqual(os.listdir(self.tmpdir), ['catalogue.json'])
+
+    def test_compressed_export(self):
+        import gzip
+        import lzma
+        for compress, opener in (('gzip', gzip.open), ('xz', lzma.open)):
+            path = os.path.join(self.tmpdir, f'catalogue.{compress}')
+            self.export('--output', path, '--compress', compress)
+            with opener(path, 'rt', encoding='utf-8') as f:
+                doc = json.load(f)
+            self.assertEqual(len(doc['components']['motors']), 2)
+
+
+class SeedTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = override_settings(SEED_SNAPSHOT_DIR=self.tmpdir)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        import shutil
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def catalogue_rows(self):
+        from .models import ComponentFacet
+        return (
+            list(Category.objects.order_by('pk').values_list('pk', 'slug')),
+            list(Component.objects.order_by('pk').values_list('pk', 'pid', 'category_id', 'schema_data')),
+            ComponentFacet.objects.count(),
+            list(DroneModel.objects.order_by('pk').values_list('pid', 'relations')),
+            list(BuildGuideStep.objects.order_by('pk').values_list('guide__pid', 'order', 'title')),
+        )
+
+    def test_seed_golden_bulk(self):
+        from .catalogue import get_version
+        from .models import ComponentFacet
+        from .seed import seed_golden
+        make_component(make_category(), pid='MTR-OLD')
+        version = get_version()
+        result = seed_golden(wipe=True, use_snapshot=False)
+        self.assertEqual(result['deleted_components'], 1)
+        self.assertEqual(Component.objects.count(), result['components'])
+        self.assertFalse(Component.objects.filter(pid='MTR-OLD').exists())
+        self.assertEqual(DroneModel.objects.count(), result['drone_models'])
+        self.assertEqual(BuildGuide.objects.count(), result['build_guides'])
+        self.assertTrue(BuildGuideStep.objects.exists())
+        self.assertIn('components', result['timings'])
+        self.assertEqual(get_version(), version + 1)
+        self.assertEqual(os.listdir(self.tmpdir), [])
+        # bulk_create skips signals: facets are indexed by the seed itself
+        motor = Component.objects.filter(category__slug='motors').first()
+        self.assertTrue(ComponentFacet.objects.filter(component=motor, path='manufacturer').exists())
+        resp = self.client.get('/api/components/', {'q': motor.name.split()[0]})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(motor.pid, json.dumps(resp.json()))
+
+    def test_reset_restores_from_snapshot(self):
+        from .seed import seed_golden
+        first = seed_golden(wipe=True)
+        self.assertIn('snapshot', first['timings'])
+        self.assertEqual(len(os.listdir(self.tmpdir)), 1)
+        rows = self.catalogue_rows()
+
+        second = seed_golden(wipe=True)
+        self.assertIn('restore', second['timings'])
+        self.assertNotIn('components', second['timings'])
+        self.assertEqual(second['deleted_components'], first['components'])
+        for key in ('categories', 'components', 'drone_models', 'build_guides'):
+            self.assertEqual(second[key], first[key])
+        self.assertEqual(self.catalogue_rows(), rows)
+        # FTS rows come from the triggers during the copy
+        motor = Component.objects.filter(category__slug='motors').first()
+        resp = self.client.get('/api/components/', {'q': motor.name.split()[0]})
+        self.assertIn(motor.pid, json.dumps(resp.json()))
+
+    def test_snapshot_matches_json_seed(self):
+        from .models import ComponentCompat, ComponentFacet
+        from .normalize import COLUMNS
+        from .seed import seed_golden
+
+        def rows():
+            return (
+                sorted(Category.objects.values_list('slug', 'name')),
+                sorted(Component.objects.values_list('pid', 'category__slug', 'name', 'manufacturer',
+                                                     'link', 'approx_price', 'schema_data')),
+                sorted(ComponentFacet.objects.values_list('component__pid', 'category__slug', 'path',
+                                                          'value', 'number')),
+                sorted(ComponentCompat.objects.values_list('component__pid', 'category__slug', 'role', *COLUMNS),
+                       key=repr),
+                sorted(DroneModel.objects.values_list('pid', 'relations')),
+                sorted(BuildGuide.objects.values_list('pid', 'drone_model__pid', 'settings')),
+                sorted(BuildGuideStep.objects.values_list('guide__pid', 'order', 'title', 'media')),
+            )
+
+        seed_golden(wipe=True, use_snapshot=False)
+        from_json = rows()
+        seed_golden(wipe=True)
+        self.assertEqual(rows(), from_json)
+
+    def test_snapshot_is_built_without_touching_the_database(self):
+        from .seed import _golden_objects
+        from .seed_snapshot import write_snapshot
+        with self.assertNumQueries(0):
+            write_snapshot('0' * 16, _golden_objects())
+        self.assertEqual(os.listdir(self.tmpdir), ['seed-' + '0' * 16 + '.sqlite3'])
+
+    def test_snapshot_follows_seed_inputs(self):
+        from . import seed_snapshot
+        from .seed import seed_golden
+        seed_golden(wipe=True)
+        old = os.listdir(self.tmpdir)
+        # Anything covered by the hash (here the format) forces a JSON seed
+        with patch.object(seed_snapshot, 'SNAPSHOT_FORMAT', seed_snapshot.SNAPSHOT_FORMAT + 1):
+            result = seed_golden(wipe=True)
+        self.assertIn('snapshot', result['timings'])
+        new = os.listdir(self.tmpdir)
+        self.assertEqual(len(new), 1)
+        self.assertNotEqual(new, old)
+
+    def test_hash_covers_row_builders(self):
+        from . import facets, seed, seed_snapshot
+        paths = seed._seed_input_paths()
+        base = seed_snapshot.seed_hash(paths)
+        for module in (seed, facets):
+            changed = os.path.join(self.tmpdir, os.path.basename(module.__file__))
+            with open(module.__file__, 'rb') as src, open(changed, 'wb') as dst:
+                dst.write(src.read() + b'\n# changed\n')
+            with patch.object(module, '__file__', changed):
+                self.assertNotEqual(seed_snapshot.seed_hash(paths), base, module.__name__)
+
+    def test_restore_stamps_timestamps(self):
+        from .seed import seed_golden
+        seed_golden(wipe=True)
+        before = timezone.now()
+        seed_golden(wipe=True)
+        guide = BuildGuide.objects.first()
+        self.assertGreaterEqual(guide.created_at, before)
+        self.assertGreaterEqual(guide.updated_at, before)
+
+    def test_seed_examples(self):
+        from .seed import seed_examples
+        result = seed_examples()
+        self.assertGreater(result['components'], 0)
+        self.assertEqual(Component.objects.count(), result['components'])
+        self.assertEqual(Category.objects.count(), result['categories'])
+
+
+class JournalModeTests(TestCase):
+    def journal_mode(self, mode):
+        """Journal mode of a fresh file database after Django opens it (connection_created)."""
+        import shutil
+        import sqlite3
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        path = os.path.join(tmpdir, 'db.sqlite3')
+        from django.db import connections
+        wrapper = type(connections['default'])({**connection.settings_dict, 'NAME': path}, alias='journal_test')
+        with self.settings(SQLITE_JOURNAL_MODE=mode):
+            try:
+                wrapper.ensure_connection()
+            finally:
+                wrapper.close()
+        return sqlite3.connect(path).execute('PRAGMA journal_mode').fetchone()[0]
+
+    def test_journal_mode_setting(self):
+        self.assertEqual(self.journal_mode('WAL'), 'wal')
+        self.assertEqual(self.journal_mode('delete'), 'delete')
+        self.assertEqual(self.journal_mode(''), 'delete')
+        with self.assertRaises(ValueError):
+            self.journal_mode('BOGUS')
+
+
+class AutoSeedTests(TestCase):
+    def setUp(self):
+        from . import autoseed
+        self.autoseed = autoseed
+        self.ready_patch = patch.object(autoseed, '_ready', False)
+        self.ready_patch.start()
+        make_component(make_category())
+
+    def tearDown(self):
+        self.ready_patch.stop()
+
+    def test_ready_without_background_seed(self):
+        resp = self.client.get('/api/health/ready/')
+        self.assertEqual((resp.status_code, resp.json()), (200, {'status': 'ready'}))
+        self.assertEqual(self.client.get('/api/components/').status_code, 200)
+
+    def test_pending_seed_gates_catalogue(self):
+        self.autoseed.mark_pending()
+        for url in ('/api/components/', '/api/categories/', '/api/drone-models/',
+                    '/api/export/parts/', '/api/build-guides/'):
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 503, url)
+            self.assertEqual(resp.json()['status'], 'seeding')
+            self.assertEqual(resp['Retry-After'], '5')
+        resp = self.client.post('/api/import/parts/', '[]', content_type='application/json')
+        self.assertEqual(resp.status_code, 503)
+        resp = self.client.get('/api/health/ready/')
+        self.assertEqual((resp.status_code, resp.json()['status']), (503, 'pending'))
+
+    def test_run_seed(self):
+        self.autoseed.mark_pending()
+        self.assertTrue(self.autoseed.claim_seed())
+        self.assertFalse(self.autoseed.claim_seed())  # one process wins
+        self.assertEqual(self.client.get('/api/health/ready/').json()['status'], 'seeding')
+        with patch('components.seed.seed_golden', return_value={
+                'categories': 1, 'components': 1, 'drone_models': 0, 'build_guides': 0}) as seed, \
+                patch('builtins.print'):
+            self.autoseed.run_seed()
+        seed.assert_called_once_with(wipe=False)
+        self.assertEqual(self.client.get('/api/health/ready/').status_code, 200)
+        self.assertEqual(self.client.get('/api/components/').status_code, 200)
+
+    def test_failed_seed_is_retried(self):
+        from .models import SeedStatus
+        self.autoseed.mark_pending()
+        self.autoseed.claim_seed()
+        with patch('components.seed.seed_golden', side_effect=RuntimeError('boom')), patch('builtins.print'):
+            self.autoseed.run_seed()
+        status_row = SeedStatus.objects.get(pk=1)
+        self.assertEqual((status_row.state, status_row.message), ('failed', 'boom'))
+        # Readiness and the catalogue views agree: not ready
+        self.assertEqual(self.client.get('/api/health/ready/').json()['status'], 'failed')
+        resp = self.client.get('/api/components/')
+        self.assertEqual((resp.status_code, resp.json()['status']), (503, 'failed'))
+        # The next start claims the failed seed again
+        with patch('components.autoseed.threading.Thread') as thread, override_settings(AUTO_SEED='background'):
+            self.assertIsNotNone(self.autoseed.start_background_seed())
+        thread.return_value.start.assert_called_once()
+        self.assertEqual(SeedStatus.objects.get(pk=1).state, 'seeding')
+
+    def test_start_background_seed_before_migrate(self):
+        from django.db import OperationalError
+        with override_settings(AUTO_SEED='background'), \
+                patch('components.autoseed.seed_state', side_effect=OperationalError('no such table')):
+            self.assertIsNone(self.autoseed.start_background_seed())
+
+    def test_stale_claim_can_be_taken_over(self):
+        from .models import SeedStatus
+        self.autoseed.mark_pending()
+        self.autoseed.claim_seed()
+        self.assertFalse(self.autoseed.claim_seed())
+        SeedStatus.objects.filter(pk=1).update(updated_at=timezone.now() - self.autoseed.STALE_AFTER * 2)
+        self.assertTrue(self.autoseed.claim_seed())
+
+    def test_start_background_seed(self):
+        self.autoseed.mark_pending()
+        with patch('components.autoseed.threading.Thread') as thread:
+            self.assertIsNone(self.autoseed.start_background_seed())  # AUTO_SEED defaults to 'sync'
+            with override_settings(AUTO_SEED='background'):
+                self.autoseed.start_background_seed()
+                self.autoseed.start_background_seed()
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+
+
+class ImportJsonDbTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'drone_database.json')
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def run_import(self, document, *args):
+        from django.core.management import call_command
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        out = io.StringIO()
+        call_command('import_json_db', '--file', self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_import_upserts_by_pid(self):
+        make_component(make_category(), pid='MTR-0001', name='Old name')
+        document = {
+            'schema_version': 'v2',
+            'components': {
+                'motors': [
+                    {'pid': 'MTR-0001', 'name': 'Motor 1', 'approx_price': 19.5, 'kv_rating': 2400},
+                    {'pid': 'MTR-0002', '_approx_price': '$21.00', 'category': 'ignored'},
+                    {'name': 'No PID'},
+                ],
+                'flight_controllers': [{'pid': 'FC-0001', 'name': 'FC', 'mcu': 'F7' * 50000}],
+                'frames': [],
+            },
+            'drone_models': [{'pid': 'MDL-0001'}],
+        }
+        with patch('components.management.commands.import_json_db.READ_CHUNK', 7):
+            output = self.run_import(document, '--batch-size', '2')
+        self.assertIn('2 created, 1 updated, 0 errors', output)
+        self.assertIn('components/s', output)
+        motor = Component.objects.get(pid='MTR-0001')
+        self.assertEqual((motor.name, motor.approx_price, motor.schema_data), ('Motor 1', '$19.50', {'kv_rating': 2400}))
+        motor2 = Component.objects.get(pid='MTR-0002')
+        self.assertEqual((motor2.name, motor2.approx_price, motor2.schema_data), ('Unnamed', '$21.00', {}))
+        self.assertEqual(Component.objects.get(pid='FC-0001').category.name, 'Flight Controllers')
+        self.assertTrue(Category.objects.filter(slug='frames').exists())
+        from .models import ComponentFacet
+        self.assertTrue(ComponentFacet.objects.filter(component=motor, path='schema_data.kv_rating').exists())
+
+    def test_invalid_json(self):
+        from django.core.management.base import CommandError
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"components": {"motors": [{"pid": "MTR-0001", "name": "M"} {')
+        from django.core.management import call_command
+        with self.assertRaisesMessage(CommandError, 'Invalid JSON'):
+            call_command('import_json_db', '--file', self.path, stdout=io.StringIO())
+        self.assertEqual(Component.objects.get().pid, 'MTR-0001')
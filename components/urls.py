@@ -12,8 +12,21 @@ router.register(r'build-sessions', views.BuildSessionViewSet, basename='buildses
 urlpatterns = [
     path('api/', include(router.urls)),
     path('api/schema/', views.SchemaView.as_view(), name='schema-view'),
+    path('api/categories/<str:slug>/facets/', views.CategoryFacetsView.as_view(), name='category-facets'),
+    path('api/catalogue/snapshot/', views.CatalogueSnapshotView.as_view(), name='catalogue-snapshot'),
+    path('api/catalogue/snapshot/<str:content_hash>/', views.CatalogueSnapshotView.as_view(),
+         name='catalogue-snapshot-blob'),
+    path('api/components/<str:pid>/compatible/', views.ComponentCompatibleView.as_view(),
+         name='component-compatible'),
+    path('api/compat/check/', views.CompatCheckView.as_view(), name='compat-check'),
+    path('api/compat/candidates/', views.CompatCandidatesView.as_view(), name='compat-candidates'),
+    path('api/builds/solve/', views.BuildSolveView.as_view(), name='build-solve'),
+    path('api/builds/suggest/', views.BuildSuggestView.as_view(), name='build-suggest'),
     path('api/import/parts/', views.ImportPartsView.as_view(), name='import-parts'),
+    path('api/import/jobs/', views.ImportJobCreateView.as_view(), name='import-jobs'),
+    path('api/import/jobs/<uuid:job_id>/', views.ImportJobDetailView.as_view(), name='import-job-detail'),
     path('api/export/parts/', views.ExportPartsView.as_view(), name='export-parts'),
+    path('api/health/ready/', views.ReadinessView.as_view(), name='health-ready'),
     path('api/maintenance/restart/', views.RestartServerView.as_view(), name='restart-server'),
     path('api/maintenance/bug-report/', views.BugReportView.as_view(), name='bug-report'),
     path('api/maintenance/reset-to-golden/', views.ResetToGoldenView.as_view(), name='reset-to-golden'),
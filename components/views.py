@@ -15,11 +15,14 @@ import threading
 from django.conf import settings
 from django.db import IntegrityError, transaction
 from django.db.models import Count
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
 from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError as APIValidationError
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
@@ -28,32 +31,76 @@ from django.core.exceptions import ValidationError
 from .models import (
     Category, Component, DroneModel,
     BuildGuide, BuildGuideStep, BuildSession, StepPhoto, BuildEvent,
-    GuideMediaFile,
+    GuideMediaFile, ImportJob,
 )
 from .serializers import (
     CategorySerializer, ComponentSerializer, DroneModelSerializer,
     BuildGuideListSerializer, BuildGuideDetailSerializer,
-    BuildSessionSerializer, StepPhotoSerializer,
+    BuildSessionSerializer, StepPhotoSerializer, ImportJobSerializer,
 )
+from .autoseed import CatalogueReadyMixin
+from .catalogue import CatalogueCacheMixin, CatalogueETagMixin
+from .export import NDJSONRenderer, streaming_export
+from .pagination import KeysetPagination
+from .projection import SparseFieldsMixin
+from .query import apply_sort, apply_where, ensure_query_indexes
+from .search import apply_search
 from .upload_utils import validate_uploaded_file, ALLOWED_IMAGE_MIMES
 
 
 # ── Core CRUD ViewSets ─────────────────────────────────────
 
-class CategoryViewSet(viewsets.ModelViewSet):
-    """CRUD for component categories. Annotates each category with component count."""
+class CategoryViewSet(CatalogueReadyMixin, CatalogueETagMixin, CatalogueCacheMixin, viewsets.ModelViewSet):
+    """
+    CRUD for component categories. Annotates each category with component count.
+    Reads carry a catalogue-version ETag (If-None-Match → 304); rendered lists are cached.
+    """
     queryset = Category.objects.annotate(count=Count('components')).order_by('name')
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
-class ComponentViewSet(viewsets.ModelViewSet):
+class CategoryFacetsView(CatalogueReadyMixin, APIView):
+    """
+    GET /api/categories/<slug>/facets/
+    Filter options for a category from the precomputed facet index:
+    value counts for select fields, min/max + histogram for range fields.
+    Optional ?where= / ?q= (same syntax as /api/components/) make counts
+    conditional; ?bins=N sets the histogram resolution (default 10).
+    """
+    def get(self, request, slug):
+        from components.facets import facet_summary, DEFAULT_BINS, MAX_BINS
+        from components.query import parse_clauses
+
+        category = get_object_or_404(Category, slug=slug)
+        try:
+            bins = int(request.query_params.get('bins', DEFAULT_BINS))
+        except ValueError:
+            return Response({"error": "bins must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        bins = max(1, min(bins, MAX_BINS))
+        clauses = parse_clauses(request.query_params.getlist('where'))
+        summary = facet_summary(category, clauses, request.query_params.get('q'), bins)
+        return Response(summary, status=status.HTTP_200_OK)
+
+
+class ComponentViewSet(CatalogueReadyMixin, CatalogueETagMixin, CatalogueCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     CRUD for drone components. Supports query params:
       ?category=<slug>    — filter by category
       ?pids=PID1,PID2     — batch lookup by comma-separated PIDs
+      ?page_size=N        — opt-in keyset pagination ordered by (category, pid)
+      ?cursor=<token>     — continue from a previous page's next_cursor
+      ?fields=pid,name    — sparse fieldset
+      ?schema_fields=compatibility.cell_count_max,weight_g — schema_data projection
+      ?where=compatibility.cell_count_max>=6;manufacturer=T-Motor — filter DSL (see query.py)
+      ?where=compat.connector_type=XT60 — typed, indexed compat columns (see normalize.py)
+      ?sort=-weight_g,name — sort by core fields, price, compat columns or schema_data paths
+      ?q=t-motor 2207     — full-text search across all categories, best match first (see search.py)
+    Reads carry a catalogue-version ETag (If-None-Match → 304); rendered lists are cached.
     """
     serializer_class = ComponentSerializer
     lookup_field = 'pid'
+    pagination_class = KeysetPagination
+    projected_json_fields = ('schema_data',)
 
     def get_queryset(self):
         queryset = Component.objects.select_related('category').all()
@@ -64,13 +111,247 @@ class ComponentViewSet(viewsets.ModelViewSet):
         if pids is not None:
             pid_list = [p.strip() for p in pids.split(',') if p.strip()]
             queryset = queryset.filter(pid__in=pid_list)
+        where = self.request.query_params.getlist('where')
+        if where:
+            queryset = apply_where(queryset, where)
+        sort = self.request.query_params.get('sort')
+        q = self.request.query_params.get('q')
+        if q is not None:
+            queryset = apply_search(queryset, q, ranked=not sort)
+        if sort:
+            if self.paginator.cursor_query_param in self.request.query_params or \
+                    self.paginator.page_size_query_param in self.request.query_params:
+                raise APIValidationError({'sort': ['sort cannot be combined with keyset pagination, '
+                                                 'which always orders by (category, pid).']})
+            queryset = apply_sort(queryset, sort)
         return queryset
 
-class DroneModelViewSet(viewsets.ModelViewSet):
-    """CRUD for saved drone builds (parts recipes)."""
+class DroneModelViewSet(CatalogueReadyMixin, CatalogueETagMixin, CatalogueCacheMixin, SparseFieldsMixin, viewsets.ModelViewSet):
+    """
+    CRUD for saved drone builds (parts recipes).
+    Supports ?fields= and ?schema_fields= (paths into relations).
+    Reads carry a catalogue-version ETag (If-None-Match → 304); rendered lists are cached.
+    """
     queryset = DroneModel.objects.all()
     serializer_class = DroneModelSerializer
     lookup_field = 'pid'
+    projected_json_fields = ('relations',)
+
+
+# ── Catalogue Snapshot ──────────────────────────────────────
+
+class CatalogueSnapshotView(CatalogueReadyMixin, APIView):
+    """
+    GET /api/catalogue/snapshot/
+    GET /api/catalogue/snapshot/<hash>/
+    Whole catalogue (categories, components, drone models) as one
+    precompressed, content-hashed JSON blob (see snapshot.py). The bare URL
+    always serves the current snapshot (ETag revalidation); the hashed URL
+    named in Content-Location is immutable.
+    """
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+
+    def get(self, request, content_hash=None):
+        from components.snapshot import HASH_RE, current_snapshot, serve_snapshot, snapshot_path
+
+        if content_hash is None:
+            try:
+                return serve_snapshot(request, current_snapshot(), 'no-cache')
+            except FileNotFoundError:  # superseded twice since the lookup; rebuilds if missing
+                return serve_snapshot(request, current_snapshot(), 'no-cache')
+        if HASH_RE.match(content_hash) and os.path.exists(snapshot_path(content_hash)):
+            try:
+                return serve_snapshot(request, content_hash, self.IMMUTABLE)
+            except FileNotFoundError:  # deleted between the check and the open
+                pass
+        return Response({"error": "Snapshot not found. Fetch /api/catalogue/snapshot/ for the current one."},
+                        status=status.HTTP_404_NOT_FOUND)
+
+
+# ── Compatibility Engine ────────────────────────────────────
+
+class CompatCheckView(CatalogueReadyMixin, APIView):
+    """
+    POST /api/compat/check/
+    Body: { "build": { "<category_slug>": "<PID>", ... } }
+    Runs the compiled compatibility checks server-side.
+    Returns { status, errors, warnings: [{check, type, title, message}] }
+    """
+    def post(self, request):
+        from components.compat import get_engine, load_build, summarize
+
+        payload = request.data.get('build') if isinstance(request.data, dict) else None
+        if not isinstance(payload, dict):
+            return Response({"error": "Request body must be an object with a 'build' mapping of category to PID."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        build, missing = load_build(payload)
+        if missing:
+            return Response({"error": f"Unknown PIDs: {', '.join(missing)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        warnings = get_engine().check_build(build)
+        return Response({
+            "status": summarize(warnings),
+            "errors": sum(1 for w in warnings if w['type'] == 'error'),
+            "warnings": warnings,
+        }, status=status.HTTP_200_OK)
+
+
+class CompatCandidatesView(CatalogueReadyMixin, APIView):
+    """
+    POST /api/compat/candidates/
+    Body: { "build": { "<category_slug>": "<PID>", ... }, "category": "<slug>" }
+    Ranks every component of `category` as if slotted into the build.
+    Returns { category, build_warnings, counts, candidates: [{pid, name, status, warnings}] }
+    ordered the way the wizard renders them (compatible → warning → incompatible).
+    """
+    def post(self, request):
+        from components.compat import (
+            get_engine, load_build, load_candidates, summarize, candidate_sort_key,
+        )
+
+        data = request.data if isinstance(request.data, dict) else {}
+        payload = data.get('build', {})
+        category = data.get('category')
+        if not isinstance(payload, dict) or not category:
+            return Response({"error": "Request body must include 'category' and a 'build' mapping of category to PID."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not Category.objects.filter(slug=category).exists():
+            return Response({"error": f"Category '{category}' not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        build, missing = load_build(payload)
+        if missing:
+            return Response({"error": f"Unknown PIDs: {', '.join(missing)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        parts, names = load_candidates(category)
+        build_warnings, per_candidate = get_engine().rank_candidates(build, category, parts)
+
+        results = []
+        counts = {'compatible': 0, 'warning': 0, 'incompatible': 0}
+        for part, name, warnings in zip(parts, names, per_candidate):
+            candidate_status = summarize(build_warnings + warnings)
+            counts[candidate_status] += 1
+            results.append((
+                candidate_sort_key(candidate_status, build_warnings + warnings, name, part.data),
+                {"pid": part.pid, "name": name, "status": candidate_status, "warnings": warnings},
+            ))
+        results.sort(key=lambda r: r[0])
+
+        return Response({
+            "category": category,
+            "build_warnings": build_warnings,
+            "counts": counts,
+            "candidates": [r[1] for r in results],
+        }, status=status.HTTP_200_OK)
+
+
+class ComponentCompatibleView(CatalogueReadyMixin, APIView):
+    """
+    GET /api/components/<pid>/compatible/?category=<slug>[&status=compatible,warning]
+    Every component of `category` with its status against <pid>, read from
+    the materialized compatibility index (see compat_index.py).
+    Returns { pid, category, counts, candidates: [{pid, name, status, checks}] }
+    ordered compatible → warning → incompatible.
+    """
+    def get(self, request, pid):
+        from components.compat_index import STATUSES, compatible_parts, partner_categories
+
+        component = get_object_or_404(Component.objects.select_related('category'), pid=pid)
+        category = request.query_params.get('category')
+        if not category:
+            return Response({"error": "The 'category' query parameter is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        partners = partner_categories(component.category.slug)
+        if category not in partners:
+            return Response({
+                "error": f"No compatibility checks connect '{component.category.slug}' and '{category}'.",
+                "categories": partners,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        statuses = [s for s in request.query_params.get('status', '').split(',') if s]
+        unknown = [s for s in statuses if s not in STATUSES]
+        if unknown:
+            return Response({"error": f"Unknown status: {', '.join(unknown)}. Use {', '.join(STATUSES)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        candidates = compatible_parts(component, category)
+        counts = {s: 0 for s in STATUSES}
+        for candidate in candidates:
+            counts[candidate['status']] += 1
+        if statuses:
+            candidates = [c for c in candidates if c['status'] in statuses]
+        return Response({
+            "pid": component.pid,
+            "category": category,
+            "counts": counts,
+            "candidates": candidates,
+        }, status=status.HTTP_200_OK)
+
+
+class BuildSolveView(CatalogueReadyMixin, APIView):
+    """
+    POST /api/builds/solve/
+    Body: { "drone_class": "5inch", "budget": 400, "pinned": ["<PID>", ...] | {"<category_slug>": "<PID>"},
+            "rank": "price" | "weight", "max_results": 5,
+            "allow_warnings": false, "time_limit_ms": 2000, "max_nodes": 200000, "slots": [...] }
+    Searches whole builds with constraint propagation and branch and bound
+    (see solver.py) instead of the wizard's slot-by-slot picks.
+    Returns { complete, stopped, nodes, elapsed_ms, layouts,
+              builds: [{parts, total_price, total_weight_g, unknown_price, unknown_weight, status, warnings}] }
+    """
+    def post(self, request):
+        from components.solver import parse_options, solve
+
+        data = request.data if isinstance(request.data, dict) else None
+        if data is None:
+            return Response({"error": "Request body must be an object."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            options = parse_options(data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = solve(**options)
+        return Response({
+            "drone_class": options['drone_class'],
+            "rank": options['rank'],
+            "budget": options['budget'],
+            **result,
+        }, status=status.HTTP_200_OK)
+
+
+class BuildSuggestView(CatalogueReadyMixin, APIView):
+    """
+    POST /api/builds/suggest/
+    Body: { "build": { "<category_slug>": <component> | "<PID>" | null, ... }, "k": 5, "slots": [...] }
+    "Complete my build": the k best components for every empty slot against
+    the filled ones, from in-memory pre-extracted columns (see suggest.py).
+    Returns { build_warnings, slots: { "<category_slug>": { counts, candidates:
+    [{pid, name, approx_price, price, weight_g, status, warnings}] } } }
+    """
+    def post(self, request):
+        from components.compat import load_build
+        from components.suggest import DEFAULT_K, MAX_K, empty_slots, suggest
+
+        data = request.data if isinstance(request.data, dict) else {}
+        payload = data.get('build')
+        if not isinstance(payload, dict):
+            return Response({"error": "Request body must include a 'build' mapping of category to component or PID."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        k = data.get('k', DEFAULT_K)
+        if isinstance(k, bool) or not isinstance(k, int) or k < 1:
+            return Response({"error": "'k' must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+        slots = data.get('slots')
+        if slots is not None and (not isinstance(slots, list) or not all(isinstance(s, str) for s in slots)):
+            return Response({"error": "'slots' must be a list of category slugs."}, status=status.HTTP_400_BAD_REQUEST)
+
+        build, missing = load_build(payload)
+        if missing:
+            return Response({"error": f"Unknown PIDs: {', '.join(missing)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if slots is None:
+            slots = empty_slots(payload, build)
+        return Response(suggest(build, slots, min(k, MAX_K)), status=status.HTTP_200_OK)
 
 
 # ── Schema File Management ──────────────────────────────────
@@ -126,6 +407,11 @@ class SchemaView(APIView):
             try:
                 with open(schema_path, 'w', encoding='utf-8') as f:
                     json.dump(new_schema, f, indent=2)
+                # Hot query paths are derived from the schema's compat fields
+                ensure_query_indexes()
+                # Pair severities come from its _compat_hard/_compat_soft
+                from components.compat_index import rebuild_compat_index
+                rebuild_compat_index()
                 return Response({"message": "Schema updated successfully."})
             except Exception as e:
                 return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -176,6 +462,22 @@ class BugReportView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class ReadinessView(APIView):
+    """
+    GET /api/health/ready/
+    200 once the catalogue is ready; 503 while a background first-boot seed
+    is pending or running, or after it failed until the next start retries
+    it (see autoseed.py).
+    """
+    def get(self, request):
+        from components.autoseed import RETRY_AFTER_SECONDS, seed_state
+        state = seed_state()
+        if state == 'ready':
+            return Response({"status": state}, status=status.HTTP_200_OK)
+        return Response({"status": state}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+
+
 class ResetToGoldenView(APIView):
     """
     POST /api/maintenance/reset-to-golden/
@@ -232,105 +534,101 @@ class ResetToExamplesView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class ImportPartsView(APIView):
+class ImportPartsView(CatalogueReadyMixin, APIView):
     """
     POST /api/import/parts/
-    Accepts a JSON array of parts. Upserts by PID.
+    Accepts a JSON array of parts. Upserts by PID in batches (see importer.py).
     Returns { created: N, updated: N, errors: [...] }
+
+    With Content-Type: application/x-ndjson the body is one part per line,
+    read incrementally (not subject to DATA_UPLOAD_MAX_MEMORY_SIZE) and
+    committed in batches of ?batch_size= (default 1000, max 5000). The
+    response streams NDJSON: one
+    {line, pid, error} object per rejected line, then
+    {done: true, created, updated, errors, lines}.
     """
+    NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+    MAX_BATCH_SIZE = 5000
+
     def post(self, request):
+        from components.importer import BATCH_SIZE, import_ndjson, import_parts
+
+        if request.content_type.split(';')[0].strip().lower() in self.NDJSON_TYPES:
+            try:
+                batch_size = int(request.query_params.get('batch_size', BATCH_SIZE))
+            except ValueError:
+                return Response({"error": "batch_size must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+            batch_size = max(1, min(batch_size, self.MAX_BATCH_SIZE))
+            results = import_ndjson(request._request, batch_size=batch_size)
+            lines = (json.dumps(result) + '\n' for result in results)
+            return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
         parts = request.data
         if not isinstance(parts, list):
             return Response({"error": "Request body must be a JSON array of parts."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        created = 0
-        updated = 0
-        errors = []
+        return Response(import_parts(parts), status=status.HTTP_200_OK)
 
-        for i, part in enumerate(parts):
-            pid = part.get('pid')
-            category_slug = part.get('category')
-            name = part.get('name')
 
-            if not pid or not category_slug or not name:
-                errors.append({"index": i, "pid": pid, "error": "Missing required field: pid, category, or name."})
-                continue
+class ImportJobCreateView(CatalogueReadyMixin, APIView):
+    """
+    POST /api/import/jobs/
+    Same body as /api/import/parts/ (JSON array, or NDJSON with
+    Content-Type: application/x-ndjson). Returns 202 immediately with
+    { id, status, url }; the import runs in a background worker (see jobs.py).
+    """
+    def post(self, request):
+        from components.jobs import submit_job
 
-            try:
-                category = Category.objects.get(slug=category_slug)
-            except Category.DoesNotExist:
-                errors.append({"index": i, "pid": pid, "error": f"Category '{category_slug}' not found."})
-                continue
-
-            # Extract core fields, everything else goes to schema_data
-            core_keys = {'pid', 'category', 'name', 'manufacturer', 'description',
-                         'link', 'approx_price', 'image_file', 'manual_link'}
-            schema_data = {k: v for k, v in part.items() if k not in core_keys}
-
-            defaults = {
-                'category': category,
-                'name': name,
-                'manufacturer': part.get('manufacturer', 'Unknown'),
-                'description': part.get('description', ''),
-                'link': part.get('link', ''),
-                'approx_price': part.get('approx_price', ''),
-                'image_file': part.get('image_file', ''),
-                'manual_link': part.get('manual_link', ''),
-                'schema_data': schema_data,
-            }
+        if request.content_type.split(';')[0].strip().lower() in ImportPartsView.NDJSON_TYPES:
+            job = submit_job(stream=request._request)
+        else:
+            parts = request.data
+            if not isinstance(parts, list):
+                return Response({"error": "Request body must be a JSON array of parts."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            job = submit_job(parts=parts)
 
-            try:
-                with transaction.atomic():
-                    obj, was_created = Component.objects.update_or_create(pid=pid, defaults=defaults)
-                if was_created:
-                    created += 1
-                else:
-                    updated += 1
-            except Exception as e:
-                errors.append({"index": i, "pid": pid, "error": str(e)})
+        url = f'/api/import/jobs/{job.id}/'
+        return Response({"id": str(job.id), "status": job.status, "url": url},
+                        status=status.HTTP_202_ACCEPTED, headers={'Location': url})
+
+
+class ImportJobDetailView(APIView):
+    """
+    GET /api/import/jobs/<id>/
+    Returns job status, progress (0–1), created/updated/error counts and
+    the first errors.
+    """
+    def get(self, request, job_id):
+        from components.jobs import check_stale
 
-        return Response({"created": created, "updated": updated, "errors": errors},
-                        status=status.HTTP_200_OK)
+        job = get_object_or_404(ImportJob, pk=job_id)
+        return Response(ImportJobSerializer(check_stale(job)).data, status=status.HTTP_200_OK)
 
 
-class ExportPartsView(APIView):
+class ExportPartsView(CatalogueReadyMixin, APIView):
     """
     GET /api/export/parts/
     Exports all parts (or ?category=slug) in re-importable JSON format.
+    ?format=ndjson streams one part per line; see export.py.
     """
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
+
     def get(self, request):
         category_slug = request.query_params.get('category', None)
-        queryset = Component.objects.select_related('category').all()
+        queryset = Component.objects.all()
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
-
-        parts = []
-        for comp in queryset:
-            part = {
-                'pid': comp.pid,
-                'category': comp.category.slug,
-                'name': comp.name,
-                'manufacturer': comp.manufacturer,
-                'description': comp.description,
-                'link': comp.link,
-                'approx_price': comp.approx_price,
-                'image_file': comp.image_file,
-                'manual_link': comp.manual_link,
-            }
-            # Merge schema_data fields at top level for flat import format
-            if comp.schema_data:
-                part.update(comp.schema_data)
-            parts.append(part)
-
-        return Response(parts, status=status.HTTP_200_OK)
+        return streaming_export(request, queryset, ndjson=request.accepted_renderer.format == 'ndjson')
 
 
 # ---------------------------------------------------------------------------
 # Build Guide views
 # ---------------------------------------------------------------------------
 
-class BuildGuideViewSet(viewsets.ModelViewSet):
+class BuildGuideViewSet(CatalogueReadyMixin, viewsets.ModelViewSet):
     """CRUD for build guides. List uses lightweight serializer; detail includes nested steps."""
     lookup_field = 'pid'
 
@@ -389,13 +687,23 @@ class GuideMediaUploadView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class BuildSessionViewSet(viewsets.ModelViewSet):
-    """CRUD for build sessions. Serial number auto-generated on create."""
+class BuildSessionViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    """
+    CRUD for build sessions. Serial number auto-generated on create.
+    Supports ?fields= and ?schema_fields= (paths into the snapshot/timing
+    JSON columns, e.g. component_snapshot.FRM-0001.name).
+    """
     serializer_class = BuildSessionSerializer
     lookup_field = 'serial_number'
+    projected_json_fields = (
+        'guide_snapshot', 'component_snapshot', 'step_timing', 'step_notes', 'component_checklist',
+    )
 
     def get_queryset(self):
-        qs = BuildSession.objects.select_related('guide').prefetch_related('photos').order_by('-started_at')
+        qs = BuildSession.objects.select_related('guide').order_by('-started_at')
+        sparse = self.get_sparse_fields()
+        if sparse is None or 'photos' in sparse:
+            qs = qs.prefetch_related('photos')
         guide_pid = self.request.query_params.get('guide', None)
         if guide_pid:
             qs = qs.filter(guide__pid=guide_pid)
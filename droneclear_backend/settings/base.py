@@ -77,6 +77,13 @@ DATABASES = {
     }
 }
 
+# SQLite journal mode, set on every new connection (components/apps.py).
+# WAL: readers never wait on a writer (e.g. a catalogue reset) and see the
+# last committed data until the write commits. WAL needs shared memory, so
+# it does not work on network filesystems; use DELETE there (prod.py).
+# Empty leaves the database's own mode alone.
+SQLITE_JOURNAL_MODE = os.environ.get('DRONECLEAR_SQLITE_JOURNAL_MODE', 'WAL')
+
 # ---------------------------------------------------------------------------
 # Password validation
 # ---------------------------------------------------------------------------
@@ -114,6 +121,38 @@ MEDIA_ROOT = BASE_DIR / 'media'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 12 * 1024 * 1024   # 12 MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 12 * 1024 * 1024    # 12 MB
 
+# ---------------------------------------------------------------------------
+# Caches (no external services: local memory per process)
+# ---------------------------------------------------------------------------
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered catalogue list responses (components/catalogue.py). LocMemCache
+    # evicts least-recently-used entries; CULL_FREQUENCY=8 drops 1/8 at a time.
+    'catalogue': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'catalogue-responses',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 64, 'CULL_FREQUENCY': 8},
+    },
+}
+CATALOGUE_RESPONSE_CACHE = 'catalogue'
+
+# Precompressed catalogue snapshots (components/snapshot.py), regenerated on demand
+CATALOGUE_SNAPSHOT_DIR = BASE_DIR / 'snapshots'
+
+# Spooled payloads of background import jobs (components/jobs.py), removed when a job ends
+IMPORT_JOBS_DIR = BASE_DIR / 'import_jobs'
+
+# First-boot golden seed on an empty database (components/autoseed.py):
+# 'sync' seeds during migrate, 'background' seeds after the server starts
+# (catalogue endpoints answer 503 "seeding" until done), 'off' never seeds
+AUTO_SEED = os.environ.get('DRONECLEAR_AUTO_SEED', 'sync')
+
+# Prebuilt golden seed row snapshots (components/seed_snapshot.py), keyed by a hash of the seed files
+SEED_SNAPSHOT_DIR = BASE_DIR / 'seed_snapshots'
+
 # ---------------------------------------------------------------------------
 # Misc
 # ---------------------------------------------------------------------------
@@ -19,6 +19,10 @@ CORS_ALLOWED_ORIGINS = [
     if origin.strip()
 ]
 
+# PythonAnywhere keeps files on a network filesystem, where SQLite's WAL
+# mode (shared memory) is unreliable; opt back in with the env variable
+SQLITE_JOURNAL_MODE = os.environ.get('DRONECLEAR_SQLITE_JOURNAL_MODE', 'DELETE')
+
 # Security hardening
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
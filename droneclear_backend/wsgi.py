@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'droneclear_backend.settings.prod')
 
 application = get_wsgi_application()
+
+# AUTO_SEED=background: seed a fresh catalogue (or retry a failed seed) now
+# that the app is up; a no-op when the tables do not exist yet
+from components.autoseed import start_background_seed  # noqa: E402
+from components.jobs import resume_jobs  # noqa: E402
+
+start_background_seed()
+# Import jobs still queued when the previous process stopped
+resume_jobs()